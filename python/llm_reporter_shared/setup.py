@@ -24,6 +24,13 @@ setup(
     install_requires=[
         # No external dependencies needed
     ],
+    entry_points={
+        "console_scripts": [
+            "llm-reporter-merge=llm_reporter_shared.merge:main",
+            "llm-reporter-junit=llm_reporter_shared.junit:main",
+            "llm-reporter-gotest=llm_reporter_shared.gotest:main",
+        ],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
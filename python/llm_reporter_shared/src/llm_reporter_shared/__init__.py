@@ -2,10 +2,18 @@
 
 __version__ = "0.1.0"
 
-from .config import ReporterConfig
-from .formatters import StreamingFormatter
-from .error_classifier import ErrorClassifier
-from .models import TestSuite, TestResult, TestStatus, ErrorInfo
+# Submodules are imported on first attribute access so that importing the
+# package (e.g. from a pytest entry-point plugin) stays cheap when no reporter
+# is activated.
+_LAZY_IMPORTS = {
+    "ReporterConfig": ".config",
+    "StreamingFormatter": ".formatters",
+    "ErrorClassifier": ".error_classifier",
+    "TestSuite": ".models",
+    "TestResult": ".models",
+    "TestStatus": ".models",
+    "ErrorInfo": ".models",
+}
 
 __all__ = [
     "ReporterConfig",
@@ -15,4 +23,20 @@ __all__ = [
     "TestResult",
     "TestStatus",
     "ErrorInfo",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """Import public names from their submodule on first use."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
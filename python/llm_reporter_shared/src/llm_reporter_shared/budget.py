@@ -0,0 +1,107 @@
+"""Output size budget for LLM reports."""
+
+from typing import Optional
+from .config import ReporterConfig
+
+# Rough size of a token in UTF-8 bytes for English text and code; token
+# limits are enforced as byte limits of this many bytes per token
+BYTES_PER_TOKEN = 4
+
+# Bytes kept free for the omitted-failures notice and the SUMMARY section;
+# smaller budgets get nothing but the summary, cut to fit
+SUMMARY_RESERVE = 512
+
+# Share of the remaining budget that full failure blocks may use; the rest
+# is left for one-line entries of the failures that follow
+DETAIL_SHARE = 0.75
+
+# Rendering levels, from most to least detailed
+LEVEL_DETAILED = 2
+LEVEL_LINES = 1
+LEVEL_COUNTS = 0
+
+
+class OutputBudget:
+    """Incremental accounting of the report size against a byte limit.
+
+    Everything written is charged as it is written, so the formatter never
+    needs a second pass. Failures degrade one way only: full blocks while
+    they fit in the detail share, then one line each, then only counted.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.level = LEVEL_DETAILED
+        self.omitted = 0
+        self._line_limit = max_bytes - SUMMARY_RESERVE
+        self._detail_limit = int(self._line_limit * DETAIL_SHARE)
+    
+    @property
+    def summary_only(self) -> bool:
+        """Whether the budget is too small for anything but the summary."""
+        return self.max_bytes <= SUMMARY_RESERVE
+    
+    @classmethod
+    def from_config(cls, config: ReporterConfig) -> Optional["OutputBudget"]:
+        """Create the budget for a configuration, or None if output is unbounded."""
+        limits = []
+        if config.max_output_bytes:
+            limits.append(config.max_output_bytes)
+        if config.max_output_tokens:
+            limits.append(config.max_output_tokens * BYTES_PER_TOKEN)
+        if not limits:
+            return None
+        return cls(min(limits))
+    
+    @staticmethod
+    def size(text: str) -> int:
+        """Size of text as written, in bytes."""
+        return len(text.encode("utf-8"))
+    
+    def charge(self, text: str):
+        """Account for text that is being written."""
+        self.used += self.size(text)
+    
+    def fits_detail(self, size: int, pending: int = 0) -> bool:
+        """Whether a full failure block of size bytes still fits.
+
+        ``pending`` is output that has been formatted but not written yet.
+        Once a block does not fit, later failures are never shown in full.
+        """
+        if self.level == LEVEL_DETAILED and self.used + pending + size <= self._detail_limit:
+            return True
+        self.level = min(self.level, LEVEL_LINES)
+        return False
+    
+    def detail_room(self, pending: int = 0) -> int:
+        """Bytes left for full failure blocks, without changing the level."""
+        return self._detail_limit - self.used - pending
+    
+    def fits_line(self, size: int, pending: int = 0) -> bool:
+        """Whether a one-line failure entry of size bytes still fits."""
+        if self.level >= LEVEL_LINES and self.used + pending + size <= self._line_limit:
+            return True
+        self.level = LEVEL_COUNTS
+        return False
+    
+    def fits_note(self, size: int) -> bool:
+        """Whether a line that is not a failure (e.g. collection progress) still fits.
+
+        Unlike :meth:`fits_line`, a note that does not fit leaves the
+        rendering level of the failures alone.
+        """
+        return self.used + size <= self._line_limit
+    
+    def clip(self, text: str) -> str:
+        """The leading whole lines of text that fit in what is left of the budget."""
+        room = self.max_bytes - self.used
+        if self.size(text) <= room:
+            return text
+        lines = []
+        for line in text.splitlines(keepends=True):
+            room -= self.size(line)
+            if room < 0:
+                break
+            lines.append(line)
+        return "".join(lines)
@@ -0,0 +1,191 @@
+"""Bounded capture of failure data (messages, output) at collection time."""
+
+import io
+import sys
+from collections import deque
+from typing import Deque, Iterable, Optional, TextIO, Tuple
+
+
+def clip_text(text: str, limit: Optional[int]) -> str:
+    """Keep at most ``limit`` characters of text as a head and a tail slice.
+    
+    The middle is replaced by an elision marker so both the start of a
+    message (usually the assertion) and its end (usually the differing part
+    of a long value) survive. A limit of 0 or None disables clipping.
+    """
+    if not limit or len(text) <= limit:
+        return text
+    
+    head = limit // 2
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... [{omitted} characters omitted] ...\n{text[-tail:]}"
+
+
+class TailBuffer(io.TextIOBase):
+    """Writable text stream that keeps only the last lines written to it.
+
+    At most ``max_lines`` complete lines and ``max_chars`` characters are
+    kept, so memory stays bounded however much is written; older lines are
+    dropped and counted. A single huge write, or an overlong line, is cut
+    to its tail before it is split into lines.
+    """
+    
+    def __init__(self, max_lines: int, max_chars: int):
+        super().__init__()
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.dropped = 0
+        self.clipped = False
+        self._lines: Deque[str] = deque()
+        self._chars = 0
+        self._partial = ""
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        length = len(text)
+        if length > self.max_chars:
+            self.dropped += text.count("\n", 0, length - self.max_chars)
+            text = text[-self.max_chars:]
+            self.clipped = True
+        
+        lines = text.split("\n")
+        lines[0] = self._partial + lines[0]
+        partial = lines.pop()
+        if len(partial) > self.max_chars:
+            partial = partial[-self.max_chars:]
+            self.clipped = True
+        self._partial = partial
+        
+        buffered = self._lines
+        for line in lines:
+            buffered.append(line)
+            self._chars += len(line) + 1
+        while buffered and (len(buffered) > self.max_lines
+                            or self._chars + len(self._partial) > self.max_chars):
+            self._chars -= len(buffered.popleft()) + 1
+            self.dropped += 1
+        return length
+    
+    def getvalue(self) -> str:
+        """Return the kept text, noting how many earlier lines were dropped."""
+        lines = list(self._lines)
+        if self._partial:
+            lines.append(self._partial)
+        if not lines:
+            return ""
+        if self.dropped:
+            lines.insert(0, f"[{self.dropped} earlier lines dropped]")
+        elif self.clipped:
+            lines.insert(0, "[earlier output dropped]")
+        return "\n".join(lines)
+    
+    def clear(self):
+        """Forget everything written so far."""
+        self._lines.clear()
+        self._chars = 0
+        self._partial = ""
+        self.dropped = 0
+        self.clipped = False
+
+
+def format_output_tail(streams: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """Format the non-empty ``(name, text)`` stream tails as one block, or None."""
+    parts = [f"[{name}]\n{text.rstrip()}" for name, text in streams if text and text.strip()]
+    return "\n".join(parts) if parts else None
+
+
+def tail_text(text: str, max_lines: int, max_chars: int) -> str:
+    """Return the bounded tail of already captured text (see :class:`TailBuffer`)."""
+    buffer = TailBuffer(max_lines, max_chars)
+    buffer.write(text)
+    return buffer.getvalue()
+
+
+class OutputCapture:
+    """Capture stdout, stderr and logging of one test at a time into ring buffers.
+
+    Call :meth:`start` when a test starts and :meth:`stop` when it ends;
+    :meth:`tail` formats what the failing test wrote, and :meth:`clear`
+    discards it, so only the last ``max_lines`` lines of each stream are
+    ever held.
+    
+    Log records of ``log_level`` and above are captured; the root logger's
+    level is lowered to it while capturing if needed. The capture handler
+    is hidden from ``logging.basicConfig`` so a test can still configure
+    logging.
+    """
+    
+    def __init__(self, max_lines: int, max_chars: int, log_level: Optional[int] = None):
+        import logging
+        
+        self._logging = logging
+        self.stdout = TailBuffer(max_lines, max_chars)
+        self.stderr = TailBuffer(max_lines, max_chars)
+        self.log = TailBuffer(max_lines, max_chars)
+        self._handler = logging.StreamHandler(self.log)
+        self._handler.setLevel(logging.INFO if log_level is None else log_level)
+        self._handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+        self._saved: Optional[Tuple[TextIO, TextIO]] = None
+        self._saved_level: Optional[int] = None
+        self._basic_config = None
+    
+    def _hidden_basic_config(self, *args, **kwargs):
+        """``logging.basicConfig`` as if the capture handler were not installed."""
+        root = self._logging.getLogger()
+        root.removeHandler(self._handler)
+        try:
+            self._basic_config(*args, **kwargs)
+        finally:
+            root.addHandler(self._handler)
+    
+    def start(self):
+        """Redirect output into the buffers."""
+        if self._saved is not None:
+            return
+        self._saved = (sys.stdout, sys.stderr)
+        sys.stdout = self.stdout  # type: ignore[assignment]
+        sys.stderr = self.stderr  # type: ignore[assignment]
+        
+        logging = self._logging
+        root = logging.getLogger()
+        root.addHandler(self._handler)
+        if root.getEffectiveLevel() > self._handler.level:
+            self._saved_level = root.level
+            root.setLevel(self._handler.level)
+        self._basic_config = logging.basicConfig
+        logging.basicConfig = self._hidden_basic_config
+    
+    def stop(self):
+        """Restore the original streams; safe to call when not capturing."""
+        if self._saved is None:
+            return
+        sys.stdout, sys.stderr = self._saved
+        self._saved = None
+        
+        logging = self._logging
+        root = logging.getLogger()
+        root.removeHandler(self._handler)
+        # Unless the test set a level of its own
+        if self._saved_level is not None and root.level == self._handler.level:
+            root.setLevel(self._saved_level)
+        self._saved_level = None
+        if logging.basicConfig == self._hidden_basic_config:
+            logging.basicConfig = self._basic_config
+        self._basic_config = None
+    
+    def tail(self) -> Optional[str]:
+        """Format the captured tails of all streams, or None if nothing was written."""
+        return format_output_tail((
+            ("stdout", self.stdout.getvalue()),
+            ("stderr", self.stderr.getvalue()),
+            ("log", self.log.getvalue()),
+        ))
+    
+    def clear(self):
+        """Discard the captured output."""
+        self.stdout.clear()
+        self.stderr.clear()
+        self.log.clear()
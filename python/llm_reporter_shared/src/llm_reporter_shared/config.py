@@ -2,10 +2,54 @@
 
 import os
 import json
-from typing import Optional, Literal, Dict, Any
-from dataclasses import dataclass, field
+from typing import Optional, Literal, Dict, Any, Tuple, MutableMapping
+from dataclasses import dataclass, field, fields, asdict
 
-OutputMode = Literal["summary", "detailed"]
+OutputMode = Literal["summary", "detailed", "delta"]
+
+OUTPUT_MODES = ("summary", "detailed", "delta")
+CONFIG_FILE_NAME = ".llm-reporter.json"
+DELTA_STATE_FILE = ".llm-reporter-state.json"
+
+# Environment variable carrying a resolved configuration to child processes
+SNAPSHOT_ENV_VAR = "LLM_REPORTER_CONFIG_SNAPSHOT"
+
+# Directories containing one of these are treated as the project root; the
+# config file lookup does not walk above them
+PROJECT_ROOT_MARKERS = (".git", ".hg", "pyproject.toml", "setup.py", "setup.cfg")
+
+# Environment variables that take part in configuration resolution
+CONFIG_ENV_VARS = (
+    "LLM_REPORTER_MODE",
+    "LLM_OUTPUT_MODE",
+    "LLM_OUTPUT_FILE",
+    "LLM_INCLUDE_PASSED_SUITES",
+    "LLM_MAX_VALUE_LENGTH",
+    "LLM_MAX_MESSAGE_LENGTH",
+    "LLM_MAX_OUTPUT_BYTES",
+    "LLM_MAX_OUTPUT_TOKENS",
+    "LLM_STACK_TRACE_LINES",
+    "LLM_DETECT_PATTERNS",
+    "LLM_DELTA_STATE_FILE",
+    "LLM_RESULTS_FILE",
+    "LLM_COLLECTION_CACHE_FILE",
+    "LLM_MEASURE_RESOURCES",
+    "LLM_MEASURE_ALLOCATIONS",
+    "LLM_RESOURCE_SAMPLE_RATE",
+    "LLM_MINIMAL_TRACEBACKS",
+    "LLM_OUTPUT_TAIL_LINES",
+    "LLM_OUTPUT_TAIL_CHARS",
+    "LLM_CAPTURE_OUTPUT",
+    "LLM_CAPTURE_LOCALS",
+    "LLM_LOCALS_MAX_BYTES",
+    "LLM_STRUCTURAL_DIFF",
+)
+
+# Per-process caches: config files found by start directory, parsed config
+# files validated by (mtime, size), and the resolved snapshot with its key
+_lookup_cache: Dict[str, str] = {}
+_file_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_snapshot_cache: Optional[Tuple[Tuple[Any, ...], "ReporterConfig"]] = None
 
 
 @dataclass
@@ -15,108 +59,384 @@ class ReporterConfig:
     mode: OutputMode = "summary"
     include_passed_suites: bool = False
     max_value_length: int = 100
+    max_message_length: int = 10000
+    max_output_bytes: int = 0
+    max_output_tokens: int = 0
     stack_trace_lines: int = 5
     detect_patterns: bool = True
     output_file: Optional[str] = None
+    delta_state_file: str = DELTA_STATE_FILE
+    results_file: Optional[str] = None
+    collection_cache_file: Optional[str] = None
+    measure_resources: bool = False
+    measure_allocations: bool = False
+    resource_sample_rate: float = 1.0
+    minimal_tracebacks: bool = False
+    output_tail_lines: int = 20
+    output_tail_chars: int = 2000
+    capture_output: bool = False
+    capture_locals: bool = False
+    locals_max_bytes: int = 1000
+    structural_diff: bool = False
     
     @classmethod
     def from_env(cls) -> "ReporterConfig":
         """Load configuration from environment variables."""
-        config = cls()
-        
-        # Check both LLM_REPORTER_MODE and LLM_OUTPUT_MODE for compatibility
-        mode = os.environ.get("LLM_REPORTER_MODE") or os.environ.get("LLM_OUTPUT_MODE")
-        if mode and mode.lower() in ["summary", "detailed"]:
-            config.mode = mode.lower()
-        
-        # Output file
-        output_file = os.environ.get("LLM_OUTPUT_FILE")
-        if output_file:
-            config.output_file = output_file
+        return cls(**_env_values())
+    
+    @classmethod
+    def from_file(cls, file_path: str = CONFIG_FILE_NAME) -> "ReporterConfig":
+        """Load configuration from JSON file."""
+        return cls(**_read_config_file(file_path))
+    
+    @classmethod
+    def snapshot(cls, exported: Optional[str] = None) -> "ReporterConfig":
+        """Return the configuration resolved from file and environment.
         
-        # Include passed suites
-        include_passed = os.environ.get("LLM_INCLUDE_PASSED_SUITES", "").lower()
-        if include_passed in ["true", "1", "yes"]:
-            config.include_passed_suites = True
+        The result is computed once per process and reused while the
+        environment and the config file's mtime are unchanged. A snapshot
+        exported by a parent process (see :meth:`export_snapshot`), passed
+        as ``exported`` or found in the environment, is used as-is, skipping
+        file lookup and environment parsing. The returned instance is
+        shared; use :meth:`load` to get a private copy.
+        """
+        global _snapshot_cache
         
-        # Max value length
-        max_length = os.environ.get("LLM_MAX_VALUE_LENGTH")
-        if max_length and max_length.isdigit():
-            config.max_value_length = int(max_length)
+        serialized = exported or os.environ.get(SNAPSHOT_ENV_VAR)
+        if serialized:
+            key: Tuple[Any, ...] = (serialized, os.getcwd())
+            if _snapshot_cache is not None and _snapshot_cache[0] == key:
+                return _snapshot_cache[1]
+            inherited = _snapshot_from_env(serialized)
+            if inherited is not None:
+                _snapshot_cache = (key, inherited)
+                return inherited
         
-        # Stack trace lines
-        stack_lines = os.environ.get("LLM_STACK_TRACE_LINES")
-        if stack_lines and stack_lines.isdigit():
-            config.stack_trace_lines = int(stack_lines)
+        path = find_config_file()
+        stamp = _file_stamp(path) if path else None
+        key = (path, stamp) + tuple(os.environ.get(name) for name in CONFIG_ENV_VARS)
+        if _snapshot_cache is not None and _snapshot_cache[0] == key:
+            return _snapshot_cache[1]
         
-        # Pattern detection
-        detect = os.environ.get("LLM_DETECT_PATTERNS", "").lower()
-        if detect in ["false", "0", "no"]:
-            config.detect_patterns = False
+        # File config first, environment variables take precedence
+        values = _read_config_file(path) if path else {}
+        values.update(_env_values())
+        config = ReporterConfig(**values)
         
+        _snapshot_cache = (key, config)
         return config
     
     @classmethod
-    def from_file(cls, file_path: str = ".llm-reporter.json") -> "ReporterConfig":
-        """Load configuration from JSON file."""
-        config = cls()
+    def load(cls, options: Optional[Dict[str, Any]] = None,
+             exported: Optional[str] = None) -> "ReporterConfig":
+        """Load configuration from multiple sources with precedence."""
+        values = cls.snapshot(exported).to_dict()
         
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                
-                if "mode" in data and data["mode"] in ["summary", "detailed"]:
-                    config.mode = data["mode"]
-                if "includePassedSuites" in data:
-                    config.include_passed_suites = bool(data["includePassedSuites"])
-                if "maxValueLength" in data:
-                    config.max_value_length = int(data["maxValueLength"])
-                if "stackTraceLines" in data:
-                    config.stack_trace_lines = int(data["stackTraceLines"])
-                if "detectPatterns" in data:
-                    config.detect_patterns = bool(data["detectPatterns"])
-                if "outputFile" in data:
-                    config.output_file = data["outputFile"]
-            except (json.JSONDecodeError, ValueError):
-                pass  # Use defaults on error
+        # Override with explicit options
+        if options:
+            values.update(_option_values(options))
         
-        return config
+        return cls(**values)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the configuration as a JSON-serializable dict."""
+        return asdict(self)
     
     @classmethod
-    def load(cls, options: Optional[Dict[str, Any]] = None) -> "ReporterConfig":
-        """Load configuration from multiple sources with precedence."""
-        # Start with file config
-        config = cls.from_file()
-        
-        # Override with environment variables
-        env_config = cls.from_env()
-        if env_config.mode != cls().mode:
-            config.mode = env_config.mode
-        if env_config.output_file is not None:
-            config.output_file = env_config.output_file
-        if env_config.include_passed_suites != cls().include_passed_suites:
-            config.include_passed_suites = env_config.include_passed_suites
-        if env_config.max_value_length != cls().max_value_length:
-            config.max_value_length = env_config.max_value_length
-        if env_config.stack_trace_lines != cls().stack_trace_lines:
-            config.stack_trace_lines = env_config.stack_trace_lines
-        if env_config.detect_patterns != cls().detect_patterns:
-            config.detect_patterns = env_config.detect_patterns
+    def from_dict(cls, data: Dict[str, Any]) -> "ReporterConfig":
+        """Create a configuration from :meth:`to_dict` output, ignoring unknown keys."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+    
+    def export_snapshot(self, target: MutableMapping[str, Any]):
+        """Expose this configuration to child processes (e.g. parallel workers).
         
-        # Override with explicit options
-        if options:
-            if "mode" in options and options["mode"] in ["summary", "detailed"]:
-                config.mode = options["mode"]
-            if "include_passed_suites" in options:
-                config.include_passed_suites = bool(options["include_passed_suites"])
-            if "max_value_length" in options:
-                config.max_value_length = int(options["max_value_length"])
-            if "stack_trace_lines" in options:
-                config.stack_trace_lines = int(options["stack_trace_lines"])
-            if "detect_patterns" in options:
-                config.detect_patterns = bool(options["detect_patterns"])
-            if "output_file" in options:
-                config.output_file = options["output_file"]
+        ``target`` is what the children receive: the environment passed to
+        a subprocess, or the ``workerinput`` of a pytest-xdist worker. This
+        process's own ``os.environ`` is left alone, so its later snapshots
+        still follow config file and environment changes. Children started
+        from the same working directory with the same ``LLM_*`` environment
+        pick the snapshot up in :meth:`snapshot` instead of resolving the
+        configuration again.
+        """
+        target[SNAPSHOT_ENV_VAR] = json.dumps({
+            "cwd": os.getcwd(),
+            "env": [os.environ.get(name) for name in CONFIG_ENV_VARS],
+            "config": self.to_dict(),
+        })
+
+
+def find_config_file(start: Optional[str] = None) -> Optional[str]:
+    """Find the config file in start (default: CWD) or its parents up to the project root."""
+    start = os.path.abspath(start or os.getcwd())
+    
+    # Only found files are cached: a config file created later must still
+    # be picked up
+    cached = _lookup_cache.get(start)
+    if cached is not None and os.path.isfile(cached):
+        return cached
+    
+    found = None
+    directory = start
+    while True:
+        candidate = os.path.join(directory, CONFIG_FILE_NAME)
+        if os.path.isfile(candidate):
+            found = candidate
+            break
+        if any(os.path.exists(os.path.join(directory, marker)) for marker in PROJECT_ROOT_MARKERS):
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    
+    if found is not None:
+        _lookup_cache[start] = found
+    return found
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Return the (mtime, size) used to validate cached file contents."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_config_file(file_path: str) -> Dict[str, Any]:
+    """Read config values from a JSON file, cached until the file changes."""
+    stamp = _file_stamp(file_path)
+    if stamp is None:
+        return {}
+    
+    cached = _file_cache.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return dict(cached[1])
+    
+    values: Dict[str, Any] = {}
+    try:
+        with open(file_path, "r") as f:
+            data = json.load(f)
         
-        return config
\ No newline at end of file
+        if "mode" in data and data["mode"] in OUTPUT_MODES:
+            values["mode"] = data["mode"]
+        if "includePassedSuites" in data:
+            values["include_passed_suites"] = bool(data["includePassedSuites"])
+        if "maxValueLength" in data:
+            values["max_value_length"] = int(data["maxValueLength"])
+        if "maxMessageLength" in data:
+            values["max_message_length"] = int(data["maxMessageLength"])
+        if "maxOutputBytes" in data:
+            values["max_output_bytes"] = int(data["maxOutputBytes"])
+        if "maxOutputTokens" in data:
+            values["max_output_tokens"] = int(data["maxOutputTokens"])
+        if "stackTraceLines" in data:
+            values["stack_trace_lines"] = int(data["stackTraceLines"])
+        if "detectPatterns" in data:
+            values["detect_patterns"] = bool(data["detectPatterns"])
+        if "outputFile" in data:
+            values["output_file"] = data["outputFile"]
+        if "deltaStateFile" in data:
+            values["delta_state_file"] = str(data["deltaStateFile"])
+        if "resultsFile" in data:
+            values["results_file"] = data["resultsFile"]
+        if "collectionCacheFile" in data:
+            values["collection_cache_file"] = data["collectionCacheFile"]
+        if "measureResources" in data:
+            values["measure_resources"] = bool(data["measureResources"])
+        if "measureAllocations" in data:
+            values["measure_allocations"] = bool(data["measureAllocations"])
+        if "resourceSampleRate" in data:
+            values["resource_sample_rate"] = _sample_rate(data["resourceSampleRate"])
+        if "minimalTracebacks" in data:
+            values["minimal_tracebacks"] = bool(data["minimalTracebacks"])
+        if "outputTailLines" in data:
+            values["output_tail_lines"] = int(data["outputTailLines"])
+        if "outputTailChars" in data:
+            values["output_tail_chars"] = int(data["outputTailChars"])
+        if "captureOutput" in data:
+            values["capture_output"] = bool(data["captureOutput"])
+        if "captureLocals" in data:
+            values["capture_locals"] = bool(data["captureLocals"])
+        if "localsMaxBytes" in data:
+            values["locals_max_bytes"] = int(data["localsMaxBytes"])
+        if "structuralDiff" in data:
+            values["structural_diff"] = bool(data["structuralDiff"])
+    except (OSError, json.JSONDecodeError, ValueError, TypeError, AttributeError):
+        values = {}  # Use defaults on error
+    
+    _file_cache[file_path] = (stamp, values)
+    return dict(values)
+
+
+def _env_values() -> Dict[str, Any]:
+    """Read config values explicitly set in environment variables."""
+    values: Dict[str, Any] = {}
+    
+    # Check both LLM_REPORTER_MODE and LLM_OUTPUT_MODE for compatibility
+    mode = os.environ.get("LLM_REPORTER_MODE") or os.environ.get("LLM_OUTPUT_MODE")
+    if mode and mode.lower() in OUTPUT_MODES:
+        values["mode"] = mode.lower()
+    
+    # Output file
+    output_file = os.environ.get("LLM_OUTPUT_FILE")
+    if output_file:
+        values["output_file"] = output_file
+    
+    # Include passed suites
+    include_passed = os.environ.get("LLM_INCLUDE_PASSED_SUITES", "").lower()
+    if include_passed in ["true", "1", "yes"]:
+        values["include_passed_suites"] = True
+    
+    # Max value length
+    max_length = os.environ.get("LLM_MAX_VALUE_LENGTH")
+    if max_length and max_length.isdigit():
+        values["max_value_length"] = int(max_length)
+    
+    # Max captured message length
+    max_message = os.environ.get("LLM_MAX_MESSAGE_LENGTH")
+    if max_message and max_message.isdigit():
+        values["max_message_length"] = int(max_message)
+    
+    # Total report size budget
+    max_bytes = os.environ.get("LLM_MAX_OUTPUT_BYTES")
+    if max_bytes and max_bytes.isdigit():
+        values["max_output_bytes"] = int(max_bytes)
+    max_tokens = os.environ.get("LLM_MAX_OUTPUT_TOKENS")
+    if max_tokens and max_tokens.isdigit():
+        values["max_output_tokens"] = int(max_tokens)
+    
+    # Stack trace lines
+    stack_lines = os.environ.get("LLM_STACK_TRACE_LINES")
+    if stack_lines and stack_lines.isdigit():
+        values["stack_trace_lines"] = int(stack_lines)
+    
+    # Pattern detection
+    detect = os.environ.get("LLM_DETECT_PATTERNS", "").lower()
+    if detect in ["false", "0", "no"]:
+        values["detect_patterns"] = False
+    
+    # Previous run used by delta mode
+    delta_state_file = os.environ.get("LLM_DELTA_STATE_FILE")
+    if delta_state_file:
+        values["delta_state_file"] = delta_state_file
+    
+    # Binary results dump (e.g. for merging sharded runs)
+    results_file = os.environ.get("LLM_RESULTS_FILE")
+    if results_file:
+        values["results_file"] = results_file
+    
+    # Files known to contain no tests, skipped by pytest collection
+    collection_cache_file = os.environ.get("LLM_COLLECTION_CACHE_FILE")
+    if collection_cache_file:
+        values["collection_cache_file"] = collection_cache_file
+    
+    # Per-test resource measurements
+    if os.environ.get("LLM_MEASURE_RESOURCES", "").lower() in ["true", "1", "yes"]:
+        values["measure_resources"] = True
+    if os.environ.get("LLM_MEASURE_ALLOCATIONS", "").lower() in ["true", "1", "yes"]:
+        values["measure_allocations"] = True
+    sample_rate = os.environ.get("LLM_RESOURCE_SAMPLE_RATE")
+    if sample_rate:
+        try:
+            values["resource_sample_rate"] = _sample_rate(sample_rate)
+        except ValueError:
+            pass
+    
+    # Skip the test runner's own traceback rendering
+    if os.environ.get("LLM_MINIMAL_TRACEBACKS", "").lower() in ["true", "1", "yes"]:
+        values["minimal_tracebacks"] = True
+    
+    # Output kept from failing tests (0 lines disables capturing)
+    tail_lines = os.environ.get("LLM_OUTPUT_TAIL_LINES")
+    if tail_lines and tail_lines.isdigit():
+        values["output_tail_lines"] = int(tail_lines)
+    tail_chars = os.environ.get("LLM_OUTPUT_TAIL_CHARS")
+    if tail_chars and tail_chars.isdigit():
+        values["output_tail_chars"] = int(tail_chars)
+    if os.environ.get("LLM_CAPTURE_OUTPUT", "").lower() in ["true", "1", "yes"]:
+        values["capture_output"] = True
+    
+    # Locals of the failing frame
+    if os.environ.get("LLM_CAPTURE_LOCALS", "").lower() in ["true", "1", "yes"]:
+        values["capture_locals"] = True
+    locals_bytes = os.environ.get("LLM_LOCALS_MAX_BYTES")
+    if locals_bytes and locals_bytes.isdigit():
+        values["locals_max_bytes"] = int(locals_bytes)
+    
+    # Path-addressed diffs of compared dicts, lists and sets
+    if os.environ.get("LLM_STRUCTURAL_DIFF", "").lower() in ["true", "1", "yes"]:
+        values["structural_diff"] = True
+    
+    return values
+
+
+def _option_values(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate explicit reporter options."""
+    values: Dict[str, Any] = {}
+    
+    if "mode" in options and options["mode"] in OUTPUT_MODES:
+        values["mode"] = options["mode"]
+    if "include_passed_suites" in options:
+        values["include_passed_suites"] = bool(options["include_passed_suites"])
+    if "max_value_length" in options:
+        values["max_value_length"] = int(options["max_value_length"])
+    if "max_message_length" in options:
+        values["max_message_length"] = int(options["max_message_length"])
+    if "max_output_bytes" in options:
+        values["max_output_bytes"] = int(options["max_output_bytes"])
+    if "max_output_tokens" in options:
+        values["max_output_tokens"] = int(options["max_output_tokens"])
+    if "stack_trace_lines" in options:
+        values["stack_trace_lines"] = int(options["stack_trace_lines"])
+    if "detect_patterns" in options:
+        values["detect_patterns"] = bool(options["detect_patterns"])
+    if "output_file" in options:
+        values["output_file"] = options["output_file"]
+    if "delta_state_file" in options:
+        values["delta_state_file"] = str(options["delta_state_file"])
+    if "results_file" in options:
+        values["results_file"] = options["results_file"]
+    if "collection_cache_file" in options:
+        values["collection_cache_file"] = options["collection_cache_file"]
+    if "measure_resources" in options:
+        values["measure_resources"] = bool(options["measure_resources"])
+    if "measure_allocations" in options:
+        values["measure_allocations"] = bool(options["measure_allocations"])
+    if "resource_sample_rate" in options:
+        values["resource_sample_rate"] = _sample_rate(options["resource_sample_rate"])
+    if "minimal_tracebacks" in options:
+        values["minimal_tracebacks"] = bool(options["minimal_tracebacks"])
+    if "output_tail_lines" in options:
+        values["output_tail_lines"] = int(options["output_tail_lines"])
+    if "output_tail_chars" in options:
+        values["output_tail_chars"] = int(options["output_tail_chars"])
+    if "capture_output" in options:
+        values["capture_output"] = bool(options["capture_output"])
+    if "capture_locals" in options:
+        values["capture_locals"] = bool(options["capture_locals"])
+    if "locals_max_bytes" in options:
+        values["locals_max_bytes"] = int(options["locals_max_bytes"])
+    if "structural_diff" in options:
+        values["structural_diff"] = bool(options["structural_diff"])
+    
+    return values
+
+
+def _sample_rate(value: Any) -> float:
+    """Parse a sampling rate, clamped to [0, 1]."""
+    return min(1.0, max(0.0, float(value)))
+
+
+def _snapshot_from_env(serialized: str) -> Optional[ReporterConfig]:
+    """Decode a snapshot exported by a parent process with the same directory and environment."""
+    try:
+        payload = json.loads(serialized)
+        if payload.get("cwd") != os.getcwd():
+            return None
+        if payload.get("env") != [os.environ.get(name) for name in CONFIG_ENV_VARS]:
+            return None
+        return ReporterConfig.from_dict(payload["config"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""Delta between two test runs for compact re-run reports."""
+
+import os
+import re
+import json
+from typing import Callable, List, Optional, Dict, Any, Set, Tuple, Iterable
+from dataclasses import dataclass, field
+from .models import TestSuite, TestResult, TestStatus, ErrorInfo
+
+STATE_VERSION = 2
+
+# Parts of an error that differ between runs of the same failure:
+# addresses, object ids and timings
+_VOLATILE_PARTS = re.compile(
+    r"0x[0-9a-fA-F]+"
+    r"|\bid[=:]\s*\d+"
+    r"|\b\d+(?:\.\d+)?\s?(?:ns|us|ms|s|sec|secs|seconds)\b"
+)
+
+# Error fields kept in the state and compared between runs
+_SIGNATURE_FIELDS = ("type", "message", "expected", "actual")
+
+# The tests of a suite that take part in a delta (default: suite.tests)
+SuiteTests = Callable[[TestSuite], Iterable[TestResult]]
+
+
+def _suite_tests(suite: TestSuite) -> Iterable[TestResult]:
+    return suite.tests
+
+
+@dataclass
+class FailureChange:
+    """A current failure together with the previous run's failure, if any."""
+    suite: TestSuite
+    test: TestResult
+    previous: Optional[TestResult] = None
+
+
+@dataclass
+class RunDelta:
+    """What changed between two runs."""
+    new_failures: List[FailureChange] = field(default_factory=list)
+    changed_failures: List[FailureChange] = field(default_factory=list)
+    fixed_tests: List[FailureChange] = field(default_factory=list)
+    unchanged_failures: int = 0
+
+
+def _test_key(suite: TestSuite, test: TestResult) -> Tuple[str, str]:
+    """Join key of a test across runs."""
+    return (suite.file_path, test.full_name)
+
+
+def _mask_volatile(text: Optional[str]) -> Optional[str]:
+    return _VOLATILE_PARTS.sub("_", text) if text else text
+
+
+def _failure_signature(test: TestResult) -> Optional[Tuple[Optional[str], ...]]:
+    """What has to stay equal for a failure to count as unchanged.
+    
+    Error type, message, expected and actual value are compared exactly,
+    except for addresses, object ids and timings, which differ on every
+    run of the same failure.
+    """
+    if not test.error:
+        return None
+    return tuple(_mask_volatile(getattr(test.error, name)) for name in _SIGNATURE_FIELDS)
+
+
+def failure_keys(suites: Iterable[TestSuite]) -> Set[Tuple[str, str]]:
+    """Join keys of the failed tests of a run."""
+    return {
+        _test_key(suite, test)
+        for suite in suites
+        for test in suite.tests
+        if test.status == TestStatus.FAILED
+    }
+
+
+def compute_delta(previous: Iterable[TestSuite], current: Iterable[TestSuite],
+                  tests: SuiteTests = _suite_tests) -> RunDelta:
+    """Compare two runs with a hash join on (file path, full test name).
+    
+    Only the previous run's failures are indexed, so memory is bounded by
+    the number of previous failures and each current test costs one lookup.
+    ``tests`` selects the current tests of a suite (e.g. including its
+    suite-level setup and teardown errors).
+    """
+    failed_before: Dict[Tuple[str, str], TestResult] = {}
+    for suite in previous:
+        for test in suite.tests:
+            if test.status == TestStatus.FAILED:
+                failed_before[_test_key(suite, test)] = test
+    
+    delta = RunDelta()
+    for suite in current:
+        for test in tests(suite):
+            before = failed_before.get(_test_key(suite, test))
+            if test.status == TestStatus.FAILED:
+                if before is None:
+                    delta.new_failures.append(FailureChange(suite, test))
+                elif _failure_signature(before) != _failure_signature(test):
+                    delta.changed_failures.append(FailureChange(suite, test, before))
+                else:
+                    delta.unchanged_failures += 1
+            elif test.status == TestStatus.PASSED and before is not None:
+                delta.fixed_tests.append(FailureChange(suite, test, before))
+    
+    return delta
+
+
+def _suite_entry(suite: TestSuite, tests: SuiteTests) -> Dict[str, Any]:
+    """State entry of a suite: its failed tests with the error fields of their signature."""
+    failures = []
+    for test in tests(suite):
+        if test.status != TestStatus.FAILED:
+            continue
+        failure: Dict[str, Any] = {"name": test.name, "full_name": test.full_name}
+        if test.error:
+            failure["error"] = {
+                name: getattr(test.error, name) for name in _SIGNATURE_FIELDS
+                if getattr(test.error, name) is not None
+            }
+        failures.append(failure)
+    return {"name": suite.name, "file_path": suite.file_path, "tests": failures}
+
+
+def save_run(file_path: str, suites: Iterable[TestSuite], tests: SuiteTests = _suite_tests):
+    """Persist the failures of a run as the baseline for the next delta.
+    
+    Passing tests are not stored: a fixed test is one that failed before
+    and passes now, so only previous failures are needed. The stored state
+    is replaced only for the files that ran; failures of files that were
+    not run this time (e.g. when re-running a single file) are kept.
+    """
+    entries: List[Dict[str, Any]] = []
+    ran: Set[str] = set()
+    for suite in suites:
+        ran.add(suite.file_path)
+        entry = _suite_entry(suite, tests)
+        if entry["tests"]:
+            entries.append(entry)
+    kept = [
+        _suite_entry(suite, _suite_tests) for suite in load_run(file_path) or []
+        if suite.file_path not in ran
+    ]
+    data: Dict[str, Any] = {"version": STATE_VERSION, "suites": kept + entries}
+    
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, file_path)
+
+
+def load_run(file_path: str) -> Optional[List[TestSuite]]:
+    """Load a run saved by :func:`save_run`, or None if there is none.
+    
+    A malformed state file, or one of another version, is treated like a
+    missing one.
+    """
+    try:
+        with open(file_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+        return None
+    
+    suites = []
+    try:
+        for suite_data in data.get("suites", []):
+            suite = TestSuite(name=suite_data["name"], file_path=suite_data["file_path"])
+            for test_data in suite_data.get("tests", []):
+                error = None
+                if "error" in test_data:
+                    error_data = test_data["error"]
+                    error = ErrorInfo(
+                        type=error_data["type"],
+                        message=error_data["message"],
+                        expected=error_data.get("expected"),
+                        actual=error_data.get("actual")
+                    )
+                suite.tests.append(TestResult(
+                    name=test_data["name"],
+                    full_name=test_data["full_name"],
+                    status=TestStatus.FAILED,
+                    error=error
+                ))
+            suites.append(suite)
+    except (KeyError, TypeError, AttributeError):
+        return None
+    return suites
@@ -0,0 +1,334 @@
+"""Linear-time summaries of the difference between an expected and an actual value.
+
+Long values are useless once truncated from the end: the part that differs
+is usually somewhere in the middle. :func:`diff_summary` finds the common
+prefix and suffix of the two values and shows a window around the first
+and the last differing position. Multi-line values are compared line by
+line the same way, and only the bounded block of lines between the common
+prefix and suffix is shown. Nothing here is quadratic (no ``difflib``), so
+summarizing multi-megabyte values costs a few block comparisons.
+
+:func:`structural_diff` compares nested dicts, lists and sets instead and
+lists the paths at which they differ, within node and time budgets.
+"""
+
+import time
+from collections.abc import Mapping, Set as AbstractSet
+from typing import Any, List, Optional, Sequence
+
+from .variables import format_value
+
+# Values from this size on are summarized here instead of by the test
+# runner's own (difflib based) comparison
+LARGE_VALUE_CHARS = 10000
+
+# Characters shown on each side of a differing position
+DIFF_CONTEXT = 30
+
+# Differing lines shown per side in multi-line summaries
+DIFF_LINES = 10
+
+# Items compared per slice comparison when scanning for the common prefix
+# (larger slices stop paying off: their copies leave the CPU caches)
+_BLOCK = 16384
+
+
+def _items_equal(a: Any, b: Any) -> bool:
+    """Item equality that counts a failing comparison as a difference."""
+    try:
+        return bool(a is b or a == b)
+    except Exception:  # e.g. arrays without a truth value
+        return False
+
+
+def common_prefix(a: Sequence, b: Sequence, start: int = 0) -> int:
+    """Length of the common prefix of two strings or lists.
+
+    With ``start``, the scan begins there: the result is the index of the
+    first difference at or after it. Blocks are compared with slice
+    equality (C speed) and the first differing block is bisected the same
+    way, so no item is compared in a Python loop. Lists with items whose
+    comparison fails (e.g. numpy arrays) are scanned item by item instead.
+    """
+    try:
+        return _block_prefix(a, b, start)
+    except Exception:
+        limit = min(len(a), len(b))
+        while start < limit and _items_equal(a[start], b[start]):
+            start += 1
+        return start
+
+
+def _block_prefix(a: Sequence, b: Sequence, start: int) -> int:
+    limit = min(len(a), len(b))
+    while start < limit:
+        end = min(start + _BLOCK, limit)
+        if a[start:end] != b[start:end]:
+            break
+        start = end
+    else:
+        return limit
+    # The first difference is in a[start:end]
+    while end - start > 1:
+        middle = (start + end) // 2
+        if a[start:middle] == b[start:middle]:
+            start = middle
+        else:
+            end = middle
+    return start
+
+
+def common_suffix(a: Sequence, b: Sequence, limit: int) -> int:
+    """Length of the common suffix of two strings or lists, at most ``limit``.
+    
+    Scanned like :func:`common_prefix`, from the end.
+    """
+    try:
+        return _block_suffix(a, b, limit)
+    except Exception:
+        len_a, len_b = len(a), len(b)
+        size = 0
+        while size < limit and _items_equal(a[len_a - size - 1], b[len_b - size - 1]):
+            size += 1
+        return size
+
+
+def _block_suffix(a: Sequence, b: Sequence, limit: int) -> int:
+    len_a, len_b = len(a), len(b)
+    size = 0
+    while size < limit:
+        step = min(_BLOCK, limit - size)
+        if a[len_a - size - step:len_a - size] != b[len_b - size - step:len_b - size]:
+            break
+        size += step
+    else:
+        return limit
+    # The suffix is between size and size + step items long
+    end = size + step
+    while end - size > 1:
+        middle = (size + end) // 2
+        if a[len_a - middle:len_a - size] == b[len_b - middle:len_b - size]:
+            size = middle
+        else:
+            end = middle
+    return size
+
+
+def _excerpt(value: str, start: int, end: int) -> str:
+    """Repr of ``value[start:end]`` clamped to the value, with ``...`` where it was cut."""
+    clamped_start, clamped_end = max(0, start), min(len(value), end)
+    text = repr(value[clamped_start:clamped_end])
+    if clamped_start > 0:
+        text = "..." + text
+    if clamped_end < len(value):
+        text += "..."
+    return text
+
+
+def _text_diff(expected: str, actual: str, context: int) -> List[str]:
+    """Describe where two single strings differ, with windows around the differences."""
+    prefix = common_prefix(expected, actual)
+    suffix = common_suffix(expected, actual, min(len(expected), len(actual)) - prefix)
+    expected_end = len(expected) - suffix
+    actual_end = len(actual) - suffix
+    
+    lines = [f"first difference at index {prefix} "
+             f"(expected length {len(expected)}, received length {len(actual)})"]
+    if max(expected_end, actual_end) - prefix <= 2 * context:
+        # The differing region fits into one window
+        lines.append(f"  expected: {_excerpt(expected, prefix - context, expected_end + context)}")
+        lines.append(f"  received: {_excerpt(actual, prefix - context, actual_end + context)}")
+        return lines
+    
+    lines.append(f"  expected: {_excerpt(expected, prefix - context, prefix + context)}")
+    lines.append(f"  received: {_excerpt(actual, prefix - context, prefix + context)}")
+    lines.append(f"last difference at index {expected_end - 1} of expected, {actual_end - 1} of received")
+    lines.append(f"  expected: {_excerpt(expected, expected_end - context, expected_end + context)}")
+    lines.append(f"  received: {_excerpt(actual, actual_end - context, actual_end + context)}")
+    return lines
+
+
+def _bounded_lines(lines: List[str], first: int, marker: str, max_lines: int, context: int) -> List[str]:
+    """Label differing lines with their side, keeping the first and last ``max_lines`` // 2."""
+    width = 4 * context
+    
+    def show(offset: int, line: str) -> str:
+        if len(line) > width:
+            line = line[:width] + "..."
+        return f"{marker} {first + offset + 1:4d} | {line}"
+    
+    if len(lines) <= max_lines:
+        return [show(i, line) for i, line in enumerate(lines)]
+    head = max_lines - max_lines // 2
+    tail = max_lines // 2
+    output = [show(i, line) for i, line in enumerate(lines[:head])]
+    output.append(f"{marker}      | [{len(lines) - head - tail} lines omitted]")
+    output.extend(show(len(lines) - tail + i, line) for i, line in enumerate(lines[-tail:]))
+    return output
+
+
+def _lines_diff(expected: str, actual: str, context: int, max_lines: int) -> List[str]:
+    """Describe the block of lines between the common leading and trailing lines."""
+    expected_lines = expected.split("\n")
+    actual_lines = actual.split("\n")
+    prefix = common_prefix(expected_lines, actual_lines)
+    suffix = common_suffix(expected_lines, actual_lines,
+                           min(len(expected_lines), len(actual_lines)) - prefix)
+    expected_block = expected_lines[prefix:len(expected_lines) - suffix]
+    actual_block = actual_lines[prefix:len(actual_lines) - suffix]
+    
+    lines = [f"first differing line {prefix + 1} "
+             f"(expected {len(expected_lines)} lines, received {len(actual_lines)} lines)"]
+    if len(expected_block) == 1 and len(actual_block) == 1:
+        # A single changed line: show where in the line it differs
+        lines.extend(_text_diff(expected_block[0], actual_block[0], context))
+        return lines
+    lines.extend(_bounded_lines(expected_block, prefix, "  expected", max_lines, context))
+    lines.extend(_bounded_lines(actual_block, prefix, "  received", max_lines, context))
+    return lines
+
+
+def diff_summary(expected: str, actual: str, context: int = DIFF_CONTEXT,
+                 max_lines: int = DIFF_LINES) -> Optional[List[str]]:
+    """Summarize how ``actual`` differs from ``expected``, or None if they are equal.
+
+    Runs in time linear in the length of the values and returns at most
+    about ``2 * max_lines + 5`` lines of at most a few windows' width.
+    Multi-line values are compared line by line.
+    """
+    if expected == actual:
+        return None
+    if "\n" in expected or "\n" in actual:
+        return _lines_diff(expected, actual, context, max_lines)
+    return _text_diff(expected, actual, context)
+
+
+def short_repr(value: str, limit: int = 2 * DIFF_CONTEXT) -> str:
+    """Repr of the start of a string, for one-line mentions of large values."""
+    if len(value) <= limit:
+        return repr(value)
+    return repr(value[:limit]) + "..."
+
+
+# Limits of structural_diff: differences reported, nodes visited, seconds
+STRUCTURE_DIFFERENCES = 10
+STRUCTURE_NODES = 1000000
+STRUCTURE_TIME_BUDGET = 0.1
+
+_MISSING = "<missing>"
+
+
+def is_structured(value: Any) -> bool:
+    """Whether a value is a container that :func:`structural_diff` descends into."""
+    return isinstance(value, (Mapping, list, tuple, set, frozenset))
+
+
+def _child_path(path: str, key: Any) -> str:
+    if isinstance(key, str) and key.isidentifier():
+        return f"{path}.{key}"
+    return f"{path}[{format_value(key)}]"
+
+
+class _StructuralDiff:
+    """Depth-first comparison of two JSON-like values, stopping at its budgets."""
+    
+    def __init__(self, max_differences: int, max_nodes: int, time_budget: float):
+        self.max_differences = max_differences
+        self.max_nodes = max_nodes
+        self.deadline = time.perf_counter() + time_budget
+        self.differences: List[str] = []
+        self.nodes = 0
+        self.stopped: Optional[str] = None
+    
+    def add(self, path: str, left: str, right: str):
+        if len(self.differences) >= self.max_differences:
+            self.stopped = f"stopped after {self.max_differences} differences"
+            return
+        self.differences.append(f"{path}: {left} != {right}")
+    
+    def compare(self, path: str, left: Any, right: Any):
+        if self.stopped:
+            return
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            self.stopped = f"stopped after comparing {self.max_nodes} values"
+            return
+        if not self.nodes % 256 and time.perf_counter() > self.deadline:
+            self.stopped = "stopped at the time budget"
+            return
+        try:
+            if left is right or left == right:
+                return
+        except Exception:  # e.g. arrays without a truth value
+            pass
+        
+        if isinstance(left, Mapping) and isinstance(right, Mapping):
+            self.compare_mappings(path, left, right)
+        elif isinstance(left, (set, frozenset)) and isinstance(right, (set, frozenset)):
+            self.compare_sets(path, left, right)
+        elif isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)) \
+                and type(left) is type(right):
+            self.compare_sequences(path, left, right)
+        else:
+            self.add(path, format_value(left), format_value(right))
+    
+    def compare_mappings(self, path: str, left: Mapping, right: Mapping):
+        # Key lookups are hashed: O(len(left) + len(right)) before descending
+        for key, value in left.items():
+            if key in right:
+                self.compare(_child_path(path, key), value, right[key])
+            else:
+                self.add(_child_path(path, key), format_value(value), _MISSING)
+            if self.stopped:
+                return
+        for key, value in right.items():
+            if key not in left:
+                self.add(_child_path(path, key), _MISSING, format_value(value))
+                if self.stopped:
+                    return
+    
+    def compare_sets(self, path: str, left: AbstractSet, right: AbstractSet):
+        only_left = left - right
+        only_right = right - left
+        if only_left:
+            self.add(path, f"contains {format_value(only_left)}", _MISSING)
+        if only_right:
+            self.add(path, _MISSING, f"contains {format_value(only_right)}")
+    
+    def compare_sequences(self, path: str, left: Sequence, right: Sequence):
+        # Equal runs are skipped with block-wise slice comparisons
+        shorter = min(len(left), len(right))
+        index = common_prefix(left, right)
+        while index < shorter:
+            self.compare(f"{path}[{index}]", left[index], right[index])
+            if self.stopped:
+                return
+            index = common_prefix(left, right, index + 1)
+        if len(left) != len(right):
+            self.add(f"{path}", f"length {len(left)}", f"length {len(right)}")
+            extra_left = format_value(left[shorter]) if len(left) > shorter else _MISSING
+            extra_right = format_value(right[shorter]) if len(right) > shorter else _MISSING
+            self.add(f"{path}[{shorter}]", extra_left, extra_right)
+
+
+def structural_diff(left: Any, right: Any, max_differences: int = STRUCTURE_DIFFERENCES,
+                    max_nodes: int = STRUCTURE_NODES,
+                    time_budget: float = STRUCTURE_TIME_BUDGET) -> Optional[List[str]]:
+    """Path-addressed differences of two nested values, e.g. ``$.items[42].price: 10 != 12``.
+
+    Dicts, lists, tuples and sets are descended into, equal subtrees are
+    skipped with one C-level comparison, and dict keys and set items are
+    matched by hashing. Values are shown with the bounded reprs of
+    :func:`variables.format_value`, ``<missing>`` stands for an absent key
+    or item. The walk stops at ``max_differences`` differences,
+    ``max_nodes`` compared values or ``time_budget`` seconds, noting why
+    in a last line. Returns None if no difference was found.
+    """
+    walk = _StructuralDiff(max_differences, max_nodes, time_budget)
+    walk.compare("$", left, right)
+    if not walk.differences:
+        return None
+    lines = list(walk.differences)
+    if walk.stopped:
+        lines.append(f"[{walk.stopped}]")
+    return lines
@@ -1,10 +1,20 @@
 """Output formatters for LLM test reporters."""
 
 import sys
-from typing import List, Optional, TextIO
+from typing import Iterable, List, Optional, TextIO
 from datetime import datetime
 from .models import TestSuite, TestResult, TestStatus, ErrorInfo
 from .config import ReporterConfig
+from .delta import RunDelta, compute_delta, failure_keys, load_run, save_run
+from .serialization import ResultWriter
+from .budget import OutputBudget, LEVEL_DETAILED, LEVEL_LINES, LEVEL_COUNTS
+from .ranking import Failure, FailureRanking
+from .diff import diff_summary
+from .resources import CPU_TIME_KEY, RSS_DELTA_KEY, ALLOC_PEAK_KEY, format_bytes, top_resource_tests
+
+# Heading of the one-line entries that follow full failure blocks once the
+# output budget is running out
+BUDGET_LINES_HEADING = "## MORE FAILURES (output budget reached, one line each)\n"
 
 
 class BaseFormatter:
@@ -14,6 +24,9 @@ class BaseFormatter:
         self.config = config
         self.output = output or sys.stdout
         self._file_handle = None
+        self.budget = OutputBudget.from_config(config)
+        self._budget_lines_started = False
+        self._collection_started = False
         
         # If output file is specified, open it
         if config.output_file:
@@ -26,9 +39,18 @@ class BaseFormatter:
     
     def write(self, text: str):
         """Write text to output."""
+        if self.budget:
+            self.budget.charge(text)
         self.output.write(text)
         self.output.flush()
     
+    def write_note(self, text: str) -> bool:
+        """Write a line that is not a failure if it fits the output budget."""
+        if self.budget is not None and not self.budget.fits_note(self.budget.size(text)):
+            return False
+        self.write(text)
+        return True
+    
     def close(self):
         """Close file handle if opened."""
         if self._file_handle:
@@ -39,77 +61,357 @@ class BaseFormatter:
         mode = self.config.mode.upper()
         return f"# LLM TEST REPORTER - {mode} MODE\n\n"
     
+    def _collection_heading(self) -> str:
+        """Return the COLLECTION heading the first time collection output is formatted."""
+        if self._collection_started:
+            return ""
+        self._collection_started = True
+        return "## COLLECTION\n"
+    
+    def format_collection_error(self, name: str, message: str) -> str:
+        """Format a collection error as it is reported, before tests run."""
+        message = self._truncate_value(message).replace("\n", " ")
+        return self._collection_heading() + f"- ERROR: {name}: {message}\n"
+    
+    def format_collection_progress(self, collected: int, elapsed: float) -> str:
+        """Format a progress line for a long-running collection."""
+        return self._collection_heading() + f"- COLLECTING: {collected} items so far ({elapsed:.0f}s)\n"
+    
+    def format_collection_summary(self, collected: int, selected: int, errors: int, duration: float,
+                                  cached_empty: int = 0) -> str:
+        """Format the outcome of the collection phase."""
+        output = self._collection_heading()
+        output += f"- COLLECTED: {collected} items"
+        if selected != collected:
+            output += f" ({selected} selected)"
+        output += f"\n- ERRORS: {errors}\n"
+        if cached_empty:
+            output += f"- SKIPPED FILES: {cached_empty} (unchanged, no tests last run)\n"
+        output += f"- DURATION: {duration:.2f}s\n\n"
+        return output
+    
     def format_suite(self, suite: TestSuite) -> str:
         """Format a test suite."""
         if self.config.mode == "summary":
             return self._format_suite_summary(suite)
+        elif self.config.mode == "delta":
+            # Rendered once the whole run can be compared with the previous one
+            return ""
+        elif self.budget is not None:
+            # Failures are ranked across suites and rendered at the end
+            return ""
         else:
             return self._format_suite_detailed(suite)
     
+    def _reported_failures(self, suite: TestSuite) -> List[TestResult]:
+        """Failures of a suite as they are reported.
+        
+        Tests that failed in setup with the same error as an earlier test
+        (``metadata["cascade_of"]``) are left out; their root failure carries
+        the count in ``metadata["cascaded"]``. Suite-level setup and teardown
+        errors are reported as failures of their own.
+        """
+        failures = [
+            t for t in suite.tests
+            if t.status == TestStatus.FAILED and "cascade_of" not in t.metadata
+        ]
+        for phase, error in (("setup", suite.setup_error), ("teardown", suite.teardown_error)):
+            if error is not None:
+                failures.append(TestResult(
+                    name=phase,
+                    full_name=f"{suite.name} > {phase}",
+                    status=TestStatus.FAILED,
+                    error=error,
+                    metadata={"phase": phase},
+                ))
+        return failures
+    
+    def _delta_tests(self, suite: TestSuite) -> List[TestResult]:
+        """Tests of a suite as compared in delta mode: the non-failed ones and the reported failures."""
+        return [t for t in suite.tests if t.status != TestStatus.FAILED] + self._reported_failures(suite)
+    
     def _format_suite_summary(self, suite: TestSuite) -> str:
         """Format suite in summary mode."""
-        failed_tests = [t for t in suite.tests if t.status == TestStatus.FAILED]
+        failed_tests = self._reported_failures(suite)
         
         if not failed_tests and not self.config.include_passed_suites:
             return ""
         
         output = f"SUITE: {suite.file_path}\n"
         
-        if failed_tests:
-            output += "FAILED TESTS:\n"
-            for test in failed_tests:
-                error_msg = self._truncate_value(test.error.message) if test.error else "No error message"
-                output += f"- {test.full_name}: {error_msg}\n"
-        else:
-            output += "ALL TESTS PASSED\n"
+        if self.budget:
+            return self._format_suite_summary_budgeted(suite, failed_tests, output)
         
-        return output + "\n"
+        if not failed_tests:
+            return output + "ALL TESTS PASSED\n\n"
+        
+        lines = [output, "FAILED TESTS:\n"]
+        for test in failed_tests:
+            error_msg = self._truncate_value(test.error.message) if test.error else "No error message"
+            suffix = self._cascade_suffix(test) if test.metadata else ""
+            lines.append(f"- {test.full_name}: {error_msg}{suffix}\n")
+        lines.append("\n")
+        return "".join(lines)
+    
+    def _format_suite_summary_budgeted(self, suite: TestSuite, failed_tests: List[TestResult], header: str) -> str:
+        """Format suite in summary mode, counting failures that no longer fit the budget."""
+        budget = self.budget
+        if not failed_tests:
+            text = header + "ALL TESTS PASSED\n\n"
+            return text if budget.fits_line(budget.size(text)) else ""
+        
+        output = ""
+        pending = 0
+        for test in failed_tests:
+            error_msg = self._truncate_value(test.error.message) if test.error else "No error message"
+            line = f"- {test.full_name}: {error_msg}{self._cascade_suffix(test)}\n"
+            if not output:
+                line = header + "FAILED TESTS:\n" + line
+            size = budget.size(line)
+            if budget.fits_line(size, pending):
+                output += line
+                pending += size
+            else:
+                budget.omitted += 1
+        
+        return output + "\n" if output else ""
     
     def _format_suite_detailed(self, suite: TestSuite) -> str:
         """Format suite in detailed mode."""
         output = ""
-        failed_tests = [t for t in suite.tests if t.status == TestStatus.FAILED]
+        failed_tests = self._reported_failures(suite)
+        
+        output += self._format_failures([(suite, test, None) for test in failed_tests])
+        
+        return output
+    
+    def _format_failures(self, failures: Iterable[Failure], pending: int = 0) -> str:
+        """Format numbered failure blocks, degrading them under the output budget.
+        
+        Without a budget every failure gets a full block. With one, failures
+        get full blocks while they fit, then one line each, then are only
+        counted in ``budget.omitted``. ``pending`` is the size of output
+        formatted before these failures but not written yet.
+        """
+        budget = self.budget
+        if budget is None:
+            # Appended with +=, which grows the string in place; joining a
+            # multi-megabyte report allocates it fresh and measures slower
+            output = ""
+            for index, (suite, test, note) in enumerate(failures, 1):
+                output += self._format_failure_detailed(suite, test, index, note)
+            return output
+        
+        blocks: List[str] = []
+        
+        total = len(failures) if hasattr(failures, "__len__") else None
+        for index, (suite, test, note) in enumerate(failures, 1):
+            if budget.level == LEVEL_COUNTS and total is not None:
+                # Nothing more will be shown: count the rest without
+                # formatting (or ranking) them
+                budget.omitted += total - index + 1
+                break
+            if budget.level == LEVEL_DETAILED:
+                block = self._format_failure_detailed(suite, test, index, note)
+                size = budget.size(block)
+                if budget.fits_detail(size, pending):
+                    # Values are summarized only for blocks shown in full,
+                    # and only if the summary still fits
+                    summary = self._summarize_values(test.error) if test.error else ""
+                    if summary and budget.size(summary) <= budget.detail_room(pending + size):
+                        block = self._format_failure_detailed(suite, test, index, note, summary)
+                        size = budget.size(block)
+                    blocks.append(block)
+                    pending += size
+                    continue
+            if budget.level >= LEVEL_LINES:
+                line = self._format_failure_line(suite, test)
+                if not self._budget_lines_started:
+                    line = BUDGET_LINES_HEADING + line
+                size = budget.size(line)
+                if budget.fits_line(size, pending):
+                    self._budget_lines_started = True
+                    blocks.append(line)
+                    pending += size
+                    continue
+            budget.omitted += 1
         
-        for i, test in enumerate(failed_tests, 1):
-            output += f"## TEST FAILURE #{i}\n"
-            output += f"SUITE: {suite.name}\n"
-            output += f"TEST: {test.full_name}\n"
-            output += f"FILE: {suite.file_path}:{test.line_number or '?'}\n"
+        return "".join(blocks)
+    
+    def _format_failure_line(self, suite: TestSuite, test: TestResult) -> str:
+        """Format a failure as a single line (used when the output budget runs low)."""
+        error_msg = self._truncate_value(test.error.message) if test.error else "No error message"
+        error_msg = error_msg.replace("\n", " ")
+        return f"- {test.full_name} ({suite.file_path}:{test.line_number or '?'}): {error_msg}{self._cascade_suffix(test)}\n"
+    
+    def _cascade_suffix(self, test: TestResult) -> str:
+        """Note the tests collapsed into a failure, for one-line entries."""
+        cascaded = test.metadata.get("cascaded")
+        if not cascaded:
+            return ""
+        return f" (+{cascaded} more tests failed in {test.metadata.get('phase', 'setup')} with this error)"
+    
+    def _format_failure_detailed(self, suite: TestSuite, test: TestResult, index: int, note: Optional[str] = None,
+                                 summary: str = "") -> str:
+        """Format a single failure block in detailed mode.
+        
+        ``summary`` is a DIFFERENCE block for values too long to show (see
+        :meth:`_summarize_values`); a difference recorded by the reporter is
+        shown without it.
+        """
+        # Parts are joined once: values and messages can be megabytes long
+        parts = [
+            f"## TEST FAILURE #{index}\n",
+            f"SUITE: {suite.name}\n",
+            f"TEST: {test.full_name}\n",
+            f"FILE: {suite.file_path}:{test.line_number or '?'}\n",
+        ]
+        phase = test.metadata.get("phase")
+        if phase and phase != "call":
+            parts.append(f"PHASE: {phase}\n")
+        cascaded = test.metadata.get("cascaded")
+        if cascaded:
+            parts.append(f"CASCADE: {cascaded} more tests failed in {phase or 'setup'} with this error\n")
+        if note:
+            parts.append(f"{note}\n")
+        
+        if test.error:
+            parts.append(f"TYPE: {test.error.type}\n\n")
+            
+            if test.error.expected is not None:
+                parts.append(f"EXPECTED: {self._truncate_value(test.error.expected)}\n")
+            if test.error.actual is not None:
+                parts.append(f"RECEIVED: {self._truncate_value(test.error.actual)}\n")
+            parts.append(self._format_difference(test.error) or summary)
+            
+            if test.error.code_context:
+                parts.append("\nCODE CONTEXT:\n")
+                parts.append(test.error.code_context + "\n")
+            
+            if test.error.local_variables:
+                parts.append("\nLOCALS:\n")
+                parts.append(test.error.local_variables + "\n")
             
-            if test.error:
-                output += f"TYPE: {test.error.type}\n\n"
-                
-                if test.error.expected is not None:
-                    output += f"EXPECTED: {self._truncate_value(test.error.expected)}\n"
-                if test.error.actual is not None:
-                    output += f"RECEIVED: {self._truncate_value(test.error.actual)}\n"
-                
-                if test.error.code_context:
-                    output += "\nCODE CONTEXT:\n"
-                    output += test.error.code_context + "\n"
-                
-                output += f"\nFAILURE REASON: {test.error.message}\n"
-                
-                if test.error.fix_hint:
-                    output += f"FIX HINT: {test.error.fix_hint}\n"
+            parts.append(f"\nFAILURE REASON: {test.error.message}\n")
             
-            output += "\n---\n"
+            if test.error.fix_hint:
+                parts.append(f"FIX HINT: {test.error.fix_hint}\n")
+            
+            if test.error.captured_output:
+                parts.append("\nCAPTURED OUTPUT (tail):\n")
+                parts.append(test.error.captured_output + "\n")
+        
+        parts.append("\n---\n")
+        return "".join(parts)
+    
+    def format_delta(self, delta: RunDelta, first_run: bool = False) -> str:
+        """Format the changes since the previous run (delta mode)."""
+        output = "## DELTA\n"
+        if first_run:
+            output += "- PREVIOUS RUN: none recorded, all failures are new\n"
+        output += f"- NEW FAILURES: {len(delta.new_failures)}\n"
+        output += f"- CHANGED FAILURES: {len(delta.changed_failures)}\n"
+        output += f"- FIXED TESTS: {len(delta.fixed_tests)}\n"
+        output += f"- UNCHANGED FAILURES: {delta.unchanged_failures}\n\n"
+        
+        failures = [
+            (change.suite, change.test, "DELTA: NEW") for change in delta.new_failures
+            if "cascade_of" not in change.test.metadata
+        ]
+        for change in delta.changed_failures:
+            if "cascade_of" in change.test.metadata:
+                continue
+            previous = change.previous.error.message if change.previous and change.previous.error else "No error message"
+            note = f"DELTA: CHANGED (previously: {self._truncate_value(previous)})"
+            failures.append((change.suite, change.test, note))
+        if self.budget:
+            new_tests = {id(change.test) for change in delta.new_failures}
+            ranked = FailureRanking(failures, lambda suite, test: id(test) in new_tests)
+            output += self._format_failures(ranked, self.budget.size(output))
+        else:
+            output += self._format_failures(failures)
+        
+        if delta.fixed_tests:
+            fixed = ""
+            pending = self.budget.size(output) if self.budget else 0
+            for change in delta.fixed_tests:
+                line = f"- {change.test.full_name} ({change.suite.file_path})\n"
+                if not fixed:
+                    line = "## FIXED TESTS\n" + line
+                if self.budget:
+                    # Over budget, the count in the DELTA section has to do
+                    size = self.budget.size(line)
+                    if not self.budget.fits_line(size, pending):
+                        break
+                    pending += size
+                fixed += line
+            if fixed:
+                output += fixed + "\n"
         
         return output
     
+    def format_ranked_failures(self, suites: List[TestSuite], previous: Optional[List[TestSuite]] = None) -> str:
+        """Format the failures of all suites, most valuable first (output budget mode).
+        
+        With the previous run's suites, failures that are new in this run
+        are ranked above ones that were already failing.
+        """
+        is_new = None
+        if previous is not None:
+            known = failure_keys(previous)
+            is_new = lambda suite, test: (suite.file_path, test.full_name) not in known
+        
+        failures = (
+            (suite, test, None)
+            for suite in suites
+            for test in self._reported_failures(suite)
+        )
+        return self._format_failures(FailureRanking(failures, is_new))
+    
+    def format_resources(self, suites: List[TestSuite]) -> str:
+        """Format the slowest and most memory-hungry tests (resource measurements)."""
+        slowest, hungriest = top_resource_tests(suites)
+        if not slowest:
+            return ""
+        
+        output = "## SLOWEST TESTS\n"
+        if self.config.resource_sample_rate < 1:
+            total = sum(s.total_count for s in suites)
+            measured = sum(1 for s in suites for t in s.tests if CPU_TIME_KEY in t.metadata)
+            output += f"(sampled: {measured} of {total} tests measured)\n"
+        for test in slowest:
+            output += f"- {test.duration:.2f}s (cpu {test.metadata[CPU_TIME_KEY]:.2f}s): {test.full_name}\n"
+        
+        if hungriest:
+            output += "## MOST MEMORY-HUNGRY TESTS\n"
+            for test in hungriest:
+                parts = []
+                if ALLOC_PEAK_KEY in test.metadata:
+                    parts.append(f"{format_bytes(test.metadata[ALLOC_PEAK_KEY])} peak allocations")
+                if RSS_DELTA_KEY in test.metadata:
+                    parts.append(f"RSS {'+' if test.metadata[RSS_DELTA_KEY] >= 0 else ''}"
+                                 f"{format_bytes(test.metadata[RSS_DELTA_KEY])}")
+                output += f"- {', '.join(parts)}: {test.full_name}\n"
+        
+        return output + "\n"
+    
+    def format_omitted(self, count: int) -> str:
+        """Format the notice for failures left out to stay within the output budget."""
+        return f"## OMITTED FAILURES\n- {count} more failures not shown (output budget reached)\n\n"
+    
     def format_summary(self, suites: List[TestSuite], duration: float, exit_code: int) -> str:
         """Format the final summary."""
-        total_tests = sum(len(s.tests) for s in suites)
-        passed_tests = sum(len([t for t in s.tests if t.status == TestStatus.PASSED]) for s in suites)
-        failed_tests = sum(len([t for t in s.tests if t.status == TestStatus.FAILED]) for s in suites)
-        skipped_tests = sum(len([t for t in s.tests if t.status == TestStatus.SKIPPED]) for s in suites)
+        total_tests = sum(s.total_count for s in suites)
+        passed_tests = sum(s.passed_count for s in suites)
+        failed_tests = sum(s.failed_count for s in suites)
+        skipped_tests = sum(s.skipped_count for s in suites)
         
-        passed_suites = len([s for s in suites if all(t.status != TestStatus.FAILED for t in s.tests)])
-        failed_suites = len(suites) - passed_suites
+        failed_suites = len([s for s in suites if s.failed_count or s.setup_error or s.teardown_error])
+        passed_suites = len(suites) - failed_suites
         
         output = "---\n## SUMMARY\n"
         
-        if self.config.mode == "summary":
+        if self.config.mode in ("summary", "delta"):
             output += f"- PASSED SUITES: {passed_suites}\n"
             output += f"- FAILED SUITES: {failed_suites}\n"
         
@@ -136,6 +438,31 @@ class BaseFormatter:
         
         return output
     
+    def _format_difference(self, error: ErrorInfo) -> str:
+        """The difference recorded by the reporter (``error.diff``, e.g. a structural diff)."""
+        if error.diff:
+            return "DIFFERENCE:\n" + error.diff + "\n"
+        return ""
+    
+    def _summarize_values(self, error: ErrorInfo) -> str:
+        """Locate the difference of expected and received values too long to show in full.
+        
+        Only used under an output budget, for failures rendered in full:
+        summarizing large values costs far more than formatting the block.
+        """
+        if error.diff:
+            return ""
+        expected, actual = error.expected, error.actual
+        if expected is None or actual is None:
+            return ""
+        limit = self.config.max_value_length
+        if len(expected) <= limit and len(actual) <= limit and "\n" not in expected and "\n" not in actual:
+            return ""
+        summary = diff_summary(expected, actual)
+        if not summary:
+            return ""
+        return "DIFFERENCE:\n" + "\n".join(summary) + "\n"
+    
     def _truncate_value(self, value: str) -> str:
         """Truncate value to configured max length."""
         if len(value) <= self.config.max_value_length:
@@ -151,22 +478,76 @@ class StreamingFormatter(BaseFormatter):
         self._header_written = False
         self._suites: List[TestSuite] = []
         self._start_time = datetime.now()
+        self._results_handle = None
+        self._results_writer: Optional[ResultWriter] = None
+        
+        # If a results file is specified, suites are also dumped there
+        # (e.g. for merging sharded runs)
+        if config.results_file:
+            try:
+                self._results_handle = open(config.results_file, "wb")
+                self._results_writer = ResultWriter(self._results_handle)
+            except IOError:
+                pass
     
     def start(self):
         """Start the test run."""
-        self.write(self.format_header())
+        if self.budget is None or not self.budget.summary_only:
+            self.write(self.format_header())
         self._header_written = True
         self._start_time = datetime.now()
     
     def add_suite(self, suite: TestSuite):
         """Add a completed test suite."""
         self._suites.append(suite)
+        if self._results_writer:
+            self._results_writer.write_suite(suite)
         suite_output = self.format_suite(suite)
         if suite_output:
             self.write(suite_output)
     
-    def finish(self, exit_code: int = 0):
-        """Finish the test run."""
-        duration = (datetime.now() - self._start_time).total_seconds()
-        self.write(self.format_summary(self._suites, duration, exit_code))
-        self.close()
\ No newline at end of file
+    def finish(self, exit_code: int = 0, duration: Optional[float] = None):
+        """Finish the test run (duration defaults to the time since start)."""
+        if duration is None:
+            duration = (datetime.now() - self._start_time).total_seconds()
+        
+        if self._results_writer:
+            self._results_writer.end_run(exit_code, duration)
+            self._results_handle.close()
+        
+        summary_only = self.budget is not None and self.budget.summary_only
+        # Delta mode and budgeted detailed mode both compare with the previous run
+        keeps_state = self.config.mode == "delta" or (
+            self.budget is not None and self.config.mode == "detailed"
+        )
+        if summary_only:
+            pass  # no room for anything but the summary
+        elif self.config.mode == "delta":
+            previous = load_run(self.config.delta_state_file)
+            delta = compute_delta(previous or [], self._suites, self._delta_tests)
+            self.write(self.format_delta(delta, first_run=previous is None))
+        elif self.budget is not None and self.config.mode == "detailed":
+            previous = load_run(self.config.delta_state_file)
+            self.write(self.format_ranked_failures(self._suites, previous))
+        
+        if self.config.measure_resources or self.config.measure_allocations:
+            resources = self.format_resources(self._suites)
+            if resources and (self.budget is None or self.budget.fits_line(self.budget.size(resources))):
+                self.write(resources)
+        
+        summary = self.format_summary(self._suites, duration, exit_code)
+        if summary_only:
+            # Failures are only counted in the summary itself
+            self.write(self.budget.clip(summary))
+        else:
+            if self.budget and self.budget.omitted:
+                self.write(self.format_omitted(self.budget.omitted))
+            self.write(summary)
+        self.close()
+        
+        if keeps_state:
+            # This run becomes the baseline of the next delta or ranking
+            try:
+                save_run(self.config.delta_state_file, self._suites, self._delta_tests)
+            except OSError:
+                pass
\ No newline at end of file
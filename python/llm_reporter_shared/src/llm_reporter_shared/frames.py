@@ -0,0 +1,171 @@
+"""Stack frame filtering: user vs. library frames and recursion compression.
+
+Reported stack traces only need the frames of the code under test. Frames
+from the standard library, site-packages and the test runners themselves
+are collapsed into a single "[N library frames]" line, and consecutive
+identical frames (deep recursion) into one frame followed by
+"[frame repeated N times]". Filtering works on ``(filename, lineno, name)``
+triples, so source lines are only looked up for the frames that are
+finally shown, and runs in O(frames) with a per-path classification cache.
+"""
+
+import os
+import sys
+import linecache
+import traceback
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Frame identity used for filtering: (filename, lineno, function name)
+RawFrame = Tuple[str, int, str]
+
+# Classification of each file seen so far, and the library path prefixes
+_library_cache: Dict[str, bool] = {}
+_library_prefixes: Optional[Tuple[str, ...]] = None
+
+
+@dataclass
+class FrameEntry:
+    """A frame of a filtered stack, standing for ``count`` consecutive raw frames.
+
+    For a user frame, ``count`` is 1 plus the number of identical frames
+    collapsed into it. A library entry stands for a run of ``count``
+    library frames; its location is that of the innermost of them.
+    """
+    filename: str
+    lineno: int
+    name: str
+    library: bool = False
+    count: int = 1
+
+
+def library_prefixes() -> Tuple[str, ...]:
+    """Path prefixes of the standard library and installed packages, computed once."""
+    global _library_prefixes
+    if _library_prefixes is not None:
+        return _library_prefixes
+    
+    import site
+    import sysconfig
+    
+    paths = set()
+    for key in ("stdlib", "platstdlib", "purelib", "platlib"):
+        path = sysconfig.get_paths().get(key)
+        if path:
+            paths.add(path)
+    try:
+        paths.update(site.getsitepackages())
+    except AttributeError:  # old virtualenv site.py
+        pass
+    user_site = getattr(site, "getusersitepackages", lambda: None)()
+    if user_site:
+        paths.add(user_site)
+    
+    # Whole installation prefixes only when the project is not inside one
+    # (e.g. code checked out under /usr/src with Python in /usr)
+    cwd = os.path.normcase(os.path.abspath(os.getcwd())) + os.sep
+    for prefix in {sys.prefix, sys.base_prefix, sys.exec_prefix}:
+        normalized = os.path.normcase(os.path.abspath(prefix)) + os.sep
+        if not cwd.startswith(normalized):
+            paths.add(prefix)
+    
+    _library_prefixes = tuple(sorted(
+        {os.path.normcase(os.path.abspath(path)).rstrip(os.sep) + os.sep for path in paths}
+    ))
+    return _library_prefixes
+
+
+def is_library_file(filename: str) -> bool:
+    """Whether a frame's file belongs to the standard library or an installed package."""
+    cached = _library_cache.get(filename)
+    if cached is None:
+        if filename.startswith("<"):
+            # <frozen importlib._bootstrap>, <string>, ...
+            cached = True
+        else:
+            cached = os.path.normcase(os.path.abspath(filename)).startswith(library_prefixes())
+        _library_cache[filename] = cached
+    return cached
+
+
+def walk_frames(tb) -> Iterator[RawFrame]:
+    """Yield the frames of a traceback, outermost first, without reading source."""
+    for frame, lineno in traceback.walk_tb(tb):
+        code = frame.f_code
+        yield (code.co_filename, lineno, code.co_name)
+
+
+def filter_frames(frames: Iterable[RawFrame]) -> List[FrameEntry]:
+    """Collapse library runs and consecutive identical frames in one pass."""
+    entries: List[FrameEntry] = []
+    last: Optional[FrameEntry] = None
+    for filename, lineno, name in frames:
+        library = is_library_file(filename)
+        if last is not None:
+            if library and last.library:
+                last.filename, last.lineno, last.name = filename, lineno, name
+                last.count += 1
+                continue
+            if (not library and not last.library and last.lineno == lineno
+                    and last.filename == filename and last.name == name):
+                last.count += 1
+                continue
+        last = FrameEntry(filename, lineno, name, library)
+        entries.append(last)
+    return entries
+
+
+def deepest_user_frame(entries: List[FrameEntry]) -> Optional[FrameEntry]:
+    """The innermost user frame, or the innermost frame if all are library frames."""
+    for entry in reversed(entries):
+        if not entry.library:
+            return entry
+    return entries[-1] if entries else None
+
+
+def find_frame(tb, entry: FrameEntry):
+    """The innermost frame object of a traceback at an entry's location, or None."""
+    found = None
+    for frame, lineno in traceback.walk_tb(tb):
+        code = frame.f_code
+        if lineno == entry.lineno and code.co_name == entry.name and code.co_filename == entry.filename:
+            found = frame
+    return found
+
+
+def format_code_context(filename: str, lineno: int) -> Optional[str]:
+    """Format the source lines around a line, marking it with ">"."""
+    lines = linecache.getlines(filename)
+    if not lines or not lineno:
+        return None
+    
+    start = max(0, lineno - 3)
+    end = min(len(lines), lineno + 2)
+    context_lines = []
+    for i in range(start, end):
+        prefix = ">" if i == lineno - 1 else " "
+        context_lines.append(f"{prefix} {i+1:3d} | {lines[i].rstrip()}")
+    return "\n".join(context_lines)
+
+
+def format_frames(entries: List[FrameEntry], limit: Optional[int] = None) -> str:
+    """Format the innermost ``limit`` entries in the style of Python tracebacks.
+
+    A repeated user frame is shown once and followed by
+    "[frame repeated N times]" for its N further occurrences.
+    """
+    if limit is not None:
+        entries = entries[-limit:] if limit > 0 else []
+    output = []
+    for entry in entries:
+        if entry.library:
+            plural = "s" if entry.count != 1 else ""
+            output.append(f"  [{entry.count} library frame{plural}]\n")
+            continue
+        output.append(f'  File "{entry.filename}", line {entry.lineno}, in {entry.name}\n')
+        line = linecache.getline(entry.filename, entry.lineno).strip()
+        if line:
+            output.append(f"    {line}\n")
+        if entry.count > 1:
+            output.append(f"  [frame repeated {entry.count - 1} times]\n")
+    return "".join(output)
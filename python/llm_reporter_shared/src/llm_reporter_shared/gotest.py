@@ -0,0 +1,317 @@
+"""Render LLM reports from the event stream of ``go test -json``.
+
+Events are processed one line at a time. Output is buffered per running
+test in a bounded :class:`TailBuffer` and turned into error information
+only if the test fails; passing and skipped tests drop their buffer when
+they end. Each package becomes a suite that is handed to
+:class:`StreamingFormatter` as soon as the package's own ``pass``/``fail``
+event arrives, and like :mod:`.merge` a suite keeps only its failed tests
+plus per-status counts. Memory is therefore bounded by the output of the
+tests in flight, whatever the length of the stream.
+
+Compiler output is buffered per build: before Go 1.24 it arrives as plain
+text lines headed by ``# import/path``, from Go 1.24 on as
+``build-output`` events keyed by ``ImportPath``. A package that fails
+without failed tests reports the output of its build as setup error.
+Packages still open when the stream ends (e.g. it was cut off) are
+reported as failed, with their running tests as interrupted failures.
+
+Usage:
+    go test -json ./... | python -m llm_reporter_shared.gotest
+    python -m llm_reporter_shared.gotest go-test.jsonl
+"""
+
+import re
+import sys
+import json
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import TestStatus, TestResult, ErrorInfo
+from .config import ReporterConfig
+from .formatters import StreamingFormatter
+from .error_classifier import ErrorClassifier
+from .capture import TailBuffer, clip_text, tail_text, format_output_tail
+from .merge import MergedSuite
+
+# Output kept per running test (and per package or build, for build
+# errors and panics outside tests)
+TEST_OUTPUT_LINES = 200
+TEST_OUTPUT_CHARS = 20000
+
+# "    calc_test.go:12: expected 3, got 4", or "x.go:3:2: undefined: foo" from the compiler
+_LOCATION = re.compile(r"^(\s*)([\w./-]+\.go):(\d+)(?::\d+)?: ")
+
+_STATUSES = {"pass": TestStatus.PASSED, "fail": TestStatus.FAILED, "skip": TestStatus.SKIPPED}
+
+
+class GoTestReader:
+    """Turn ``go test -json`` events into one suite per package."""
+    
+    def __init__(self, config: ReporterConfig):
+        self.config = config
+        self.classifier = ErrorClassifier()
+        self.failed = False
+        self._suites: Dict[str, MergedSuite] = {}
+        self._running: Dict[Tuple[str, str], TailBuffer] = {}
+        self._package_output: Dict[str, TailBuffer] = {}
+        # Compiler output by import path ("pkg" or "pkg [pkg.test]"), and
+        # the build that plain output lines currently belong to
+        self._build_output: Dict[str, TailBuffer] = {}
+        self._plain_build: Optional[str] = None
+        # Failed descendants of each (package, test) still running
+        self._failed_subtests: Dict[Tuple[str, str], int] = {}
+    
+    def suites(self, lines: Iterable[str]) -> Iterator[MergedSuite]:
+        """Yield each package's suite when the package's final event arrives."""
+        for line in lines:
+            event = None
+            if line.startswith("{"):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    pass
+            if not isinstance(event, dict):
+                self._plain_output(line)
+                continue
+            suite = self.process(event)
+            if suite is not None:
+                yield suite
+        # Packages without a final event (the stream was cut off), also
+        # those with tests still running or with nothing but package output
+        unfinished = dict.fromkeys(
+            list(self._suites) + [key[0] for key in self._running] + list(self._package_output)
+        )
+        for package in unfinished:
+            suite = self._finish_package(package, TestStatus.FAILED, None, incomplete=True)
+            if suite is not None:
+                yield suite
+    
+    def process(self, event: dict) -> Optional[MergedSuite]:
+        """Apply one event; returns the package's suite once the package has finished."""
+        action = event.get("Action")
+        package = event.get("Package") or ""
+        test = event.get("Test")
+        
+        if action == "build-output":
+            self._buffer(self._build_output, event.get("ImportPath") or "").write(event.get("Output") or "")
+            return None
+        if not test:
+            if action == "output":
+                self._buffer(self._package_output, package).write(event.get("Output") or "")
+            elif action in _STATUSES:
+                return self._finish_package(package, _STATUSES[action], event.get("Elapsed"),
+                                            event.get("FailedBuild"))
+            return None
+        
+        key = (package, test)
+        if action == "run":
+            self._running[key] = self._new_buffer()
+        elif action == "output":
+            output = event.get("Output") or ""
+            if not output.lstrip().startswith(("=== ", "--- ")):
+                buffer = self._running.get(key)
+                if buffer is None:
+                    buffer = self._running[key] = self._new_buffer()
+                buffer.write(output)
+        elif action in _STATUSES:
+            buffer = self._running.pop(key, None)
+            self._add_test(package, test, _STATUSES[action], event.get("Elapsed"), buffer)
+        return None
+    
+    def _plain_output(self, line: str):
+        """Buffer a non-JSON line: compiler output of Go versions before 1.24."""
+        if line.startswith("# "):
+            self._plain_build = line[2:].strip()
+        if self._plain_build is None:
+            return  # not attributable to a build (e.g. "go: downloading ...")
+        self._buffer(self._build_output, self._plain_build).write(
+            line if line.endswith("\n") else line + "\n"
+        )
+    
+    def _own_builds(self, package: str) -> List[str]:
+        """Import paths of a package's builds ("pkg" and "pkg [pkg.test]")."""
+        return [path for path in self._build_output if path.split(" [", 1)[0] == package]
+    
+    def _package_build_output(self, package: str, failed_build: Optional[str]) -> str:
+        """Compiler output of the build that failed a package, if any was seen."""
+        builds = [failed_build] if failed_build else self._own_builds(package)
+        return "".join(
+            self._build_output[path].getvalue() + "\n" for path in builds if path in self._build_output
+        )
+    
+    def _new_buffer(self) -> TailBuffer:
+        return TailBuffer(TEST_OUTPUT_LINES, TEST_OUTPUT_CHARS)
+    
+    def _buffer(self, buffers: Dict[str, TailBuffer], package: str) -> TailBuffer:
+        buffer = buffers.get(package)
+        if buffer is None:
+            buffer = buffers[package] = self._new_buffer()
+        return buffer
+    
+    def _suite(self, package: str) -> MergedSuite:
+        suite = self._suites.get(package)
+        if suite is None:
+            suite = self._suites[package] = MergedSuite(name=package, file_path=package)
+        return suite
+    
+    def _add_test(self, package: str, test: str, status: TestStatus,
+                  elapsed: Optional[float], buffer: Optional[TailBuffer]):
+        suite = self._suite(package)
+        suite.counts[status] = suite.counts.get(status, 0) + 1
+        failed_subtests = self._failed_subtests.pop((package, test), 0)
+        if status != TestStatus.FAILED:
+            return
+        
+        # Counted for every enclosing test ("A" and "A/B" for "A/B/C")
+        position = test.find("/")
+        while position != -1:
+            key = (package, test[:position])
+            self._failed_subtests[key] = self._failed_subtests.get(key, 0) + 1
+            position = test.find("/", position + 1)
+        
+        output = buffer.getvalue() if buffer is not None else ""
+        error, line_number = self._error(output)
+        if not output.strip() and failed_subtests:
+            # A parent test that only failed through its subtests
+            error.message = f"{failed_subtests} subtests failed"
+        suite.tests.append(TestResult(
+            name=test,
+            full_name=f"{package} > {test}",
+            status=status,
+            duration=elapsed or 0.0,
+            line_number=line_number,
+            error=error,
+        ))
+    
+    def _finish_package(self, package: str, status: TestStatus, elapsed: Optional[float],
+                        failed_build: Optional[str] = None,
+                        incomplete: bool = False) -> Optional[MergedSuite]:
+        """Close a package: tests still running are failed, the suite is returned.
+        
+        ``incomplete`` packages ended without a final event; without failed
+        tests they are reported with a setup error saying so.
+        """
+        output = self._package_output.pop(package, None)
+        # Latest first, so subtests are counted before their parents
+        for key in reversed([key for key in self._running if key[0] == package]):
+            buffer = self._running.pop(key)
+            if status == TestStatus.FAILED:
+                # Interrupted by a panic or a timeout of the test binary
+                self._add_test(package, key[1], TestStatus.FAILED, None, buffer)
+        for key in [key for key in self._failed_subtests if key[0] == package]:
+            del self._failed_subtests[key]
+        
+        suite = self._suites.pop(package, None)
+        if status == TestStatus.FAILED:
+            self.failed = True
+            suite = suite or self._suite(package)
+            self._suites.pop(package, None)
+            if not suite.failed_count:
+                # Build errors (compiler output first, for the error
+                # location), panics in TestMain, ...
+                text = self._package_build_output(package, failed_build)
+                if incomplete:
+                    text += "Incomplete: the go test output ended before the package finished\n"
+                suite.setup_error, _ = self._error(text + (output.getvalue() if output else ""))
+        for path in self._own_builds(package):
+            del self._build_output[path]
+            if path == self._plain_build:
+                self._plain_build = None
+        if suite is None or (not suite.total_count and not suite.setup_error):
+            return None  # e.g. "no test files"
+        suite.duration = elapsed or 0.0
+        return suite
+    
+    def _error(self, output: str) -> Tuple[ErrorInfo, Optional[int]]:
+        """Error information from a failed test's output, and the line that reported it."""
+        lines = output.splitlines()
+        message = None
+        error_type = "TestFailure"
+        line_number = None
+        for index, line in enumerate(lines):
+            if line.startswith("panic:"):
+                error_type = "panic"
+                message = line[len("panic:"):].strip()
+                break
+            match = _LOCATION.match(line)
+            if match and message is None:
+                line_number = int(match.group(3))
+                # Suites are packages, so the file stays in the message;
+                # t.Errorf messages with several lines continue further indented
+                indent = len(match.group(1))
+                parts = [line.strip()]
+                for continuation in lines[index + 1:]:
+                    stripped = continuation.lstrip()
+                    if not stripped or len(continuation) - len(stripped) <= indent \
+                            or _LOCATION.match(continuation):
+                        break
+                    parts.append(stripped)
+                message = "\n".join(parts)
+        if message is None:
+            message = next((line.strip() for line in lines if line.strip()), "Test failed")
+        
+        error = ErrorInfo(type=error_type, message=clip_text(message, self.config.max_message_length))
+        if self.config.output_tail_lines > 0 and output.strip():
+            error.captured_output = format_output_tail([
+                ("output", tail_text(output, self.config.output_tail_lines, self.config.output_tail_chars))
+            ])
+        expected, actual = self.classifier.extract_values(error.message)
+        if expected:
+            error.expected = expected
+        if actual:
+            error.actual = actual
+        error.fix_hint = self.classifier.generate_fix_hint(error)
+        return error, line_number
+
+
+def render(lines: Iterable[str], config: ReporterConfig) -> int:
+    """Stream ``go test -json`` events into a report and return its exit code."""
+    reader = GoTestReader(config)
+    formatter = StreamingFormatter(config)
+    formatter.start()
+    for suite in reader.suites(lines):
+        formatter.add_suite(suite)
+    exit_code = 1 if reader.failed else 0
+    formatter.finish(exit_code)
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the go test command."""
+    parser = argparse.ArgumentParser(
+        description="Render an LLM report from the output of go test -json"
+    )
+    parser.add_argument("file", nargs="?", default="-",
+                        help="File with go test -json events (default: standard input)")
+    parser.add_argument("--mode", choices=["summary", "detailed"], help="Output mode")
+    parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--include-passed-suites", action="store_true",
+                        help="Include passed suites in summary mode")
+    args = parser.parse_args(argv)
+    
+    options = {}
+    if args.mode:
+        options["mode"] = args.mode
+    if args.output:
+        options["output_file"] = args.output
+    if args.include_passed_suites:
+        options["include_passed_suites"] = True
+    config = ReporterConfig.load(options)
+    if config.mode == "delta":
+        # Suites only keep failures, so fixed tests cannot be detected
+        config.mode = "summary"
+    
+    try:
+        if args.file == "-":
+            exit_code = render(sys.stdin, config)
+        else:
+            with open(args.file, "r", encoding="utf-8", errors="replace") as f:
+                exit_code = render(f, config)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Render LLM reports from JUnit XML written by any test runner.
+
+The XML is parsed incrementally with ``ElementTree.iterparse``: each
+``<testcase>`` is converted as soon as it is complete and then removed from
+the tree, and each ``<testsuite>`` is handed to :class:`StreamingFormatter`
+when it ends. Like :mod:`.merge`, suites keep only their failed tests plus
+per-status counts, so memory depends on the number of failures and not on
+the size of the XML.
+
+Usage:
+    python -m llm_reporter_shared.junit results.xml [more.xml ...]
+    go-junit-report < go-test.out | python -m llm_reporter_shared.junit -
+"""
+
+import sys
+import argparse
+from xml.etree.ElementTree import Element, iterparse, ParseError
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from .models import TestStatus, TestResult, ErrorInfo
+from .config import ReporterConfig
+from .formatters import StreamingFormatter
+from .error_classifier import ErrorClassifier
+from .capture import clip_text, tail_text, format_output_tail
+from .merge import MergedSuite
+
+# Elements whose children are dropped as soon as they are complete
+_CONTAINER_TAGS = ("testsuites", "testsuite")
+
+
+def _float(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class JUnitReader:
+    """Convert the testcases of a JUnit XML stream into suites of failures and counts."""
+    
+    def __init__(self, config: ReporterConfig):
+        self.config = config
+        self.classifier = ErrorClassifier()
+        self.duration = 0.0
+        self.failed = False
+    
+    def suites(self, source: BinaryIO) -> Iterator[MergedSuite]:
+        """Yield the suites of each ``<testsuite>`` once it has been read completely.
+
+        Testcases are grouped by their ``classname`` within a testsuite
+        (pytest writes a single testsuite for the whole run).
+        """
+        path: List[Element] = []
+        groups: Dict[str, MergedSuite] = {}
+        suite_names: List[str] = []
+        for event, element in iterparse(source, events=("start", "end")):
+            if event == "start":
+                path.append(element)
+                if element.tag == "testsuite":
+                    suite_names.append(element.get("name") or "testsuite")
+                continue
+            
+            path.pop()
+            if element.tag == "testcase":
+                self._add_testcase(groups, element, suite_names[-1] if suite_names else "testsuite")
+            elif element.tag == "testsuite":
+                suite_names.pop()
+                if not path or path[-1].tag != "testsuite":
+                    # Nested suites are reported with their outermost suite
+                    self.duration += _float(element.get("time"))
+                    yield from groups.values()
+                    groups = {}
+            if path and path[-1].tag in _CONTAINER_TAGS:
+                # Converted testcases and suite-level output are dropped so
+                # the tree never grows
+                element.clear()
+                path[-1].remove(element)
+        # Testcases outside any testsuite
+        yield from groups.values()
+    
+    def _add_testcase(self, groups: Dict[str, MergedSuite], element: Element, suite_name: str):
+        classname = element.get("classname") or suite_name
+        file_path = element.get("file")
+        suite = groups.get(classname)
+        if suite is None:
+            suite = groups[classname] = MergedSuite(name=classname, file_path=file_path or classname)
+        elif file_path and suite.file_path == classname:
+            # Not every runner writes the file on every testcase
+            suite.file_path = file_path
+        
+        status, error = self._outcome(element)
+        suite.counts[status] = suite.counts.get(status, 0) + 1
+        suite.duration += _float(element.get("time"))
+        if status == TestStatus.FAILED:
+            self.failed = True
+            name = element.get("name") or "?"
+            suite.tests.append(TestResult(
+                name=name,
+                full_name=f"{classname} > {name}",
+                status=status,
+                duration=_float(element.get("time")),
+                line_number=_int(element.get("line")),
+                error=error,
+            ))
+    
+    def _outcome(self, element: Element) -> Tuple[TestStatus, Optional[ErrorInfo]]:
+        """Status of a testcase and, for failures, its error information."""
+        status = TestStatus.PASSED
+        error = None
+        for child in element:
+            if child.tag in ("failure", "error"):
+                status = TestStatus.FAILED
+                if error is None:
+                    error = self._error(child)
+            elif child.tag == "skipped" and status == TestStatus.PASSED:
+                status = TestStatus.SKIPPED
+        if error is not None:
+            error.captured_output = self._output_tail(element)
+        return status, error
+    
+    def _error(self, child: Element) -> ErrorInfo:
+        """Build error information from a ``<failure>`` or ``<error>`` element."""
+        text = child.text or ""
+        message = child.get("message") or ""
+        if not message.strip():
+            message = next((line.strip() for line in text.splitlines() if line.strip()), "Test failed")
+        default_type = "AssertionError" if child.tag == "failure" else "Error"
+        error = ErrorInfo(
+            type=child.get("type") or default_type,
+            message=clip_text(message, self.config.max_message_length),
+        )
+        if text.strip() and self.config.stack_trace_lines > 0:
+            error.stack_trace = tail_text(text.strip(), self.config.stack_trace_lines,
+                                          self.config.max_message_length or len(text))
+        
+        expected, actual = self.classifier.extract_values(error.message)
+        if expected:
+            error.expected = expected
+        if actual:
+            error.actual = actual
+        error.fix_hint = self.classifier.generate_fix_hint(error)
+        return error
+    
+    def _output_tail(self, element: Element) -> Optional[str]:
+        """The bounded tail of a failing testcase's ``<system-out>`` and ``<system-err>``."""
+        lines = self.config.output_tail_lines
+        if lines <= 0:
+            return None
+        chars = self.config.output_tail_chars
+        streams = []
+        for tag, name in (("system-out", "stdout"), ("system-err", "stderr")):
+            child = element.find(tag)
+            if child is not None and child.text:
+                streams.append((name, tail_text(child.text, lines, chars)))
+        return format_output_tail(streams)
+
+
+def render(paths: List[str], config: ReporterConfig) -> int:
+    """Stream the JUnit XML files into one report and return its exit code."""
+    reader = JUnitReader(config)
+    formatter = StreamingFormatter(config)
+    formatter.start()
+    for path in paths:
+        if path == "-":
+            for suite in reader.suites(sys.stdin.buffer):
+                formatter.add_suite(suite)
+            continue
+        with open(path, "rb") as f:
+            for suite in reader.suites(f):
+                formatter.add_suite(suite)
+    exit_code = 1 if reader.failed else 0
+    formatter.finish(exit_code, reader.duration)
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the JUnit XML command."""
+    parser = argparse.ArgumentParser(
+        description="Render an LLM report from JUnit XML files"
+    )
+    parser.add_argument("files", nargs="+", help="JUnit XML files ('-' reads standard input)")
+    parser.add_argument("--mode", choices=["summary", "detailed"], help="Output mode")
+    parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--include-passed-suites", action="store_true",
+                        help="Include passed suites in summary mode")
+    args = parser.parse_args(argv)
+    
+    options = {}
+    if args.mode:
+        options["mode"] = args.mode
+    if args.output:
+        options["output_file"] = args.output
+    if args.include_passed_suites:
+        options["include_passed_suites"] = True
+    config = ReporterConfig.load(options)
+    if config.mode == "delta":
+        # Suites only keep failures, so fixed tests cannot be detected
+        config.mode = "summary"
+    
+    try:
+        exit_code = render(args.files, config)
+    except (OSError, ParseError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
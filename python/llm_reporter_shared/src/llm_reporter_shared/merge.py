@@ -0,0 +1,185 @@
+"""Merge the results of sharded test runs into one LLM report.
+
+Each shard writes its results with ``LLM_RESULTS_FILE=<path>`` (see
+:mod:`.serialization`). This module reads the shard files one at a time
+and keeps only failed tests plus per-status counts, so memory grows with
+the number of failures and suites, not with the number of tests. Suites
+with the same file path are combined across shards, and the merged report
+is rendered by :class:`StreamingFormatter`.
+
+Usage:
+    python -m llm_reporter_shared.merge shard-1.llmres shard-2.llmres ...
+"""
+
+import sys
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+from .models import TestSuite, TestStatus
+from .config import ReporterConfig
+from .formatters import StreamingFormatter
+from .serialization import ResultReader
+
+# pytest's exit code for shards that collected no tests; it only decides
+# the merged exit code when no shard ran any test
+NO_TESTS_COLLECTED = 5
+
+
+@dataclass
+class MergedSuite(TestSuite):
+    """A suite combined from several shards that keeps only its failed tests.
+
+    ``tests`` holds the failures; the counts of all tests are kept in
+    ``counts`` and reported by the count properties.
+    """
+    counts: Dict[TestStatus, int] = field(default_factory=dict)
+    
+    @property
+    def passed(self) -> bool:
+        """Check if all tests in suite passed."""
+        return not self.failed_count and not self.setup_error and not self.teardown_error
+    
+    @property
+    def total_count(self) -> int:
+        """Count of all tests."""
+        return sum(self.counts.values())
+    
+    @property
+    def failed_count(self) -> int:
+        """Count of failed tests."""
+        return self.counts.get(TestStatus.FAILED, 0)
+    
+    @property
+    def passed_count(self) -> int:
+        """Count of passed tests."""
+        return self.counts.get(TestStatus.PASSED, 0)
+    
+    @property
+    def skipped_count(self) -> int:
+        """Count of skipped tests."""
+        return self.counts.get(TestStatus.SKIPPED, 0)
+
+
+@dataclass
+class MergeResult:
+    """Merged suites in order of first appearance, with the overall outcome."""
+    suites: List[MergedSuite]
+    exit_code: int
+    duration: float
+    incomplete_shards: List[str]
+
+
+def merge_shards(paths: Iterable[str]) -> MergeResult:
+    """Stream the shard result files and merge their suites by file path."""
+    suites: Dict[str, MergedSuite] = {}
+    exit_codes: List[int] = []
+    duration = 0.0
+    incomplete: List[str] = []
+    
+    for path in paths:
+        with open(path, "rb") as f:
+            reader = ResultReader(f)
+            merged = None
+            try:
+                for kind, value in reader.records():
+                    if kind == "suite_start":
+                        merged = suites.get(value.file_path)
+                        if merged is None:
+                            merged = suites[value.file_path] = MergedSuite(
+                                name=value.name, file_path=value.file_path
+                            )
+                    elif kind == "tests":
+                        counts = merged.counts
+                        for test in value:
+                            counts[test.status] = counts.get(test.status, 0) + 1
+                            if test.status == TestStatus.FAILED:
+                                merged.tests.append(test)
+                    elif kind == "suite_end":
+                        merged.duration += value.duration
+                        merged.setup_error = merged.setup_error or value.setup_error
+                        merged.teardown_error = merged.teardown_error or value.teardown_error
+                        merged.metadata.update(value.metadata)
+            except ValueError:
+                # A truncated shard still contributes what it wrote before it stopped
+                pass
+        
+        summary = reader.run_summary
+        if summary is None:
+            incomplete.append(path)
+        else:
+            exit_codes.append(summary.exit_code)
+            duration += summary.duration
+    
+    merged_suites = list(suites.values())
+    return MergeResult(
+        suites=merged_suites,
+        exit_code=_merge_exit_codes(exit_codes, merged_suites, incomplete),
+        duration=duration,
+        incomplete_shards=incomplete,
+    )
+
+
+def _merge_exit_codes(exit_codes: List[int], suites: List[MergedSuite], incomplete: List[str]) -> int:
+    """Combine shard exit codes: any failing shard fails the merged run."""
+    if incomplete:
+        return 1
+    
+    codes = [code for code in exit_codes if code != NO_TESTS_COLLECTED]
+    if not codes:
+        return NO_TESTS_COLLECTED if exit_codes else 0
+    
+    exit_code = next((code for code in codes if code != 0), 0)
+    if exit_code == 0 and any(s.failed_count for s in suites):
+        exit_code = 1
+    return exit_code
+
+
+def render(result: MergeResult, config: ReporterConfig):
+    """Write the merged report."""
+    formatter = StreamingFormatter(config)
+    formatter.start()
+    for suite in result.suites:
+        formatter.add_suite(suite)
+    for path in result.incomplete_shards:
+        formatter.write(f"INCOMPLETE SHARD: {path} (no run summary, counted as failed)\n\n")
+    formatter.finish(result.exit_code, result.duration)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the merge command."""
+    parser = argparse.ArgumentParser(
+        description="Merge result files of sharded test runs into one LLM report"
+    )
+    parser.add_argument("shards", nargs="+", help="Result files written with LLM_RESULTS_FILE")
+    parser.add_argument("--mode", choices=["summary", "detailed"], help="Output mode")
+    parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--include-passed-suites", action="store_true",
+                        help="Include passed suites in summary mode")
+    args = parser.parse_args(argv)
+    
+    options = {}
+    if args.mode:
+        options["mode"] = args.mode
+    if args.output:
+        options["output_file"] = args.output
+    if args.include_passed_suites:
+        options["include_passed_suites"] = True
+    config = ReporterConfig.load(options)
+    if config.mode == "delta":
+        # Merged suites only keep failures, so fixed tests cannot be detected
+        config.mode = "summary"
+    # The merged report is not a shard: never overwrite a shard's results
+    config.results_file = None
+    
+    try:
+        result = merge_shards(args.shards)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    render(result, config)
+    sys.exit(result.exit_code)
+
+
+if __name__ == "__main__":
+    main()
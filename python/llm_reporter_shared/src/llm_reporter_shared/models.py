@@ -23,6 +23,9 @@ class ErrorInfo:
     stack_trace: Optional[str] = None
     code_context: Optional[str] = None
     fix_hint: Optional[str] = None
+    captured_output: Optional[str] = None
+    local_variables: Optional[str] = None
+    diff: Optional[str] = None
 
 
 @dataclass
@@ -53,6 +56,11 @@ class TestSuite:
         """Check if all tests in suite passed."""
         return all(t.status == TestStatus.PASSED for t in self.tests) and not self.setup_error and not self.teardown_error
     
+    @property
+    def total_count(self) -> int:
+        """Count of all tests."""
+        return len(self.tests)
+    
     @property
     def failed_count(self) -> int:
         """Count of failed tests."""
@@ -0,0 +1,91 @@
+"""Prioritization of failures for size-constrained reports."""
+
+import re
+import heapq
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .models import TestSuite, TestResult, ErrorInfo
+
+# A failure to render: suite, test and an optional note line
+Failure = Tuple[TestSuite, TestResult, Optional[str]]
+
+# Test phases whose failures cascade into other tests
+SETUP_PHASES = ("setup", "collect")
+
+# Only the start of a message takes part in clustering
+CLUSTER_MESSAGE_LENGTH = 200
+
+_VARIABLE_PARTS = re.compile(r"0x[0-9a-fA-F]+|\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+
+def cluster_key(error: Optional[ErrorInfo], cache: Optional[Dict[str, str]] = None) -> Tuple[str, str]:
+    """Key shared by failures with the same error up to numbers, addresses and quoted values.
+
+    ``cache`` maps message prefixes to their normalized form; cascading
+    failures often repeat the same message, so it saves most regex work.
+    """
+    if error is None:
+        return ("", "")
+    message = error.message[:CLUSTER_MESSAGE_LENGTH].split("\n", 1)[0]
+    if cache is None:
+        return (error.type, _VARIABLE_PARTS.sub("_", message))
+    normalized = cache.get(message)
+    if normalized is None:
+        normalized = cache[message] = _VARIABLE_PARTS.sub("_", message)
+    return (error.type, normalized)
+
+
+def _traceback_size(test: TestResult) -> int:
+    """Length of the failure's traceback (or code context), the cost of reading it."""
+    error = test.error
+    if error is None:
+        return 0
+    return len(error.stack_trace or error.code_context or "")
+
+
+class FailureRanking:
+    """Failures in priority order, selected lazily from a heap.
+
+    Ranking, most important first:
+
+    1. the first failure of each error cluster (distinct problems before
+       repeats of one)
+    2. failures in setup or collection, which cascade into other tests
+    3. failures that are new since the previous run (when ``is_new`` is given)
+    4. shorter tracebacks, which are cheaper to show and to read
+    5. collection order
+
+    Building the heap is O(n); iteration pops one failure at a time, so
+    rendering the top K of n failures costs O(n + K log n) instead of a
+    full sort.
+    """
+    
+    def __init__(self, failures: Iterable[Failure],
+                 is_new: Optional[Callable[[TestSuite, TestResult], bool]] = None):
+        seen: Set[Tuple[str, str]] = set()
+        normalized: Dict[str, str] = {}
+        heap: List[tuple] = []
+        for order, failure in enumerate(failures):
+            suite, test, _ = failure
+            key = cluster_key(test.error, normalized)
+            representative = key not in seen
+            if representative:
+                seen.add(key)
+            heap.append((
+                0 if representative else 1,
+                0 if test.metadata.get("phase") in SETUP_PHASES else 1,
+                0 if is_new is None or is_new(suite, test) else 1,
+                _traceback_size(test),
+                order,
+                failure,
+            ))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._total = len(heap)
+    
+    def __len__(self) -> int:
+        return self._total
+    
+    def __iter__(self) -> Iterator[Failure]:
+        heap = self._heap
+        while heap:
+            yield heapq.heappop(heap)[-1]
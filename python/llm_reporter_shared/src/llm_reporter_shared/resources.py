@@ -0,0 +1,150 @@
+"""Optional per-test resource measurements: CPU time, RSS growth and allocations.
+
+Measuring is off by default and costs nothing then: reporters only create a
+:class:`ResourceMeter` when ``measure_resources`` (or ``measure_allocations``)
+is set. With a sample rate below 1, only a stable subset of tests is
+measured (chosen by a hash of the test id, so the same tests are measured in
+every run and can be compared), which keeps the overhead of ``tracemalloc``
+off the remaining tests.
+"""
+
+import os
+import sys
+import time
+import zlib
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .models import TestSuite, TestResult
+from .config import ReporterConfig
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Keys of the measurements in TestResult.metadata
+CPU_TIME_KEY = "cpu_time"
+RSS_DELTA_KEY = "rss_delta"
+ALLOC_PEAK_KEY = "alloc_peak"
+
+# Number of tests listed in each resource ranking
+TOP_RESOURCE_TESTS = 5
+
+_SAMPLE_BUCKETS = 10000
+_STATM_PATH = "/proc/self/statm"
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or the peak where the current one is unavailable."""
+    try:
+        with open(_STATM_PATH, "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for reports (e.g. ``12.5 MB``)."""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class ResourceMeter:
+    """Measures CPU time, RSS growth and optionally the allocation peak of a test.
+
+    Call :meth:`start` before a test and :meth:`stop` with its result after
+    it; :meth:`sampled` decides which tests are measured at all.
+    """
+    
+    def __init__(self, sample_rate: float = 1.0, allocations: bool = False):
+        self.sample_rate = sample_rate
+        self.allocations = allocations
+        self._threshold = int(sample_rate * _SAMPLE_BUCKETS)
+        self._tracemalloc = None
+        if allocations:
+            # Imported only when needed: tracemalloc pulls in pickle and linecache
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+    
+    @classmethod
+    def from_config(cls, config: ReporterConfig) -> Optional["ResourceMeter"]:
+        """Create the meter for a configuration, or None if measuring is off."""
+        if not (config.measure_resources or config.measure_allocations):
+            return None
+        return cls(config.resource_sample_rate, config.measure_allocations)
+    
+    def sampled(self, test_id: str) -> bool:
+        """Whether a test is measured; stable across runs for the same test id."""
+        if self._threshold >= _SAMPLE_BUCKETS:
+            return True
+        return zlib.crc32(test_id.encode("utf-8")) % _SAMPLE_BUCKETS < self._threshold
+    
+    def start(self) -> Tuple[float, Optional[int], bool, int]:
+        """Take the readings a measurement is relative to."""
+        started_tracing = False
+        traced = 0
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None:
+            if tracemalloc.is_tracing():
+                # Tracing was started by someone else: measure above what is
+                # already traced
+                getattr(tracemalloc, "reset_peak", tracemalloc.clear_traces)()
+                traced = tracemalloc.get_traced_memory()[0]
+            else:
+                tracemalloc.start()
+                started_tracing = True
+        return (time.process_time(), _current_rss(), started_tracing, traced)
+    
+    def stop(self, token: Tuple[float, Optional[int], bool, int]) -> Dict[str, Any]:
+        """Return the measurements since :meth:`start` as TestResult metadata."""
+        cpu_start, rss_start, started_tracing, traced = token
+        metrics: Dict[str, Any] = {CPU_TIME_KEY: round(time.process_time() - cpu_start, 6)}
+        if rss_start is not None:
+            rss = _current_rss()
+            if rss is not None:
+                metrics[RSS_DELTA_KEY] = rss - rss_start
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            metrics[ALLOC_PEAK_KEY] = max(0, tracemalloc.get_traced_memory()[1] - traced)
+            if started_tracing:
+                tracemalloc.stop()
+        return metrics
+
+
+def _memory_used(test: TestResult) -> Optional[int]:
+    """Memory attributed to a test: its allocation peak, else its RSS growth."""
+    metadata = test.metadata
+    value = metadata.get(ALLOC_PEAK_KEY)
+    if value is None:
+        value = metadata.get(RSS_DELTA_KEY)
+    return value
+
+
+def top_resource_tests(suites: Iterable[TestSuite], count: int = TOP_RESOURCE_TESTS
+                       ) -> Tuple[List[TestResult], List[TestResult]]:
+    """Select the slowest and the most memory-hungry measured tests.
+
+    Only tests with measurements take part, so both rankings are over the
+    same (sampled) tests. Selection is a bounded heap, O(n log count).
+    """
+    measured = [
+        test for suite in suites for test in suite.tests
+        if CPU_TIME_KEY in test.metadata
+    ]
+    slowest = heapq.nlargest(count, measured, key=lambda test: test.duration)
+    with_memory = [test for test in measured if _memory_used(test)]
+    hungriest = heapq.nlargest(count, with_memory, key=_memory_used)
+    return slowest, hungriest
@@ -0,0 +1,125 @@
+"""Bounded capture of the local variables of a failing frame.
+
+Only the innermost user frame is inspected, and only values of builtin
+types with cheap, side-effect free reprs are rendered (with ``reprlib``
+limits on depth, items and string length); any other object is shown by
+its type name without calling its ``__repr__``. Rendering stops at a byte
+budget and a time budget per failure, so a failure with huge or exotic
+locals costs about as much as one without.
+"""
+
+import time
+import types
+import reprlib
+from itertools import islice
+from typing import List, Optional
+
+# Wall-clock budget for rendering the locals of one failure
+LOCALS_TIME_BUDGET = 0.05
+
+# Integers longer than this are summarized (int repr is quadratic in length)
+_MAX_INT_BITS = 256
+
+# Values that are not shown at all: they say nothing about the failure
+_SKIPPED_TYPES = (
+    types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+)
+
+
+class _BoundedRepr(reprlib.Repr):
+    """``reprlib.Repr`` that never calls the repr of an object it does not know.
+
+    Dicts and sets are shown in iteration order instead of being sorted
+    in full first, so large ones cost no more than small ones.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxtuple = self.maxlist = self.maxarray = 8
+        self.maxdict = self.maxset = self.maxfrozenset = self.maxdeque = 8
+        self.maxstring = 120
+        self.maxlong = 40
+        self.maxother = 60
+    
+    def repr_instance(self, x, level):
+        if isinstance(x, (float, complex, bool, type(None), range)):
+            return repr(x)
+        return f"<{type(x).__name__}>"
+    
+    def repr_int(self, x, level):
+        if x.bit_length() > _MAX_INT_BITS:
+            return f"<int with {x.bit_length()} bits>"
+        return super().repr_int(x, level)
+    
+    def repr_bytes(self, x, level):
+        text = repr(x[:self.maxstring])
+        return text if len(x) <= self.maxstring else text + "..."
+    
+    def repr_dict(self, x, level):
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+        items = [
+            f"{self.repr1(key, level - 1)}: {self.repr1(value, level - 1)}"
+            for key, value in islice(x.items(), self.maxdict)
+        ]
+        if len(x) > self.maxdict:
+            items.append(f"... ({len(x)} items)")
+        return "{" + ", ".join(items) + "}"
+    
+    def repr_set(self, x, level):
+        if not x:
+            return f"{type(x).__name__}()"
+        if level <= 0:
+            return "{...}"
+        items = [self.repr1(item, level - 1) for item in islice(x, self.maxset)]
+        if len(x) > self.maxset:
+            items.append(f"... ({len(x)} items)")
+        return "{" + ", ".join(items) + "}"
+    
+    repr_frozenset = repr_set
+
+
+_repr = _BoundedRepr()
+
+
+def format_value(value) -> str:
+    """Render a value within the reprlib limits, never running foreign ``__repr__``s."""
+    try:
+        return _repr.repr(value)
+    except Exception:
+        return f"<{type(value).__name__}>"
+
+
+def format_locals(frame, max_bytes: int, time_budget: float = LOCALS_TIME_BUDGET) -> Optional[str]:
+    """Format the locals of the failing frame as ``name = value`` lines.
+
+    The frame is the one of :func:`frames.deepest_user_frame`, looked up
+    with :func:`frames.find_frame`. Lines are added until ``max_bytes``
+    characters or ``time_budget`` seconds are used up; the rest are counted
+    in a final note.
+    """
+    if frame is None:
+        return None
+    
+    deadline = time.perf_counter() + time_budget
+    # Skips dunder names and pytest's assertion rewriting temporaries (@py_*)
+    variables = [
+        (name, value) for name, value in frame.f_locals.items()
+        if name.isidentifier() and not name.startswith("__")
+        and not isinstance(value, _SKIPPED_TYPES)
+    ]
+    lines: List[str] = []
+    used = 0
+    for name, value in variables:
+        line = f"{name} = {format_value(value)}"
+        if used + len(line) > max_bytes or time.perf_counter() > deadline:
+            break
+        lines.append(line)
+        used += len(line) + 1
+    omitted = len(variables) - len(lines)
+    if omitted:
+        lines.append(f"[{omitted} more locals omitted]")
+    return "\n".join(lines) if lines else None
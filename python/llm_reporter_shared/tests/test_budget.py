@@ -0,0 +1,128 @@
+"""Tests for the output budget and the reports rendered under it."""
+
+import io
+
+import pytest
+
+from llm_reporter_shared import budget
+from llm_reporter_shared import delta
+from llm_reporter_shared import models
+from llm_reporter_shared.budget import OutputBudget
+from llm_reporter_shared.config import ReporterConfig
+from llm_reporter_shared.formatters import BaseFormatter, StreamingFormatter
+from llm_reporter_shared.models import ErrorInfo
+
+# Aliased: pytest would try to collect module-level Test* classes
+Suite, Result, Status = models.TestSuite, models.TestResult, models.TestStatus
+
+
+def make_suites(count=3, tests=20):
+    """Suites where every other test fails."""
+    suites = []
+    for index in range(count):
+        suite = Suite(name=f"test_{index}", file_path=f"tests/test_{index}.py")
+        for number in range(tests):
+            test = Result(name=f"test_{number}", full_name=f"tests/test_{index}.py > test_{number}",
+                          status=Status.PASSED)
+            if number % 2:
+                test.status = Status.FAILED
+                test.error = ErrorInfo(type="AssertionError", message=f"assert {number} == {number + 1}",
+                                       stack_trace="  File \"test.py\", line 3\n" * 20)
+            suite.tests.append(test)
+        suites.append(suite)
+    return suites
+
+
+def render(tmp_path, mode, max_output_bytes, suites=None):
+    output = io.StringIO()
+    config = ReporterConfig(mode=mode, max_output_bytes=max_output_bytes,
+                            delta_state_file=str(tmp_path / "state.json"))
+    formatter = StreamingFormatter(config, output=output)
+    formatter.start()
+    for suite in suites or make_suites():
+        formatter.add_suite(suite)
+    formatter.finish(1, 1.0)
+    return output.getvalue()
+
+
+def test_levels_degrade_one_way():
+    limit = OutputBudget(2000)
+    assert limit.max_bytes == 2000
+    assert limit.fits_detail(1000)
+    limit.charge("x" * 1000)
+    assert not limit.fits_detail(200)
+    assert limit.level == budget.LEVEL_LINES
+    # A smaller block after a larger one still gets only a line
+    assert not limit.fits_detail(10)
+    assert limit.fits_line(400)
+    assert not limit.fits_line(100, pending=400)
+    assert limit.level == budget.LEVEL_COUNTS
+    assert not limit.fits_line(1)
+    # Notes fit what is left without changing the level
+    assert limit.fits_note(400)
+    assert limit.level == budget.LEVEL_COUNTS
+
+
+def test_token_limit_and_smaller_limit_wins():
+    assert OutputBudget.from_config(ReporterConfig()) is None
+    assert OutputBudget.from_config(ReporterConfig(max_output_tokens=100)).max_bytes == 400
+    config = ReporterConfig(max_output_bytes=300, max_output_tokens=100)
+    assert OutputBudget.from_config(config).max_bytes == 300
+
+
+def test_clip_keeps_whole_lines():
+    limit = OutputBudget(20)
+    limit.charge("x" * 5)
+    assert limit.clip("short\n") == "short\n"
+    assert limit.clip("line one\nline two\n") == "line one\n"
+
+
+@pytest.mark.parametrize("mode", ["summary", "detailed", "delta"])
+@pytest.mark.parametrize("max_output_bytes", [100, 300, 600, 1100, 3000])
+def test_report_stays_within_budget(tmp_path, mode, max_output_bytes):
+    report = render(tmp_path, mode, max_output_bytes)
+    assert len(report.encode("utf-8")) <= max_output_bytes
+    if max_output_bytes > budget.SUMMARY_RESERVE:
+        assert report.startswith("# LLM TEST REPORTER")
+
+
+def test_small_budget_renders_only_the_summary(tmp_path):
+    report = render(tmp_path, "summary", 300)
+    assert report.startswith("---\n## SUMMARY\n")
+    assert "- TOTAL TESTS: 60 (30 passed, 30 failed)\n" in report
+    assert "- EXIT CODE: 1\n" in report
+
+
+def test_budgeted_detailed_mode_ranks_against_its_own_last_run(tmp_path):
+    render(tmp_path, "detailed", 3000)
+    previous = delta.load_run(str(tmp_path / "state.json"))
+    assert sum(len(suite.tests) for suite in previous) == 30
+    
+    suites = make_suites()
+    newly_failing = suites[2].tests[0]
+    newly_failing.status = Status.FAILED
+    newly_failing.error = ErrorInfo(type="AssertionError", message="assert 0 == 1")
+    report = render(tmp_path, "detailed", 3000, suites)
+    # Ranked right after the first failure of its cluster
+    assert "## TEST FAILURE #2\nSUITE: test_2\nTEST: tests/test_2.py > test_0\n" in report
+
+
+def test_values_are_summarized_only_for_blocks_shown_in_full():
+    expected = "x" * 5000
+    test = Result(name="test_long", full_name="tests/test_values.py > test_long", status=Status.FAILED,
+                  error=ErrorInfo(type="AssertionError", message="values differ",
+                                  expected=expected, actual=expected[:4000] + "Y" + expected[4001:]))
+    suite = Suite(name="test_values", file_path="tests/test_values.py", tests=[test])
+    
+    def detailed(**options):
+        return BaseFormatter(ReporterConfig(mode="detailed", **options))._format_suite_detailed(suite)
+    
+    assert "first difference at index 4000" in detailed(max_output_bytes=10000)
+    # Without a budget, and when only the rest of the block fits, there is no summary
+    assert "DIFFERENCE:" not in detailed()
+    block = detailed(max_output_bytes=1100)
+    assert "TEST: tests/test_values.py > test_long" in block
+    assert "DIFFERENCE:" not in block
+    
+    test.error.diff = "$[4000]: 'x' != 'Y'"
+    assert "DIFFERENCE:\n$[4000]: 'x' != 'Y'\n" in detailed()
@@ -0,0 +1,106 @@
+"""Tests for the delta between two runs and its stored state."""
+
+from llm_reporter_shared import delta
+from llm_reporter_shared import models
+from llm_reporter_shared.models import ErrorInfo
+
+# Aliased: pytest would try to collect module-level Test* classes
+Suite, Result, Status = models.TestSuite, models.TestResult, models.TestStatus
+
+
+def make_suite(file_path, **tests):
+    """A suite with one test per keyword: None passes, an ErrorInfo fails."""
+    suite = Suite(name=file_path, file_path=file_path)
+    for name, error in tests.items():
+        status = Status.PASSED if error is None else Status.FAILED
+        suite.tests.append(Result(name=name, full_name=f"{file_path} > {name}",
+                                  status=status, error=error))
+    return suite
+
+
+def assertion(message, expected=None, actual=None):
+    return ErrorInfo(type="AssertionError", message=message, expected=expected, actual=actual)
+
+
+def names(changes):
+    return sorted(change.test.name for change in changes)
+
+
+def test_new_fixed_and_unchanged_failures():
+    previous = [make_suite("a.py", test_fixed=assertion("assert 1 == 2"),
+                           test_same=assertion("assert 1 == 2"))]
+    current = [make_suite("a.py", test_fixed=None, test_same=assertion("assert 1 == 2"),
+                          test_new=assertion("assert 3 == 4"))]
+    result = delta.compute_delta(previous, current)
+    assert names(result.new_failures) == ["test_new"]
+    assert names(result.fixed_tests) == ["test_fixed"]
+    assert result.fixed_tests[0].previous is previous[0].tests[0]
+    assert result.changed_failures == []
+    assert result.unchanged_failures == 1
+
+
+def test_changed_values_are_changed_failures():
+    previous = [make_suite("a.py",
+                           test_number=assertion("assert 1 == 2"),
+                           test_quoted=assertion("assert 'foo' == x"),
+                           test_expected=assertion("assert x == y", expected="1", actual="2"),
+                           test_type=assertion("failed"))]
+    current = [make_suite("a.py",
+                          test_number=assertion("assert 1 == 3"),
+                          test_quoted=assertion("assert 'bar' == x"),
+                          test_expected=assertion("assert x == y", expected="1", actual="3"),
+                          test_type=ErrorInfo(type="ValueError", message="failed"))]
+    result = delta.compute_delta(previous, current)
+    assert names(result.changed_failures) == ["test_expected", "test_number", "test_quoted", "test_type"]
+    assert result.unchanged_failures == 0
+
+
+def test_addresses_ids_and_timings_are_ignored():
+    previous = [make_suite("a.py",
+                           test_address=assertion("<Node object at 0x7f3a2c1b0d90> != None"),
+                           test_id=assertion("stale handle id=4021"),
+                           test_timing=assertion("timed out after 1.52s", actual="took 1520 ms"))]
+    current = [make_suite("a.py",
+                          test_address=assertion("<Node object at 0x7f3a2c1b3e10> != None"),
+                          test_id=assertion("stale handle id=4388"),
+                          test_timing=assertion("timed out after 1.61s", actual="took 1610 ms"))]
+    result = delta.compute_delta(previous, current)
+    assert result.changed_failures == []
+    assert result.unchanged_failures == 3
+
+
+def test_save_run_round_trip(tmp_path):
+    state = str(tmp_path / "state" / "run.json")
+    failure = assertion("assert x == y", expected="1", actual="2")
+    delta.save_run(state, [make_suite("a.py", test_pass=None, test_fail=failure)])
+    
+    loaded = delta.load_run(state)
+    assert [suite.file_path for suite in loaded] == ["a.py"]
+    assert [test.name for test in loaded[0].tests] == ["test_fail"]
+    assert loaded[0].tests[0].error == failure
+    
+    current = [make_suite("a.py", test_fail=assertion("assert x == y", expected="1", actual="3"))]
+    assert names(delta.compute_delta(loaded, current).changed_failures) == ["test_fail"]
+
+
+def test_save_run_replaces_only_files_that_ran(tmp_path):
+    state = str(tmp_path / "run.json")
+    delta.save_run(state, [make_suite("a.py", test_one=assertion("a")),
+                           make_suite("b.py", test_two=assertion("b"))])
+    # Re-running only a.py: its failure is fixed, b.py's failure is kept
+    delta.save_run(state, [make_suite("a.py", test_one=None)])
+    
+    loaded = delta.load_run(state)
+    assert [suite.file_path for suite in loaded] == ["b.py"]
+    assert loaded[0].tests[0].error.message == "b"
+
+
+def test_load_run_ignores_missing_and_malformed_state(tmp_path):
+    state = tmp_path / "run.json"
+    assert delta.load_run(str(state)) is None
+    state.write_text("{not json")
+    assert delta.load_run(str(state)) is None
+    state.write_text('{"version": 1, "suites": []}')
+    assert delta.load_run(str(state)) is None
+    state.write_text(f'{{"version": {delta.STATE_VERSION}, "suites": [{{"name": "a"}}]}}')
+    assert delta.load_run(str(state)) is None
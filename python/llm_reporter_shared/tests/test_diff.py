@@ -0,0 +1,36 @@
+"""Tests for the prefix and suffix scans of the diff module."""
+
+from llm_reporter_shared import diff
+
+
+class Ambiguous:
+    """Comparison result without a truth value, like a numpy array's."""
+    
+    def __bool__(self):
+        raise ValueError("The truth value of an array is ambiguous")
+
+
+class Array:
+    def __init__(self, value):
+        self.value = value
+    
+    def __eq__(self, other):
+        return Ambiguous()
+
+
+def test_common_prefix_and_suffix_of_long_strings():
+    expected = "x" * 100_000
+    actual = expected[:40_000] + "Y" + expected[40_001:]
+    assert diff.common_prefix(expected, actual) == 40_000
+    assert diff.common_suffix(expected, actual, 100_000 - 40_000) == 100_000 - 40_001
+    assert diff.common_prefix(expected, expected + "z") == 100_000
+
+
+def test_items_without_truth_value_count_as_different():
+    shared = Array(0)
+    left = [shared, 1, 2, Array(3), 4]
+    right = [shared, 1, 5, Array(3), 4]
+    assert diff.common_prefix(left, right) == 2
+    assert diff.common_prefix(left, right, 3) == 3
+    assert diff.common_suffix(left, right, 2) == 1
+    assert diff.structural_diff(left, right) == ["$[2]: 2 != 5", "$[3]: <Array> != <Array>"]
@@ -0,0 +1,131 @@
+"""Tests for reading ``go test -json`` event streams."""
+
+import json
+
+from llm_reporter_shared import gotest
+from llm_reporter_shared import models
+from llm_reporter_shared.config import ReporterConfig
+
+# Aliased: pytest would try to collect module-level Test* classes
+Status = models.TestStatus
+
+
+def event(action, package="example.com/calc", test=None, output=None, **fields):
+    data = {"Action": action, "Package": package}
+    if test:
+        data["Test"] = test
+    if output is not None:
+        data["Output"] = output
+    data.update(fields)
+    return json.dumps(data) + "\n"
+
+
+def read(lines):
+    reader = gotest.GoTestReader(ReporterConfig())
+    return reader, list(reader.suites(lines))
+
+
+def render(tmp_path, lines):
+    report = tmp_path / "report.txt"
+    exit_code = gotest.render(lines, ReporterConfig(mode="summary", output_file=str(report)))
+    return exit_code, report.read_text()
+
+
+NORMAL = [
+    event("run", test="TestAdd"),
+    event("output", test="TestAdd", output="=== RUN   TestAdd\n"),
+    event("pass", test="TestAdd", Elapsed=0.01),
+    event("run", test="TestSub"),
+    event("output", test="TestSub", output="    calc_test.go:12: expected 3, got 4\n"),
+    event("fail", test="TestSub", Elapsed=0.02),
+    event("output", output="FAIL\n"),
+    event("fail", Elapsed=0.5),
+]
+
+
+def test_normal_stream():
+    reader, suites = read(NORMAL)
+    assert [suite.name for suite in suites] == ["example.com/calc"]
+    suite = suites[0]
+    assert (suite.total_count, suite.passed_count, suite.failed_count) == (2, 1, 1)
+    assert suite.duration == 0.5
+    failure = suite.tests[0]
+    assert failure.full_name == "example.com/calc > TestSub"
+    assert failure.line_number == 12
+    assert failure.error.message == "calc_test.go:12: expected 3, got 4"
+    assert reader.failed
+    assert not reader._running and not reader._package_output and not reader._suites
+
+
+def test_failed_build():
+    build = "example.com/calc [example.com/calc.test]"
+    lines = [
+        json.dumps({"ImportPath": build, "Action": "build-output", "Output": f"# {build}\n"}) + "\n",
+        json.dumps({"ImportPath": build, "Action": "build-output",
+                    "Output": "calc/x_test.go:7:2: undefined: helper\n"}) + "\n",
+        json.dumps({"ImportPath": build, "Action": "build-fail"}) + "\n",
+        event("output", output="FAIL\texample.com/calc [build failed]\n"),
+        event("fail", Elapsed=0, FailedBuild=build),
+        # Plain compiler output of Go versions before 1.24
+        "# example.com/old [example.com/old.test]\n",
+        "old/y_test.go:9:5: declared and not used: v\n",
+        event("output", package="example.com/old", output="FAIL\texample.com/old [build failed]\n"),
+        event("fail", package="example.com/old", Elapsed=0),
+    ]
+    reader, suites = read(lines)
+    assert [suite.setup_error.message for suite in suites] == [
+        "calc/x_test.go:7:2: undefined: helper",
+        "old/y_test.go:9:5: declared and not used: v",
+    ]
+    assert all(suite.total_count == 0 for suite in suites)
+    # Compiler output is dropped once its package has finished
+    assert reader._build_output == {}
+
+
+def test_failed_subtests_are_counted_per_parent():
+    lines = [event("run", test=name) for name in ["TestA", "TestA/b", "TestA/b/c", "TestA/d"]] + [
+        event("output", test="TestA/b/c", output="    n_test.go:5: bad\n"),
+        event("fail", test="TestA/b/c"),
+        event("fail", test="TestA/b"),
+        event("pass", test="TestA/d"),
+        event("fail", test="TestA"),
+        event("fail"),
+    ]
+    _, suites = read(lines)
+    messages = {test.name: test.error.message for test in suites[0].tests}
+    assert messages == {
+        "TestA/b/c": "n_test.go:5: bad",
+        "TestA/b": "1 subtests failed",
+        "TestA": "2 subtests failed",
+    }
+    assert suites[0].counts == {Status.FAILED: 3, Status.PASSED: 1}
+
+
+def test_truncated_stream(tmp_path):
+    lines = [
+        event("run", test="TestAdd"),
+        event("pass", test="TestAdd"),
+        # Cut off while tests were running and before packages finished
+        event("run", package="example.com/slow", test="TestWait"),
+        event("output", package="example.com/slow", test="TestWait", output="    waiting\n"),
+        event("output", package="example.com/main", output="panic: init failed\n"),
+    ]
+    reader, suites = read(lines)
+    by_name = {suite.name: suite for suite in suites}
+    assert set(by_name) == {"example.com/calc", "example.com/slow", "example.com/main"}
+    assert by_name["example.com/calc"].setup_error.message.startswith("Incomplete:")
+    assert [test.name for test in by_name["example.com/slow"].tests] == ["TestWait"]
+    assert by_name["example.com/main"].setup_error.type == "panic"
+    assert reader.failed
+    
+    exit_code, report = render(tmp_path, lines)
+    assert exit_code == 1
+    assert "TOTAL TESTS: 2" in report
+
+
+def test_passing_stream_exit_code(tmp_path):
+    lines = [event("run", test="TestAdd"), event("pass", test="TestAdd"),
+             event("output", output="ok\n"), event("pass", Elapsed=0.1)]
+    exit_code, report = render(tmp_path, lines)
+    assert exit_code == 0
+    assert "TOTAL TESTS: 1" in report
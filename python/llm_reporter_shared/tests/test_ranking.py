@@ -0,0 +1,61 @@
+"""Tests for the prioritization of failures."""
+
+from llm_reporter_shared import models
+from llm_reporter_shared.models import ErrorInfo
+from llm_reporter_shared.ranking import FailureRanking, cluster_key
+
+# Aliased: pytest would try to collect module-level Test* classes
+Suite, Result, Status = models.TestSuite, models.TestResult, models.TestStatus
+
+SUITE = Suite(name="test_app", file_path="tests/test_app.py")
+
+
+def failure(name, message, error_type="AssertionError", traceback="", phase=None):
+    test = Result(name=name, full_name=f"tests/test_app.py > {name}", status=Status.FAILED,
+                  error=ErrorInfo(type=error_type, message=message, stack_trace=traceback))
+    if phase:
+        test.metadata["phase"] = phase
+    return (SUITE, test, None)
+
+
+def names(ranking):
+    return [test.name for _, test, _ in ranking]
+
+
+def test_cluster_key_masks_numbers_addresses_and_quoted_values():
+    first = ErrorInfo(type="AssertionError", message="assert 1 == 2 for 'a' at 0x7f00aa")
+    second = ErrorInfo(type="AssertionError", message="assert 10 == 3.5 for \"b\" at 0x1234")
+    assert cluster_key(first) == cluster_key(second)
+    assert cluster_key(first) != cluster_key(ErrorInfo(type="ValueError", message=first.message))
+    assert cluster_key(None) == ("", "")
+    # Only the first line takes part
+    assert cluster_key(ErrorInfo(type="E", message="boom\ndetails")) == ("E", "boom")
+    
+    cache = {}
+    assert cluster_key(first, cache) == cluster_key(first)
+    assert list(cache) == [first.message]
+
+
+def test_representatives_of_clusters_come_first():
+    ranking = FailureRanking([
+        failure("test_a1", "assert 1 == 2"),
+        failure("test_a2", "assert 3 == 4"),
+        failure("test_b", "connection refused", error_type="OSError"),
+    ])
+    assert len(ranking) == 3
+    assert names(ranking) == ["test_a1", "test_b", "test_a2"]
+
+
+def test_setup_new_and_short_failures_rank_higher():
+    failures = [
+        failure("test_old_long", "long", traceback="x" * 500),
+        failure("test_old_short", "short", traceback="x" * 10),
+        failure("test_new", "new", traceback="x" * 900),
+        failure("test_setup", "setup", traceback="x" * 900, phase="setup"),
+    ]
+    ranking = FailureRanking(failures, is_new=lambda suite, test: test.name == "test_new")
+    assert names(ranking) == ["test_setup", "test_new", "test_old_short", "test_old_long"]
+    
+    # Without is_new, ties keep their collection order
+    ties = [failure(f"test_{index}", f"message {chr(97 + index)}") for index in range(3)]
+    assert names(FailureRanking(ties)) == ["test_0", "test_1", "test_2"]
@@ -0,0 +1,108 @@
+"""Round-trip tests for the binary results format."""
+
+import io
+
+import pytest
+
+from llm_reporter_shared import serialization
+from llm_reporter_shared import models
+from llm_reporter_shared.models import ErrorInfo
+
+# Aliased: pytest would try to collect module-level Test* classes
+Suite, Result, Status = models.TestSuite, models.TestResult, models.TestStatus
+
+
+def make_suites():
+    """A realistic run plus the edge cases of the encoding."""
+    run = []
+    for index in range(3):
+        suite = Suite(name=f"test_module_{index}", file_path=f"tests/test_module_{index}.py",
+                      duration=1.5)
+        for number in range(serialization.BATCH_SIZE + 10):
+            test = Result(
+                name=f"test_case_{number}",
+                full_name=f"tests/test_module_{index}.py > TestCase > test_case_{number}",
+                status=Status.PASSED,
+                duration=0.001 * number,
+                line_number=number + 1,
+            )
+            if number % 100 == 0:
+                test.status = Status.FAILED
+                test.error = ErrorInfo(
+                    type="AssertionError",
+                    message=f"assert {number} == {number + 1}",
+                    expected=str(number + 1),
+                    actual=str(number),
+                    stack_trace="Traceback (most recent call last):\n  ...",
+                    code_context=f"> assert value == {number + 1}",
+                    fix_hint="Check the expected value",
+                    captured_output="[stdout]\nprinted",
+                    local_variables=f"value = {number}",
+                    diff="$.value: 1 != 2",
+                )
+            suite.tests.append(test)
+        run.append(suite)
+    
+    edge_cases = Suite(
+        name="edge_cases",
+        file_path="tests/test_edge_cases.py",
+        setup_error=ErrorInfo(type="RuntimeError", message="setup failed ü"),
+        teardown_error=ErrorInfo(type="OSError", message="\ud800 lone surrogate"),
+        metadata={"worker": "gw1"},
+        tests=[
+            Result(name="test_nul[\x00]", full_name="Edge > test_nul[\x00]",
+                   status=Status.FAILED, line_number=0,
+                   error=ErrorInfo(type="ValueError", message="", fix_hint="hint"),
+                   metadata={"rerun": 1}),
+            Result(name="test_renamed", full_name="Other > something_else",
+                   status=Status.SKIPPED),
+            Result(name="test_pending", full_name="Edge > test_pending",
+                   status=Status.PENDING),
+        ],
+    )
+    return run + [edge_cases, Suite(name="empty", file_path="tests/test_empty.py")]
+
+
+def test_round_trip():
+    suites = make_suites()
+    assert serialization.loads(serialization.dumps(suites)) == suites
+
+
+def test_streamed_tests_and_run_end():
+    suites = make_suites()
+    buffer = io.BytesIO()
+    writer = serialization.ResultWriter(buffer)
+    for suite in suites:
+        writer.start_suite(suite)
+        for test in suite.tests:
+            writer.write_test(test)
+        writer.end_suite(suite)
+    writer.end_run(1, 12.5)
+    
+    reader = serialization.ResultReader(io.BytesIO(buffer.getvalue()))
+    assert list(reader) == suites
+    assert reader.run_summary == serialization.RunSummary(1, 12.5)
+
+
+def test_compressed_sections_and_inline_texts(monkeypatch):
+    # Every section compressed, and the interning budget used up early
+    monkeypatch.setattr(serialization, "COMPRESS_MIN_BYTES", 0)
+    monkeypatch.setattr(serialization, "INTERN_MAX_CHARS", 100)
+    suites = make_suites()
+    data = serialization.dumps(suites)
+    assert serialization.loads(data) == suites
+    
+    monkeypatch.setattr(serialization, "COMPRESS_MIN_BYTES", 1 << 30)
+    assert len(serialization.dumps(suites)) > len(data)
+
+
+def test_rejects_unknown_version():
+    data = serialization._HEADER.pack(serialization.MAGIC, serialization.FORMAT_VERSION + 1)
+    with pytest.raises(ValueError):
+        serialization.loads(data)
+
+
+def test_rejects_truncated_stream():
+    data = serialization.dumps(make_suites())
+    with pytest.raises(ValueError):
+        serialization.loads(data[:-3])
@@ -0,0 +1,31 @@
+"""Checks of the collection cache, run against real pytest sessions."""
+
+import os
+
+from test_setup_cascade import run_reporter
+
+
+def test_cached_file_is_collected_again_when_an_import_gains_tests(tmp_path):
+    cache_file = str(tmp_path / ".llm-cache" / "collection.json")
+    (tmp_path / "base_tests.py").write_text("def helper():\n    pass\n")
+    (tmp_path / "test_derived.py").write_text("from base_tests import *\n")
+    
+    run_reporter(tmp_path, LLM_COLLECTION_CACHE_FILE=cache_file)
+    report = run_reporter(tmp_path, LLM_COLLECTION_CACHE_FILE=cache_file)
+    assert "SKIPPED FILES: 1" in report
+    
+    # test_derived.py itself is unchanged, but now imports a test
+    base = tmp_path / "base_tests.py"
+    base.write_text("def test_inherited():\n    pass\n")
+    newer = os.stat(cache_file).st_mtime_ns + 1_000_000_000
+    os.utime(base, ns=(newer, newer))
+    
+    report = run_reporter(tmp_path, LLM_COLLECTION_CACHE_FILE=cache_file)
+    assert "SKIPPED FILES" not in report
+    assert "TOTAL TESTS: 1" in report
+    
+    # Cached again once nothing changes
+    (tmp_path / "test_derived.py").write_text("")
+    run_reporter(tmp_path, LLM_COLLECTION_CACHE_FILE=cache_file)
+    report = run_reporter(tmp_path, LLM_COLLECTION_CACHE_FILE=cache_file)
+    assert "SKIPPED FILES: 1" in report
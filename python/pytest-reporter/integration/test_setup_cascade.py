@@ -0,0 +1,78 @@
+"""Checks of the setup error cascade collapsing, run against real pytest sessions."""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+SOURCE_PATHS = [
+    Path(__file__).resolve().parents[1] / "src",
+    Path(__file__).resolve().parents[2] / "llm_reporter_shared" / "src",
+]
+
+SESSION_FIXTURE = '''
+import pytest
+
+@pytest.fixture(scope="session")
+def database():
+    raise ConnectionError("connection refused")
+'''
+
+
+def run_reporter(directory: Path, mode: str = "summary", **env_values: str) -> str:
+    """Run pytest with the LLM reporter in directory and return the report.
+    
+    ``env_values`` are further environment variables (e.g. LLM_* options).
+    """
+    env = dict(os.environ, **env_values)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(p) for p in SOURCE_PATHS] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    env["LLM_OUTPUT_MODE"] = mode
+    env["LLM_INCLUDE_PASSED_SUITES"] = "1"
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "no:terminal", "-p", "no:cacheprovider",
+         "-p", "llm_pytest_reporter.plugin", "--llm-reporter", str(directory)],
+        cwd=str(directory), env=env, capture_output=True, text=True,
+    )
+    return result.stdout
+
+
+def test_session_fixture_shared_by_two_files(tmp_path):
+    (tmp_path / "conftest.py").write_text(SESSION_FIXTURE)
+    for name in ("test_one.py", "test_two.py"):
+        (tmp_path / name).write_text(
+            "def test_a(database):\n    pass\n\n\ndef test_b(database):\n    pass\n"
+        )
+    
+    report = run_reporter(tmp_path)
+    
+    # Each file reports its own root with the rest of the file collapsed
+    assert "ALL TESTS PASSED" not in report
+    for name in ("test_one.py", "test_two.py"):
+        assert f"SUITE: {tmp_path / name}" in report
+        assert f"{name} > test_a: " in report
+        assert f"{name} > test_b" not in report
+    assert report.count("(+1 more tests failed in setup with this error)") == 2
+    assert "TOTAL TESTS: 4 (4 failed)" in report
+
+
+def test_function_fixture_failures_are_not_collapsed(tmp_path):
+    # Both fixtures raise the same message from the same line
+    (tmp_path / "test_fixtures.py").write_text(
+        "import pytest\n\n\n"
+        "def make(name):\n"
+        "    @pytest.fixture(name=name)\n"
+        "    def fixture():\n        raise ValueError('bad value')\n"
+        "    return fixture\n\n\n"
+        "first = make('first')\n"
+        "second = make('second')\n\n\n"
+        "def test_a(first):\n    pass\n\n\n"
+        "def test_b(second):\n    pass\n"
+    )
+    
+    report = run_reporter(tmp_path)
+    
+    assert "test_fixtures.py > test_a: " in report
+    assert "test_fixtures.py > test_b: " in report
+    assert "more tests failed in setup" not in report
@@ -0,0 +1,190 @@
+"""Collection cache: skip unchanged test files that collected no tests.
+
+pytest has to import a module to run its tests, so the only collection
+work that can be skipped safely is for files that yield nothing: helpers
+that match the test file pattern, emptied or fully commented-out modules.
+Such files are remembered with their (mtime, size) and the stamps of the
+conftest.py files above them, and ignored by later runs until one of these
+changes. The whole cache is dropped when the pytest version, the plugins
+or the options that decide what is collected change, and when any .py file
+under the rootdir is newer than the newest one when the cache was written:
+a file may get its tests from another module (``from base import *``), so
+a cached file is only trusted while no source has changed. Files with
+collection errors or module-level skips are never cached.
+"""
+
+import os
+import json
+import hashlib
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pytest
+from _pytest.reports import CollectReport
+
+CACHE_VERSION = 3
+
+# Ini options that decide which files, classes and functions are collected
+COLLECTION_INI_OPTIONS = ("python_files", "python_classes", "python_functions")
+
+# A cached file: (mtime, size, digest of the conftest.py files above it)
+Stamp = Tuple[int, int, str]
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Return the (mtime, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _newest_source(rootdir: str, skip_dirs: List[str]) -> int:
+    """Newest mtime of the .py files under rootdir, outside directories matching skip_dirs."""
+    newest = 0
+    pending = [rootdir]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not any(fnmatch(entry.name, pattern) for pattern in skip_dirs):
+                            pending.append(entry.path)
+                    elif entry.name.endswith(".py"):
+                        newest = max(newest, entry.stat().st_mtime_ns)
+                except OSError:
+                    pass
+    return newest
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value).encode("utf-8")).hexdigest()[:16]
+
+
+def collection_key(config) -> str:
+    """Digest of the settings that decide what any file collects.
+    
+    Covers the pytest version, installed and ``-p`` plugins, the collection
+    ini options and the options that add or change collectors.
+    """
+    plugins: List[str] = sorted(
+        f"{dist.project_name}=={dist.version}"
+        for _, dist in config.pluginmanager.list_plugin_distinfo()
+    )
+    return _digest([
+        pytest.__version__,
+        plugins,
+        config.getoption("plugins", None) or [],
+        [config.getini(name) for name in COLLECTION_INI_OPTIONS],
+        bool(config.getoption("doctestmodules", False)),
+        str(config.getoption("importmode", None)),
+    ])
+
+
+class CollectionCache:
+    """pytest hooks that read and update the collection cache (pytest >= 7)."""
+    
+    def __init__(self, cache_file: str, config):
+        self.cache_file = cache_file
+        self.rootdir = Path(str(config.rootdir))
+        self.key = collection_key(config)
+        self.skipped = 0
+        # Taken before collection, so files changed during the run count as newer next time
+        self.newest_source = _newest_source(str(self.rootdir), config.getini("norecursedirs"))
+        self._conftests: Dict[Path, str] = {}
+        self._loaded = False
+        self._empty: Dict[str, Stamp] = self._load()
+        self._candidates: Set[str] = set()
+        self._non_empty: Set[str] = set()
+    
+    def _load(self) -> Dict[str, Stamp]:
+        """Read the cached empty files, or nothing if the cache is missing or stale."""
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        if data.get("key") != self.key:
+            return {}
+        if not isinstance(data.get("newest_source"), int) or self.newest_source > data["newest_source"]:
+            return {}
+        self._loaded = True
+        return {path: tuple(stamp) for path, stamp in data.get("empty", {}).items()}
+    
+    def _conftest_digest(self, directory: Path) -> str:
+        """Digest of the conftest.py stamps from directory up to the rootdir (memoized)."""
+        digest = self._conftests.get(directory)
+        if digest is None:
+            inherited = ""
+            if directory != self.rootdir and self.rootdir in directory.parents:
+                inherited = self._conftest_digest(directory.parent)
+            digest = _digest([inherited, _file_stamp(str(directory / "conftest.py"))])
+            self._conftests[directory] = digest
+        return digest
+    
+    def _stamp(self, path: str) -> Optional[Stamp]:
+        """What a cache entry for path is valid for, or None if the file is gone."""
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return None
+        return stamp + (self._conftest_digest(Path(path).parent),)
+    
+    def pytest_ignore_collect(self, collection_path, config):
+        """Skip a file that had no tests last time and has not changed since."""
+        if collection_path.suffix != ".py":
+            return None
+        path = str(collection_path)
+        stamp = self._empty.get(path)
+        if stamp is not None and stamp == self._stamp(path):
+            self.skipped += 1
+            return True
+        return None
+    
+    def pytest_collectreport(self, report: CollectReport):
+        """Note whether each collected module produced anything."""
+        if "::" in report.nodeid or not report.nodeid.endswith(".py"):
+            return
+        path = str(self.rootdir / report.fspath)
+        if report.passed and not report.result:
+            self._candidates.add(path)
+        else:
+            # A failed or skipped module, or one with tests (a file may be
+            # collected twice, e.g. with --doctest-modules)
+            self._non_empty.add(path)
+    
+    def pytest_sessionfinish(self, session):
+        """Store the empty files of this run along with unchanged earlier entries."""
+        empty = dict(self._empty)
+        for path in self._non_empty:
+            empty.pop(path, None)
+        for path in self._candidates - self._non_empty:
+            stamp = self._stamp(path)
+            if stamp is not None:
+                empty[path] = stamp
+        if self._loaded and empty == self._empty:
+            return
+        
+        data = {
+            "version": CACHE_VERSION,
+            "key": self.key,
+            "newest_source": self.newest_source,
+            "empty": {path: list(stamp) for path, stamp in empty.items()},
+        }
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            pass
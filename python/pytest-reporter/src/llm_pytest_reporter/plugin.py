@@ -1,283 +1,12 @@
-"""Pytest plugin for LLM-optimized test reporting."""
-
-import sys
-import os
-from pathlib import Path
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-
-import pytest
-from _pytest.config import Config
-from _pytest.terminal import TerminalReporter
-from _pytest.reports import TestReport
-from _pytest._code import ExceptionInfo
-
-# Import from shared package
-from llm_reporter_shared import (
-    ReporterConfig,
-    StreamingFormatter,
-    ErrorClassifier,
-    TestSuite,
-    TestResult,
-    TestStatus,
-    ErrorInfo
-)
+"""Pytest plugin for LLM-optimized test reporting.
 
+This module is loaded through the ``pytest11`` entry point for every pytest
+invocation, so it only defines the option and configure hooks. The reporter
+itself and the shared formatting package are imported once
+``pytest_configure`` decides to activate.
+"""
 
-class LLMReporter:
-    """LLM-optimized pytest reporter."""
-    
-    def __init__(self, config: Config, terminal_reporter: TerminalReporter):
-        self.config = config
-        self.terminal_reporter = terminal_reporter
-        
-        # Load reporter configuration
-        pytest_options = {}
-        if hasattr(config, "option") and hasattr(config.option, "llm_reporter_options"):
-            pytest_options = config.option.llm_reporter_options or {}
-        
-        self.reporter_config = ReporterConfig.load(pytest_options)
-        self.formatter = StreamingFormatter(self.reporter_config)
-        self.classifier = ErrorClassifier()
-        
-        # Test tracking
-        self.suites: Dict[str, TestSuite] = {}
-        self.current_suite: Optional[TestSuite] = None
-        self.start_time = datetime.now()
-        self._started = False
-    
-    def pytest_runtest_protocol(self, item, nextitem):
-        """Called for each test item."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-            
-        # Get file path
-        file_path = str(item.fspath)
-        
-        # Create or get suite
-        if file_path not in self.suites:
-            suite_name = item.module.__name__ if hasattr(item, "module") else Path(file_path).stem
-            self.suites[file_path] = TestSuite(
-                name=suite_name,
-                file_path=file_path
-            )
-        
-        self.current_suite = self.suites[file_path]
-    
-    def pytest_runtest_logreport(self, report: TestReport):
-        """Process test report."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-            
-        if not self._started:
-            self.formatter.start()
-            self._started = True
-        
-        # Only process call reports (not setup/teardown)
-        if report.when == "call":
-            self._process_test_report(report)
-        elif report.when == "setup" and report.failed:
-            self._process_setup_failure(report)
-        elif report.when == "teardown" and report.failed:
-            self._process_teardown_failure(report)
-    
-    def _process_test_report(self, report: TestReport):
-        """Process a test call report."""
-        if not self.current_suite:
-            return
-        
-        # Determine test status
-        if report.passed:
-            status = TestStatus.PASSED
-        elif report.failed:
-            status = TestStatus.FAILED
-        elif report.skipped:
-            status = TestStatus.SKIPPED
-        else:
-            status = TestStatus.PENDING
-        
-        # Create test result
-        test_name = report.nodeid.split("::")[-1]
-        full_name = report.nodeid.replace("::", " > ")
-        
-        test_result = TestResult(
-            name=test_name,
-            full_name=full_name,
-            status=status,
-            duration=report.duration,
-            line_number=report.location[1] if report.location else None
-        )
-        
-        # Add error info if failed
-        if report.failed and report.longrepr:
-            test_result.error = self._extract_error_info(report)
-        
-        self.current_suite.tests.append(test_result)
-    
-    def _clean_error_message(self, message: str) -> str:
-        """Clean up pytest's assertion messages."""
-        # Remove assert prefix
-        if message.startswith("assert "):
-            message = message[7:]
-        
-        # Handle pytest's detailed assertion output
-        lines = message.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # Skip pytest-specific formatting
-            if any(skip in line for skip in [
-                "+ where", 
-                "Use -v to get more diff",
-                "At index",
-                "Differing items:",
-                "Full diff:",
-                "Left contains",
-                "Right contains",
-                "...Full output truncated"
-            ]):
-                continue
-            
-            # Clean up line
-            line = line.strip()
-            if line and not line.startswith(('+', '-', '?', '~')):
-                cleaned_lines.append(line)
-        
-        # Join and return
-        result = '\n'.join(cleaned_lines).strip()
-        
-        # If we have a simple comparison, extract just that
-        import re
-        simple_compare = re.match(r'^(\S+)\s*(==|!=|<|>|<=|>=|is|is not|in|not in)\s*(.+)$', result)
-        if simple_compare:
-            return result
-        
-        # Otherwise return the cleaned message
-        return result or message
-    
-    def _process_setup_failure(self, report: TestReport):
-        """Process setup failure."""
-        if self.current_suite and report.longrepr:
-            self.current_suite.setup_error = self._extract_error_info(report)
-    
-    def _process_teardown_failure(self, report: TestReport):
-        """Process teardown failure."""
-        if self.current_suite and report.longrepr:
-            self.current_suite.teardown_error = self._extract_error_info(report)
-    
-    def _extract_error_info(self, report: TestReport) -> ErrorInfo:
-        """Extract error information from test report."""
-        error_info = ErrorInfo(
-            type="Unknown Error",
-            message="Test failed"
-        )
-        
-        if hasattr(report.longrepr, "reprcrash"):
-            # Extract from reprcrash
-            reprcrash = report.longrepr.reprcrash
-            error_info.type = reprcrash.message.split(":")[0] if ":" in reprcrash.message else "Error"
-            error_info.message = self._clean_error_message(reprcrash.message)
-        
-        # Extract traceback and values
-        if hasattr(report.longrepr, "reprtraceback"):
-            # Get the last traceback entry for code context
-            if report.longrepr.reprtraceback.reprentries:
-                last_entry = report.longrepr.reprtraceback.reprentries[-1]
-                if hasattr(last_entry, "lines"):
-                    # Extract code context
-                    lines = []
-                    for line in last_entry.lines:
-                        if isinstance(line, tuple) and len(line) >= 2:
-                            lines.append(line[0] + line[1])
-                        else:
-                            lines.append(str(line))
-                    
-                    # Format code context with line numbers
-                    if lines and hasattr(last_entry, "reprfileloc") and last_entry.reprfileloc:
-                        line_num = last_entry.reprfileloc.lineno
-                        formatted_lines = []
-                        
-                        # Add context lines
-                        for i, line in enumerate(lines):
-                            offset = i - len(lines) // 2
-                            current_line = line_num + offset
-                            prefix = ">" if offset == 0 else " "
-                            formatted_lines.append(f"{prefix} {current_line:3d} | {line}")
-                        
-                        error_info.code_context = "\n".join(formatted_lines)
-        
-        # If we didn't get a good message from reprcrash, try str(longrepr)
-        if error_info.message == "Test failed" and hasattr(report, 'longrepr'):
-            full_message = str(report.longrepr)
-            # Extract just the assertion line if present
-            lines = full_message.split('\n')
-            for line in lines:
-                if 'assert' in line or '==' in line or '!=' in line:
-                    error_info.message = self._clean_error_message(line)
-                    break
-        
-        # Extract expected/actual values
-        expected, actual = self.classifier.extract_values(error_info.message)
-        if expected:
-            error_info.expected = expected
-        if actual:
-            error_info.actual = actual
-        
-        # Generate fix hint
-        error_info.fix_hint = self.classifier.generate_fix_hint(error_info)
-        
-        return error_info
-    
-    def pytest_sessionfinish(self, session, exitstatus):
-        """Called after whole test run finishes."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-            
-        # Format each completed suite
-        for suite in self.suites.values():
-            self.formatter.add_suite(suite)
-        
-        # Finish formatting
-        self.formatter.finish(exitstatus)
-    
-    def pytest_terminal_summary(self, terminalreporter, exitstatus, config):
-        """Suppress default terminal summary when using LLM reporter."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-            
-        # Clear terminal reporter stats to suppress default output
-        # Don't set _session to None as pytest still needs it
-        terminalreporter.stats.clear()
-        if hasattr(terminalreporter, '_durations'):
-            terminalreporter._durations.clear()
-        
-        # Don't show the summary
-        terminalreporter.summary_errors = lambda: None
-        terminalreporter.summary_failures = lambda: None
-        terminalreporter.summary_warnings = lambda: None
-        terminalreporter.short_test_summary = lambda: None
-    
-    def pytest_report_teststatus(self, report, config):
-        """Override test status to suppress progress output."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-        
-        # Return empty status to suppress progress indicators
-        return "", "", ""
-    
-    def pytest_report_header(self, config, start_path):
-        """Suppress pytest header."""
-        # Only process if reporter is active
-        if not hasattr(self.config.option, 'llm_reporter_active') or not self.config.option.llm_reporter_active:
-            return
-        
-        # Return empty list to suppress header
-        return []
+import os
 
 
 def pytest_addoption(parser):
@@ -290,13 +19,18 @@ def pytest_addoption(parser):
     )
     group.addoption(
         "--llm-reporter-mode",
-        choices=["summary", "detailed"],
+        choices=["summary", "detailed", "delta"],
         help="Reporter output mode"
     )
     group.addoption(
         "--llm-reporter-output",
         help="Output file path"
     )
+    group.addoption(
+        "--llm-reporter-minimal-tb",
+        action="store_true",
+        help="Skip pytest's own traceback rendering (other plugins reading longrepr get minimal tracebacks)"
+    )
 
 
 def pytest_configure(config):
@@ -315,16 +49,42 @@ def pytest_configure(config):
             options["mode"] = config.option.llm_reporter_mode
         if hasattr(config.option, "llm_reporter_output") and config.option.llm_reporter_output:
             options["output_file"] = config.option.llm_reporter_output
+        if getattr(config.option, "llm_reporter_minimal_tb", False):
+            options["minimal_tracebacks"] = True
         
         config.option.llm_reporter_options = options
         config.option.llm_reporter_active = True
         
+        # Import the reporter (and the shared package) only when activated
+        from .reporter import LLMReporter, LLMOutputSuppressor, LLMResourceRecorder
+        
         # Register our reporter
         terminal_reporter = config.pluginmanager.get_plugin("terminalreporter")
         reporter = LLMReporter(config, terminal_reporter)
         
-        # Register hooks
+        # Register hooks; the active state is decided here once, so the
+        # registered hooks never need to check it per call
         config.pluginmanager.register(reporter, "llm_reporter_instance")
+        config.pluginmanager.register(LLMOutputSuppressor(), "llm_reporter_suppressor")
+        if reporter.meter is not None:
+            config.pluginmanager.register(
+                LLMResourceRecorder(reporter.meter, reporter.measurements), "llm_reporter_resources"
+            )
+        
+        # The collection cache relies on pytest_ignore_collect(collection_path)
+        cache_file = reporter.reporter_config.collection_cache_file
+        if cache_file and _pytest_major() >= 7:
+            from .collection import CollectionCache
+            config.pluginmanager.register(
+                CollectionCache(cache_file, config), "llm_reporter_collection_cache"
+            )
+        
+        if reporter.reporter_config.minimal_tracebacks:
+            # The report is built from call.excinfo, so pytest's longrepr is
+            # only needed for its crash line: no source, arguments or locals
+            config.option.tbstyle = "no"
+            config.option.showlocals = False
+            config.option.fulltrace = False
         
         # Suppress default terminal reporter output 
         config.option.verbose = -1
@@ -332,4 +92,18 @@ def pytest_configure(config):
         if terminal_reporter:
             terminal_reporter.showheader = False
             terminal_reporter.showfspath = False
-            terminal_reporter.showprogress = False
\ No newline at end of file
+            terminal_reporter.showprogress = False
+
+
+def _pytest_major() -> int:
+    """Major version of the running pytest."""
+    import pytest
+    return getattr(pytest, "version_tuple", (6,))[0]
+
+
+def __getattr__(name):
+    """Keep ``llm_pytest_reporter.plugin.LLMReporter`` importable."""
+    if name == "LLMReporter":
+        from .reporter import LLMReporter
+        return LLMReporter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
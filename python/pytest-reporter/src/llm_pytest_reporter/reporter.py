@@ -0,0 +1,593 @@
+"""LLM reporter hook implementations, registered only once the plugin activates."""
+
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime
+
+import pytest
+from _pytest.config import Config
+from _pytest.terminal import TerminalReporter
+from _pytest.reports import TestReport, CollectReport
+from _pytest._code import ExceptionInfo
+
+# Import from shared package
+from llm_reporter_shared import (
+    ReporterConfig,
+    StreamingFormatter,
+    ErrorClassifier,
+    TestSuite,
+    TestResult,
+    TestStatus,
+    ErrorInfo
+)
+from llm_reporter_shared.config import SNAPSHOT_ENV_VAR
+from llm_reporter_shared.capture import clip_text, tail_text, format_output_tail
+from llm_reporter_shared.resources import ResourceMeter
+from llm_reporter_shared.frames import (
+    walk_frames, filter_frames, deepest_user_frame, find_frame, format_code_context, format_frames
+)
+from llm_reporter_shared.variables import format_locals, format_value
+from llm_reporter_shared.diff import LARGE_VALUE_CHARS, diff_summary, short_repr, is_structured, structural_diff
+
+# Collections that take longer than this are reported in a COLLECTION
+# section even without errors
+COLLECTION_REPORT_SECONDS = 2.0
+
+# Interval between progress lines while a collection is running
+COLLECTION_PROGRESS_SECONDS = 10.0
+
+
+class LLMReporter:
+    """LLM-optimized pytest reporter."""
+    
+    def __init__(self, config: Config, terminal_reporter: TerminalReporter):
+        self.config = config
+        self.terminal_reporter = terminal_reporter
+        
+        # Load reporter configuration
+        pytest_options = {}
+        if hasattr(config, "option") and hasattr(config.option, "llm_reporter_options"):
+            pytest_options = config.option.llm_reporter_options or {}
+        
+        # pytest-xdist workers receive the controller's resolved config
+        # (see pytest_configure_node)
+        exported = getattr(config, "workerinput", {}).get(SNAPSHOT_ENV_VAR)
+        self.reporter_config = ReporterConfig.load(pytest_options, exported)
+        
+        self.formatter = StreamingFormatter(self.reporter_config)
+        self.classifier = ErrorClassifier()
+        
+        # Resource measurements by node id, filled by LLMResourceRecorder
+        # (registered only when measuring is enabled)
+        self.meter = ResourceMeter.from_config(self.reporter_config)
+        self.measurements: Dict[str, Dict[str, Any]] = {}
+        
+        # Test tracking
+        self.suites: Dict[str, TestSuite] = {}
+        self.current_suite: Optional[TestSuite] = None
+        self._suites_by_nodeid: Dict[str, TestSuite] = {}
+        # First test of a suite to fail in setup with a given crash
+        # (suite path, crash path, line, message)
+        self._setup_roots: Dict[Tuple[str, str, int, str], TestResult] = {}
+        # Exceptions of failed phases by (node id, phase), from makereport
+        # until the matching logreport
+        self._excinfos: Dict[Tuple[str, str], ExceptionInfo] = {}
+        # Structural diff of the last failed comparison, attached to the
+        # phase it failed in by makereport (structural_diff option)
+        self._pending_diff: Optional[str] = None
+        self._diffs: Dict[Tuple[str, str], str] = {}
+        self.start_time = datetime.now()
+        self._started = False
+        
+        # Collection phase
+        self._collection_start = time.perf_counter()
+        self._last_progress = self._collection_start
+        self._collected = 0
+        self._collection_errors = 0
+    
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        """Hand the resolved file/environment config to a pytest-xdist worker."""
+        ReporterConfig.snapshot().export_snapshot(node.workerinput)
+    
+    def _start(self):
+        """Write the report header once, before the first output."""
+        if not self._started:
+            self.formatter.start()
+            self._started = True
+    
+    def pytest_collection(self, session):
+        """Start timing the collection phase."""
+        self._collection_start = self._last_progress = time.perf_counter()
+    
+    def pytest_collection_finish(self, session):
+        """Map every collected node id to its suite once, before tests run."""
+        self._start()
+        
+        duration = time.perf_counter() - self._collection_start
+        cache = self.config.pluginmanager.get_plugin("llm_reporter_collection_cache")
+        cached_empty = cache.skipped if cache is not None else 0
+        if self._collection_errors or cached_empty or duration >= COLLECTION_REPORT_SECONDS:
+            self.formatter.write_note(self.formatter.format_collection_summary(
+                self._collected, len(session.items), self._collection_errors, duration, cached_empty
+            ))
+        
+        suites_by_path: Dict[str, TestSuite] = {}
+        for item in session.items:
+            # item.path is the cheap pathlib form (pytest >= 7)
+            path = getattr(item, "path", None) or item.fspath
+            file_path = str(path)
+            suite = suites_by_path.get(file_path)
+            if suite is None:
+                module = getattr(item, "module", None)
+                suite_name = module.__name__ if module is not None else Path(file_path).stem
+                suite = suites_by_path[file_path] = TestSuite(
+                    name=suite_name,
+                    file_path=file_path
+                )
+            self._suites_by_nodeid[item.nodeid] = suite
+    
+    def pytest_collectreport(self, report: CollectReport):
+        """Count collected items and record modules that failed to collect.
+        
+        Collection errors and, for long collections, progress lines are
+        written as they happen rather than after the whole collection.
+        """
+        if not report.failed:
+            if report.passed:
+                self._collected += sum(1 for node in report.result if isinstance(node, pytest.Item))
+                now = time.perf_counter()
+                if now - self._last_progress >= COLLECTION_PROGRESS_SECONDS:
+                    self._last_progress = now
+                    self._start()
+                    self.formatter.write_note(self.formatter.format_collection_progress(
+                        self._collected, now - self._collection_start
+                    ))
+            return
+        
+        file_path = str(Path(str(self.config.rootdir)) / report.fspath)
+        suite = self.suites.get(file_path)
+        if suite is None:
+            suite = self.suites[file_path] = TestSuite(name=Path(file_path).stem, file_path=file_path)
+        
+        test_result = TestResult(
+            name=Path(file_path).name,
+            full_name=report.nodeid.replace("::", " > ") or file_path,
+            status=TestStatus.FAILED,
+            error=self._extract_collect_error(report),
+            metadata={"phase": "collect"}
+        )
+        suite.tests.append(test_result)
+        
+        self._collection_errors += 1
+        self._start()
+        # The error is reported again with the suite's failures, where it
+        # is counted as omitted if the budget has run out
+        self.formatter.write_note(self.formatter.format_collection_error(
+            test_result.full_name, test_result.error.message
+        ))
+    
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        """Keep the exception (and assertion diff) of a failed phase for structured extraction.
+        
+        The exception and its traceback are only available here; later
+        hooks see the rendered longrepr. Reports built elsewhere (e.g. by
+        xdist workers) have no entry and fall back to the longrepr.
+        """
+        outcome = yield
+        pending_diff, self._pending_diff = self._pending_diff, None
+        if call.excinfo is not None and outcome.get_result().failed:
+            self._excinfos[(item.nodeid, call.when)] = call.excinfo
+            if call.when == "setup":
+                # Set on the report so it also travels from xdist workers
+                outcome.get_result().llm_fixture_scope = self._failed_fixture_scope(item, call.excinfo.value)
+            if pending_diff is not None and call.excinfo.errisinstance(AssertionError):
+                self._diffs[(item.nodeid, call.when)] = pending_diff
+    
+    def pytest_runtest_logreport(self, report: TestReport):
+        """Process test report."""
+        excinfo = self._excinfos.pop((report.nodeid, report.when), None) if self._excinfos else None
+        if report.when == "setup":
+            # The setup report opens the test; the suite is reported once its
+            # first test has started
+            suite = self._suites_by_nodeid.get(report.nodeid) or self._suite_from_report(report)
+            self.current_suite = self.suites.setdefault(suite.file_path, suite)
+            if report.failed:
+                self._process_setup_failure(report, excinfo)
+        elif report.when == "call":
+            self._process_test_report(report, excinfo)
+        elif report.when == "teardown" and report.failed:
+            self._process_teardown_failure(report, excinfo)
+    
+    def _suite_from_report(self, report: TestReport) -> TestSuite:
+        """Resolve the suite of a test that was not collected in this process (e.g. xdist)."""
+        file_path = str(Path(str(self.config.rootdir)) / report.fspath)
+        suite = self.suites.get(file_path)
+        if suite is None:
+            suite = TestSuite(name=Path(file_path).stem, file_path=file_path)
+        self._suites_by_nodeid[report.nodeid] = suite
+        return suite
+    
+    def _process_test_report(self, report: TestReport, excinfo: Optional[ExceptionInfo] = None):
+        """Process a test call report."""
+        if not self.current_suite:
+            return
+        
+        # Determine test status
+        if report.passed:
+            status = TestStatus.PASSED
+        elif report.failed:
+            status = TestStatus.FAILED
+        elif report.skipped:
+            status = TestStatus.SKIPPED
+        else:
+            status = TestStatus.PENDING
+        
+        test_result = self._new_test_result(report, status)
+        if self.measurements:
+            metrics = self.measurements.pop(report.nodeid, None)
+            if metrics:
+                test_result.metadata.update(metrics)
+        
+        # Add error info if failed
+        if report.failed and (excinfo is not None or report.longrepr):
+            test_result.error = self._extract_error_info(report, excinfo)
+        
+        self.current_suite.tests.append(test_result)
+    
+    def _new_test_result(self, report: TestReport, status: TestStatus) -> TestResult:
+        """Create the result of the test a report belongs to."""
+        return TestResult(
+            name=report.nodeid.split("::")[-1],
+            full_name=report.nodeid.replace("::", " > "),
+            status=status,
+            duration=report.duration,
+            line_number=report.location[1] if report.location else None
+        )
+    
+    def _clean_error_message(self, message: str) -> str:
+        """Clean up pytest's assertion messages."""
+        # Bound the message before any line splitting or filtering so huge
+        # reprs don't dominate extraction time
+        message = clip_text(message, self.reporter_config.max_message_length)
+        
+        # Remove assert prefix
+        if message.startswith("assert "):
+            message = message[7:]
+        
+        # Handle pytest's detailed assertion output
+        lines = message.split('\n')
+        cleaned_lines = []
+        
+        for line in lines:
+            # Skip pytest-specific formatting
+            if any(skip in line for skip in [
+                "+ where", 
+                "Use -v to get more diff",
+                "At index",
+                "Differing items:",
+                "Full diff:",
+                "Left contains",
+                "Right contains",
+                "...Full output truncated"
+            ]):
+                continue
+            
+            # Clean up line
+            line = line.strip()
+            if line and not line.startswith(('+', '-', '?', '~')):
+                cleaned_lines.append(line)
+        
+        # Join and return
+        result = '\n'.join(cleaned_lines).strip()
+        
+        # If we have a simple comparison, extract just that
+        import re
+        simple_compare = re.match(r'^(\S+)\s*(==|!=|<|>|<=|>=|is|is not|in|not in)\s*(.+)$', result)
+        if simple_compare:
+            return result
+        
+        # Otherwise return the cleaned message
+        return result or message
+    
+    def _process_setup_failure(self, report: TestReport, excinfo: Optional[ExceptionInfo] = None):
+        """Record a test that failed in setup, collapsing repeats of the same error.
+        
+        When a class-, module- or session-scoped fixture fails, pytest
+        re-raises its cached exception in the setup of every test that
+        requests it. Those reports share the crash location and message, so
+        only the first one of each suite (the root) has its error extracted;
+        the others share the root's error, point to it in
+        ``metadata["cascade_of"]`` and are counted in the root's
+        ``metadata["cascaded"]``. Failures of function-scoped fixtures are
+        independent of each other and are never collapsed.
+        """
+        if not self.current_suite:
+            return
+        
+        test_result = self._new_test_result(report, TestStatus.FAILED)
+        test_result.metadata["phase"] = "setup"
+        
+        key = None
+        scope = getattr(report, "llm_fixture_scope", None)
+        if scope is not None and scope != "function":
+            crash = self._cascade_key(report, excinfo)
+            if crash is not None:
+                key = (self.current_suite.file_path,) + crash
+        root = self._setup_roots.get(key) if key is not None else None
+        if root is None:
+            if excinfo is not None or report.longrepr:
+                test_result.error = self._extract_error_info(report, excinfo)
+            if key is not None:
+                self._setup_roots[key] = test_result
+        else:
+            test_result.error = root.error
+            test_result.metadata["cascade_of"] = root.full_name
+            root.metadata["cascaded"] = root.metadata.get("cascaded", 0) + 1
+        
+        self.current_suite.tests.append(test_result)
+    
+    @staticmethod
+    def _failed_fixture_scope(item, exception: BaseException) -> Optional[str]:
+        """Scope of the fixture whose setup raised ``exception``, if a fixture did."""
+        fixture_info = getattr(item, "_fixtureinfo", None)
+        if fixture_info is None:
+            return None
+        for fixturedefs in fixture_info.name2fixturedefs.values():
+            for fixturedef in fixturedefs:
+                cached = getattr(fixturedef, "cached_result", None)
+                if cached is None or not cached[2]:
+                    continue
+                # (exception, traceback), or sys.exc_info() before pytest 8
+                raised = cached[2][1] if len(cached[2]) == 3 else cached[2][0]
+                if raised is exception:
+                    return fixturedef.scope
+        return None
+    
+    @staticmethod
+    def _cascade_key(report: TestReport, excinfo: Optional[ExceptionInfo] = None) -> Optional[Tuple[str, int, str]]:
+        """Identify a setup error by where it was raised and its message."""
+        if excinfo is not None:
+            tb = excinfo.tb
+            while tb.tb_next is not None:
+                tb = tb.tb_next
+            return (tb.tb_frame.f_code.co_filename, tb.tb_lineno, excinfo.exconly(tryshort=True))
+        crash = getattr(report.longrepr, "reprcrash", None)
+        if crash is None:
+            return None
+        return (crash.path, crash.lineno, crash.message)
+    
+    def _process_teardown_failure(self, report: TestReport, excinfo: Optional[ExceptionInfo] = None):
+        """Process teardown failure (the first one of a suite is kept)."""
+        if not self.current_suite or self.current_suite.teardown_error is not None:
+            return
+        if excinfo is not None or report.longrepr:
+            self.current_suite.teardown_error = self._extract_error_info(report, excinfo)
+    
+    def _extract_error_info(self, report: TestReport, excinfo: Optional[ExceptionInfo] = None) -> ErrorInfo:
+        """Extract error information from the exception, or else from the test report."""
+        if excinfo is not None:
+            error_info = self._error_from_excinfo(excinfo)
+            error_info.captured_output = self._output_tail(report)
+            if self._diffs:
+                error_info.diff = self._diffs.pop((report.nodeid, report.when), None)
+            return error_info
+        
+        error_info = ErrorInfo(
+            type="Unknown Error",
+            message="Test failed"
+        )
+        
+        if hasattr(report.longrepr, "reprcrash"):
+            # Extract from reprcrash
+            reprcrash = report.longrepr.reprcrash
+            error_info.type = reprcrash.message.split(":")[0] if ":" in reprcrash.message else "Error"
+            error_info.message = self._clean_error_message(reprcrash.message)
+        
+        # Extract traceback and values
+        if hasattr(report.longrepr, "reprtraceback"):
+            # Get the last traceback entry for code context
+            if report.longrepr.reprtraceback.reprentries:
+                last_entry = report.longrepr.reprtraceback.reprentries[-1]
+                if hasattr(last_entry, "lines"):
+                    # Extract code context
+                    lines = []
+                    for line in last_entry.lines:
+                        if isinstance(line, tuple) and len(line) >= 2:
+                            lines.append(line[0] + line[1])
+                        else:
+                            lines.append(str(line))
+                    
+                    # Format code context with line numbers
+                    if lines and hasattr(last_entry, "reprfileloc") and last_entry.reprfileloc:
+                        line_num = last_entry.reprfileloc.lineno
+                        formatted_lines = []
+                        
+                        # Add context lines
+                        for i, line in enumerate(lines):
+                            offset = i - len(lines) // 2
+                            current_line = line_num + offset
+                            prefix = ">" if offset == 0 else " "
+                            formatted_lines.append(f"{prefix} {current_line:3d} | {line}")
+                        
+                        error_info.code_context = "\n".join(formatted_lines)
+        
+        # If we didn't get a good message from reprcrash, try str(longrepr)
+        if error_info.message == "Test failed" and hasattr(report, 'longrepr'):
+            full_message = clip_text(str(report.longrepr), self.reporter_config.max_message_length)
+            # Extract just the assertion line if present
+            lines = full_message.split('\n')
+            for line in lines:
+                if 'assert' in line or '==' in line or '!=' in line:
+                    error_info.message = self._clean_error_message(line)
+                    break
+        
+        error_info.captured_output = self._output_tail(report)
+        return self._complete_error_info(error_info)
+    
+    def _error_from_excinfo(self, excinfo: ExceptionInfo) -> ErrorInfo:
+        """Build error information straight from the exception and its frames.
+        
+        Nothing is parsed back out of pytest's rendered report: the type
+        comes from the exception class, the message from the exception,
+        and file and line from the deepest frame of the code under test.
+        """
+        error_info = ErrorInfo(
+            type=excinfo.typename,
+            message=self._clean_error_message(excinfo.exconly(tryshort=True))
+        )
+        
+        entries = filter_frames(walk_frames(excinfo.tb))
+        if entries:
+            frame = deepest_user_frame(entries)
+            error_info.code_context = format_code_context(frame.filename, frame.lineno)
+            if self.reporter_config.stack_trace_lines > 0:
+                error_info.stack_trace = format_frames(entries, self.reporter_config.stack_trace_lines)
+            if self.reporter_config.capture_locals:
+                error_info.local_variables = format_locals(
+                    find_frame(excinfo.tb, frame), self.reporter_config.locals_max_bytes
+                )
+        
+        return self._complete_error_info(error_info)
+    
+    def _output_tail(self, report) -> Optional[str]:
+        """The bounded tail of the output pytest captured for a failing report.
+        
+        pytest already captures each test's stdout, stderr and log records;
+        only their last lines are kept, and only for failures.
+        """
+        lines = self.reporter_config.output_tail_lines
+        if lines <= 0:
+            return None
+        chars = self.reporter_config.output_tail_chars
+        return format_output_tail(
+            (name, tail_text(text, lines, chars))
+            for name, text in (("stdout", report.capstdout), ("stderr", report.capstderr), ("log", report.caplog))
+        )
+    
+    def _complete_error_info(self, error_info: ErrorInfo) -> ErrorInfo:
+        """Add the expected/actual values and the fix hint to extracted error information."""
+        # Extract expected/actual values
+        expected, actual = self.classifier.extract_values(error_info.message)
+        if expected:
+            error_info.expected = expected
+        if actual:
+            error_info.actual = actual
+        
+        # Generate fix hint
+        error_info.fix_hint = self.classifier.generate_fix_hint(error_info)
+        
+        return error_info
+    
+    def _extract_collect_error(self, report: CollectReport) -> ErrorInfo:
+        """Extract error information from a failed collection report."""
+        if hasattr(report.longrepr, "reprcrash"):
+            return self._extract_error_info(report)
+        
+        # Import errors are reported as plain text; the "E" lines hold the exception
+        text = clip_text(str(report.longrepr), self.reporter_config.max_message_length)
+        lines = text.splitlines()
+        errors = [line[1:].strip() for line in lines if line.startswith("E ")]
+        message = errors[-1] if errors else next((line for line in lines if line.strip()), "Collection failed")
+        return ErrorInfo(
+            type=message.split(":")[0] if ":" in message else "CollectionError",
+            message=message,
+            stack_trace=text
+        )
+    
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_assertrepr_compare(self, config, op, left, right):
+        """Explain ``==`` on large strings with a linear-time diff.
+        
+        pytest's own explanation runs difflib, which is quadratic and can
+        take minutes on multi-megabyte values; smaller values are left to
+        pytest. Few lines are shown per side so the explanation survives
+        pytest's truncation to 8 lines.
+        
+        With the structural_diff option, compared dicts, lists and sets
+        get a path-addressed diff instead, kept in full for the report
+        (see pytest_runtest_makereport) and summarized by its first line.
+        """
+        if op != "==":
+            return None
+        if self.reporter_config.structural_diff and is_structured(left) and is_structured(right):
+            differences = structural_diff(left, right)
+            if differences is None:
+                return None
+            self._pending_diff = "\n".join(differences)
+            return [f"{format_value(left)} == {format_value(right)}", f"first difference: {differences[0]}"]
+        if not isinstance(left, str) or not isinstance(right, str):
+            return None
+        if len(left) < LARGE_VALUE_CHARS and len(right) < LARGE_VALUE_CHARS:
+            return None
+        summary = diff_summary(right, left, max_lines=2)
+        if summary is None:
+            return None
+        return [f"{short_repr(left)} == {short_repr(right)}"] + summary
+    
+    def pytest_sessionfinish(self, session, exitstatus):
+        """Called after whole test run finishes."""
+        self._start()
+        
+        # Format each completed suite
+        for suite in self.suites.values():
+            self.formatter.add_suite(suite)
+        
+        # Finish formatting
+        self.formatter.finish(exitstatus)
+
+
+class LLMResourceRecorder:
+    """Measures the call phase of sampled tests for :class:`LLMReporter`.
+    
+    A separate plugin so that runs without resource measurements do not pay
+    for the hook wrapper at all.
+    """
+    
+    def __init__(self, meter: ResourceMeter, measurements: Dict[str, Dict[str, Any]]):
+        self.meter = meter
+        self.measurements = measurements
+    
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        """Measure the test function between the wrapper's halves."""
+        if not self.meter.sampled(item.nodeid):
+            yield
+            return
+        token = self.meter.start()
+        yield
+        self.measurements[item.nodeid] = self.meter.stop(token)
+
+
+class LLMOutputSuppressor:
+    """Hooks that silence pytest's own terminal output while the LLM reporter is active.
+    
+    Kept separate from :class:`LLMReporter` so each plugin only implements the
+    hooks it needs; both are registered only once the reporter is activated.
+    """
+    
+    def pytest_terminal_summary(self, terminalreporter, exitstatus, config):
+        """Suppress default terminal summary when using LLM reporter."""
+        # Clear terminal reporter stats to suppress default output
+        # Don't set _session to None as pytest still needs it
+        terminalreporter.stats.clear()
+        if hasattr(terminalreporter, '_durations'):
+            terminalreporter._durations.clear()
+        
+        # Don't show the summary
+        terminalreporter.summary_errors = lambda: None
+        terminalreporter.summary_failures = lambda: None
+        terminalreporter.summary_warnings = lambda: None
+        terminalreporter.short_test_summary = lambda: None
+    
+    def pytest_report_teststatus(self, report, config):
+        """Override test status to suppress progress output."""
+        # Return empty status to suppress progress indicators
+        return "", "", ""
+    
+    def pytest_report_header(self, config, start_path):
+        """Suppress pytest header."""
+        # Return empty list to suppress header
+        return []
\ No newline at end of file
@@ -19,6 +19,31 @@ from llm_reporter_shared import (
     TestStatus,
     ErrorInfo
 )
+from llm_reporter_shared.capture import clip_text, tail_text, format_output_tail, OutputCapture
+from llm_reporter_shared.resources import ResourceMeter
+from llm_reporter_shared.frames import (
+    walk_frames, filter_frames, deepest_user_frame, find_frame, format_code_context, format_frames
+)
+from llm_reporter_shared.variables import format_locals
+from llm_reporter_shared.diff import is_structured, structural_diff
+
+# Parameter names of the compared values in unittest's assertion methods
+_ASSERTION_OPERANDS = (
+    ("first", "second"), ("d1", "d2"), ("seq1", "seq2"),
+    ("list1", "list2"), ("tuple1", "tuple2"), ("set1", "set2"),
+)
+
+
+def _assertion_operands(tb) -> Optional[Tuple[Any, Any]]:
+    """The values compared by the outermost unittest assertion method in a traceback."""
+    for frame, _ in traceback.walk_tb(tb):
+        if frame.f_globals.get("__name__") != "unittest.case":
+            continue
+        frame_locals = frame.f_locals
+        for left, right in _ASSERTION_OPERANDS:
+            if left in frame_locals and right in frame_locals:
+                return frame_locals[left], frame_locals[right]
+    return None
 
 
 class LLMTestResult(unittest.TestResult):
@@ -36,6 +61,16 @@ class LLMTestResult(unittest.TestResult):
         self.start_time = time.time()
         self._started = False
         
+        # Resource measurements (None unless enabled)
+        self.meter = ResourceMeter.from_config(self.config)
+        self._resource_token = None
+        self._test_metrics: Optional[Dict[str, Any]] = None
+        
+        # Tail of each test's output, kept for failures (None unless enabled)
+        self.capture: Optional[OutputCapture] = None
+        if self.config.capture_output and self.config.output_tail_lines > 0:
+            self.capture = OutputCapture(self.config.output_tail_lines, self.config.output_tail_chars)
+        
     def startTest(self, test):
         """Called when a test starts."""
         super().startTest(test)
@@ -67,6 +102,45 @@ class LLMTestResult(unittest.TestResult):
         
         self.current_suite = self.suites[suite_name]
         
+        # With buffer=True unittest captures output itself (see _output_tail)
+        if self.capture is not None and not self.buffer:
+            self.capture.start()
+        
+        # Started last so the reporter's own work is not measured
+        if self.meter is not None and self.meter.sampled(test.id()):
+            self._resource_token = self.meter.start()
+    
+    def _stop_measuring(self):
+        """End the current test's resource measurement, before any error extraction."""
+        if self._resource_token is not None:
+            self._test_metrics = self.meter.stop(self._resource_token)
+            self._resource_token = None
+    
+    def _stop_capturing(self):
+        """Restore stdout and stderr, so error extraction and reporting are not captured."""
+        if self.capture is not None:
+            self.capture.stop()
+    
+    def _output_tail(self) -> Optional[str]:
+        """The bounded tail of what the current test wrote, for its failure."""
+        if self.buffer:
+            lines, chars = self.config.output_tail_lines, self.config.output_tail_chars
+            buffers = (("stdout", self._stdout_buffer), ("stderr", self._stderr_buffer))
+            return format_output_tail(
+                (name, tail_text(buffer.getvalue(), lines, chars))
+                for name, buffer in buffers if buffer is not None
+            )
+        if self.capture is not None:
+            return self.capture.tail()
+        return None
+    
+    def stopTest(self, test):
+        """Called when a test ends."""
+        if self.capture is not None:
+            self.capture.stop()
+            self.capture.clear()
+        super().stopTest(test)
+        
     def addSuccess(self, test):
         """Called when a test passes."""
         super().addSuccess(test)
@@ -74,14 +148,22 @@ class LLMTestResult(unittest.TestResult):
         
     def addError(self, test, err):
         """Called when a test raises an unexpected exception."""
+        self._stop_measuring()
+        self._stop_capturing()
         super().addError(test, err)
         error_info = self._extract_error_info(err)
         self._add_test_result(test, TestStatus.FAILED, error_info)
         
     def addFailure(self, test, err):
         """Called when a test fails."""
+        self._stop_measuring()
+        self._stop_capturing()
+        # Before unittest trims its own frames (with the compared values)
+        # off the traceback
+        diff = self._structural_diff(err[2]) if self.config.structural_diff else None
         super().addFailure(test, err)
         error_info = self._extract_error_info(err)
+        error_info.diff = diff
         self._add_test_result(test, TestStatus.FAILED, error_info)
         
     def addSkip(self, test, reason):
@@ -101,6 +183,11 @@ class LLMTestResult(unittest.TestResult):
         
     def _add_test_result(self, test, status: TestStatus, error: Optional[ErrorInfo] = None):
         """Add a test result to the current suite."""
+        self._stop_measuring()
+        self._stop_capturing()
+        metrics, self._test_metrics = self._test_metrics, None
+        if error is not None:
+            error.captured_output = self._output_tail()
         if not self.current_suite:
             return
             
@@ -125,11 +212,16 @@ class LLMTestResult(unittest.TestResult):
             line_number=line_number,
             error=error
         )
+        if metrics:
+            test_result.metadata.update(metrics)
         
         self.current_suite.tests.append(test_result)
         
     def _clean_error_message(self, message: str) -> str:
         """Clean up unittest's assertion messages."""
+        # Bound the message before any line splitting or filtering so huge
+        # diffs and reprs don't dominate extraction time
+        message = clip_text(message, self.config.max_message_length)
         lines = message.split('\n')
         cleaned_lines = []
         
@@ -178,51 +270,23 @@ class LLMTestResult(unittest.TestResult):
             message=self._clean_error_message(str(exc_value))
         )
         
-        # Extract traceback
+        # Extract traceback: frames are filtered and collapsed without
+        # reading source, which is only looked up for the frames shown
         if exc_tb:
-            tb_lines = traceback.format_tb(exc_tb)
-            if tb_lines:
-                # Get the last frame for code context
-                last_frame = tb_lines[-1]
+            entries = filter_frames(walk_frames(exc_tb))
+            if entries:
+                # Code context of the innermost frame of the code under test
+                frame = deepest_user_frame(entries)
+                error_info.code_context = format_code_context(frame.filename, frame.lineno)
                 
-                # Extract file and line info
-                import re
-                match = re.search(r'File "(.+?)", line (\d+), in', last_frame)
-                if match:
-                    file_path = match.group(1)
-                    line_num = int(match.group(2))
-                    
-                    # Try to get code context
-                    try:
-                        with open(file_path, 'r') as f:
-                            lines = f.readlines()
-                            
-                        # Get surrounding lines
-                        start = max(0, line_num - 3)
-                        end = min(len(lines), line_num + 2)
-                        
-                        context_lines = []
-                        for i in range(start, end):
-                            prefix = ">" if i == line_num - 1 else " "
-                            line_content = lines[i].rstrip()
-                            context_lines.append(f"{prefix} {i+1:3d} | {line_content}")
-                            
-                            # Add error pointer for the specific line
-                            if i == line_num - 1 and '^' in last_frame:
-                                # Extract column position
-                                pointer_match = re.search(r'\n\s*\^\s*\n', last_frame)
-                                if pointer_match:
-                                    # Add pointer line
-                                    spaces = ' ' * 7  # Account for line number prefix
-                                    context_lines.append(f"      | {spaces}^")
-                        
-                        error_info.code_context = "\n".join(context_lines)
-                    except:
-                        pass
-            
-            # Store limited stack trace
-            if self.config.stack_trace_lines > 0:
-                error_info.stack_trace = "".join(tb_lines[-self.config.stack_trace_lines:])
+                # Store limited stack trace
+                if self.config.stack_trace_lines > 0:
+                    error_info.stack_trace = format_frames(entries, self.config.stack_trace_lines)
+                
+                if self.config.capture_locals:
+                    error_info.local_variables = format_locals(
+                        find_frame(exc_tb, frame), self.config.locals_max_bytes
+                    )
         
         # Extract expected/actual values
         expected, actual = self.classifier.extract_values(error_info.message)
@@ -236,6 +300,14 @@ class LLMTestResult(unittest.TestResult):
         
         return error_info
         
+    def _structural_diff(self, exc_tb) -> Optional[str]:
+        """Path-addressed diff of the dicts, lists or sets a failed assertion compared."""
+        operands = _assertion_operands(exc_tb)
+        if operands is None or not all(is_structured(value) for value in operands):
+            return None
+        differences = structural_diff(*operands)
+        return "\n".join(differences) if differences else None
+    
     def startTestRun(self):
         """Called once before any tests are run."""
         super().startTestRun()
@@ -286,6 +358,12 @@ class LLMTestRunner(unittest.TextTestRunner):
         
     def _makeResult(self):
         """Create test result instance."""
+        if isinstance(self.resultclass, type) and issubclass(self.resultclass, LLMTestResult):
+            # Pass the runner's config in so the result doesn't load its own
+            # and its formatter uses the same settings
+            return self.resultclass(
+                self.stream, self.descriptions, self.verbosity, config=self.config
+            )
         result = self.resultclass(
             self.stream, self.descriptions, self.verbosity
         )
@@ -308,9 +386,11 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Run unittest with LLM-optimized reporter')
-    parser.add_argument('--mode', choices=['summary', 'detailed'], 
+    parser.add_argument('--mode', choices=['summary', 'detailed', 'delta'], 
                         help='Output mode')
     parser.add_argument('--output', help='Output file path')
+    parser.add_argument('--capture-output', action='store_true',
+                        help='Capture test output and show its tail for failures')
     parser.add_argument('--pattern', default='test*.py',
                         help='Test file pattern (default: test*.py)')
     parser.add_argument('--start-directory', default='.',
@@ -328,6 +408,8 @@ def main():
         config_options['mode'] = args.mode
     if args.output:
         config_options['output_file'] = args.output
+    if args.capture_output:
+        config_options['capture_output'] = True
         
     config = ReporterConfig.load(config_options)
     
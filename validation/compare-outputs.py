@@ -2,14 +2,20 @@
 
 """
 Validate test reporter outputs against the LLM-optimized format specification
+
+Files are read in line-aligned blocks and validated in a single pass, so memory use
+does not depend on report size. Files are validated in parallel and results
+are written to validation_results.json as they complete.
 """
 
 import sys
 import os
 import re
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple, Union
 
 # Force unbuffered output
 sys.stdout = os.fdopen(sys.stdout.fileno(), 'w', buffering=1)
@@ -18,186 +24,279 @@ sys.stderr = os.fdopen(sys.stderr.fileno(), 'w', buffering=1)
 # Configuration constants
 MAX_LINES_BEFORE_HEADER = 5  # Maximum allowed lines before the LLM TEST REPORTER header
 MAX_LINES_AFTER_EXIT = 4     # Maximum allowed lines after the EXIT CODE line
+MAX_MESSAGES_PER_FILE = 50   # Errors/warnings kept per file; the rest are counted
+
+CHUNK_SIZE = 1 << 20          # Characters read per block; blocks always end on a line boundary
+
+ANSI_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+EXIT_CODE_PATTERN = re.compile(r'EXIT CODE: [01]')
+FILE_REF_PATTERN = re.compile(r'FILE: ([^\n]+)')
+FILE_LINE_PATTERN = re.compile(r':\d+$')
+HEADER_PATTERN = re.compile(r'^# LLM TEST REPORTER', re.M)
+SECTION_PATTERN = re.compile(r'^(?:# LLM TEST REPORTER|## [^\n]*|SUITE:)', re.M)
+SECTION_NUMBER_PATTERN = re.compile(r'_#\d+$')
+
+
+class FormatValidator:
+    """Single-pass, constant-memory validation state machine for one report
+
+    Input is fed in blocks of complete lines; every check runs as a regex or
+    string scan over the block, and only counters and a bounded list of
+    messages are kept between blocks.
+    """
 
-class OutputComparator:
     def __init__(self):
-        pass
+        self.line_count = 0
+        self.header_index = -1
+        self.exit_index = -1
+        self.last_content_index = -1
+        self.has_summary = False
+        self.has_ansi = False
+        self.has_exit_code = False
+        self.errors: List[str] = []
+        self.error_overflow = 0
+        # Line counts per section; numbered sections (TEST FAILURE #n) share a key
+        self.sections: Dict[str, int] = {}
+        self.current_section = 'header'
+
+    def _error(self, message: str):
+        if len(self.errors) < MAX_MESSAGES_PER_FILE:
+            self.errors.append(message)
+        else:
+            self.error_overflow += 1
+
+    def _count_section_lines(self, lines: int):
+        if lines:
+            self.sections[self.current_section] = self.sections.get(self.current_section, 0) + lines
+
+    def feed(self, block: str):
+        """Process a block of complete lines (only the final block may lack a trailing newline)"""
+        if not block:
+            return
+        base = self.line_count
+
+        if self.header_index == -1:
+            match = HEADER_PATTERN.search(block)
+            if match:
+                self.header_index = base + block.count('\n', 0, match.start())
+        if self.exit_index == -1:
+            position = block.find('EXIT CODE:')
+            if position != -1:
+                self.exit_index = base + block.count('\n', 0, position)
+
+        content = block.rstrip()
+        if content:
+            self.last_content_index = base + content.count('\n')
+
+        if not self.has_summary and '## SUMMARY' in block:
+            self.has_summary = True
+        if not self.has_ansi and '\x1b' in block and ANSI_PATTERN.search(block):
+            self.has_ansi = True
+        if not self.has_exit_code and EXIT_CODE_PATTERN.search(block):
+            self.has_exit_code = True
 
-    def extract_sections(self, content: str) -> Dict[str, str]:
-        """Extract major sections from reporter output"""
-        sections = {}
-        current_section = 'header'
-        section_content = []
-        
-        for line in content.split('\n'):
-            if line.startswith('# LLM TEST REPORTER'):
-                sections[current_section] = '\n'.join(section_content)
-                current_section = 'header'
-                section_content = [line]
-            elif line.startswith('## '):
-                sections[current_section] = '\n'.join(section_content)
-                current_section = line[3:].lower().replace(' ', '_')
-                section_content = [line]
-            elif line.startswith('SUITE:'):
-                if current_section != 'suites':
-                    sections[current_section] = '\n'.join(section_content)
-                    current_section = 'suites'
-                    section_content = []
-                section_content.append(line)
+        # Validate file paths include line numbers
+        if 'FILE: ' in block:
+            for ref in FILE_REF_PATTERN.findall(block):
+                if not FILE_LINE_PATTERN.search(ref.strip()):
+                    self._error(f"File reference missing line number: {ref}")
+
+        # Track sections: lines before a section start belong to the current one
+        position = 0
+        for match in SECTION_PATTERN.finditer(block):
+            self._count_section_lines(block.count('\n', position, match.start()))
+            position = match.start()
+            marker = match.group(0)
+            if marker.startswith('# LLM TEST REPORTER'):
+                self.current_section = 'header'
+            elif marker.startswith('## '):
+                name = marker[3:].lower().replace(' ', '_')
+                self.current_section = SECTION_NUMBER_PATTERN.sub('', name)
             else:
-                section_content.append(line)
-        
-        sections[current_section] = '\n'.join(section_content)
-        return sections
+                self.current_section = 'suites'
+        lines = block.count('\n', position)
+        if not block.endswith('\n'):
+            lines += 1
+        self._count_section_lines(lines)
 
-    def validate_format(self, content: str) -> Tuple[bool, List[str], List[str]]:
-        """Validate output against format specification"""
+        self.line_count = base + block.count('\n') + (0 if block.endswith('\n') else 1)
+
+    def finish(self) -> Tuple[bool, List[str], List[str]]:
+        """Return (valid, errors, warnings) for the lines fed so far"""
         errors = []
         warnings = []
-        
-        lines = content.split('\n')
-        
-        # Count lines before reporter output
-        header_index = -1
-        for i, line in enumerate(lines):
-            if line.startswith('# LLM TEST REPORTER'):
-                header_index = i
-                break
-        
-        if header_index == -1:
+
+        if self.header_index == -1:
             errors.append("Missing or invalid header")
         else:
-            lines_before = header_index
+            lines_before = self.header_index
             if lines_before > MAX_LINES_BEFORE_HEADER:
                 warnings.append(f"Excessive output before reporter: {lines_before} lines (threshold: {MAX_LINES_BEFORE_HEADER})")
-        
-        # Count lines after EXIT CODE
-        exit_index = -1
-        for i, line in enumerate(lines):
-            if 'EXIT CODE:' in line:
-                exit_index = i
-                break
-        
-        if exit_index != -1:
-            lines_after = len(lines) - exit_index - 1
-            # Filter out empty lines at the end
-            while lines_after > 0 and not lines[exit_index + lines_after].strip():
-                lines_after -= 1
-            
+
+        if self.exit_index != -1:
+            # Lines after EXIT CODE, ignoring empty lines at the end
+            lines_after = max(0, self.last_content_index - self.exit_index)
             if lines_after > MAX_LINES_AFTER_EXIT:
                 warnings.append(f"Excessive output after reporter: {lines_after} lines (threshold: {MAX_LINES_AFTER_EXIT})")
-        
-        # Original validations
-        # Check for required sections
-        if '## SUMMARY' not in content:
+
+        if not self.has_summary:
             errors.append("Missing SUMMARY section")
-        
-        # Check for ANSI codes
-        ansi_pattern = re.compile(r'\x1b\[[0-9;]*m')
-        if ansi_pattern.search(content):
+        if self.has_ansi:
             errors.append("Output contains ANSI color codes")
-        
-        # Check exit code
-        if not re.search(r'EXIT CODE: [01]', content):
+        if not self.has_exit_code:
             errors.append("Missing or invalid EXIT CODE")
-        
-        # Validate file paths include line numbers
-        file_refs = re.findall(r'FILE: ([^\n]+)', content)
-        for ref in file_refs:
-            if not re.search(r':\d+$', ref.strip()):
-                errors.append(f"File reference missing line number: {ref}")
-        
+
+        errors.extend(self.errors)
+        if self.error_overflow:
+            errors.append(f"... and {self.error_overflow} more errors")
+
         return len(errors) == 0, errors, warnings
 
-    def generate_report(self, results: Dict) -> None:
+
+class OutputComparator:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _feed(content: Union[str, Iterable[str]]) -> FormatValidator:
+        validator = FormatValidator()
+        if isinstance(content, str):
+            validator.feed(content)
+        else:
+            for line in content:
+                validator.feed(line if line.endswith('\n') else line + '\n')
+        return validator
+
+    def extract_sections(self, content: Union[str, Iterable[str]]) -> Dict[str, int]:
+        """Count lines per major section of reporter output"""
+        return self._feed(content).sections
+
+    def validate_format(self, content: Union[str, Iterable[str]]) -> Tuple[bool, List[str], List[str]]:
+        """Validate output (a string or an iterable of lines) against format specification"""
+        return self._feed(content).finish()
+
+    def generate_report(self, summary: Dict) -> None:
         """Generate format validation report"""
         print("\n" + "="*60)
         print("LLM Test Reporter Format Validation Report")
         print("="*60)
         sys.stdout.flush()
-        
+
         # Summary
-        total_files = len(results['files'])
-        valid_files = sum(1 for f in results['files'].values() if f['valid'])
-        
+        total_files = summary['total_files']
+        valid_files = summary['valid_files']
+
         print(f"\nFiles analyzed: {total_files}")
         print(f"Valid formats: {valid_files}")
         print(f"Invalid formats: {total_files - valid_files}")
         sys.stdout.flush()
-        
+
         # Format validation details
-        if any(not f['valid'] for f in results['files'].values()):
+        if summary['errors']:
             print("\n## Format Validation Errors:")
-            for filename, file_data in results['files'].items():
-                if not file_data['valid']:
-                    print(f"\n{filename}:")
-                    for error in file_data['errors']:
-                        print(f"  - {error}")
-        
+            for filename, errors in summary['errors'].items():
+                print(f"\n{filename}:")
+                for error in errors:
+                    print(f"  - {error}")
+
         # Format validation warnings
-        if any(f['warnings'] for f in results['files'].values()):
+        if summary['warnings']:
             print("\n## Format Validation Warnings:")
-            for filename, file_data in results['files'].items():
-                if file_data['warnings']:
-                    print(f"\n{filename}:")
-                    for warning in file_data['warnings']:
-                        print(f"  - {warning}")
-        
+            for filename, warnings in summary['warnings'].items():
+                print(f"\n{filename}:")
+                for warning in warnings:
+                    print(f"  - {warning}")
+
         # Success message
         if valid_files == total_files:
             print("\n✓ All files pass format validation!")
         else:
             print(f"\n✗ {total_files - valid_files} file(s) failed format validation")
-        
+
         sys.stdout.flush()
 
+
+def validate_file(file_path: Path) -> Tuple[str, Dict]:
+    """Validate one output file by streaming it in line-aligned blocks (runs in a worker process)"""
+    validator = FormatValidator()
+    with open(file_path, 'r', errors='replace') as f:
+        remainder = ''
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            end = chunk.rfind('\n') + 1
+            validator.feed(chunk[:end])
+            remainder = chunk[end:]
+        validator.feed(remainder)
+
+    valid, errors, warnings = validator.finish()
+    return file_path.name, {
+        'valid': valid,
+        'errors': errors,
+        'warnings': warnings,
+        'lines': validator.line_count,
+        'sections': validator.sections,
+    }
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: compare-outputs.py <output_dir>")
-        sys.exit(1)
-    
-    output_dir = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        usage="compare-outputs.py <output_dir> [--jobs N]",
+        description="Validate reporter outputs against the format specification",
+    )
+    parser.add_argument('output_dir', help="Directory containing *.txt reporter outputs")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="Number of files validated in parallel (default: CPU count)")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
     if not output_dir.exists():
         print(f"Error: Directory {output_dir} does not exist")
         sys.exit(1)
-    
+
     comparator = OutputComparator()
-    results = {
-        'files': {}
+    summary = {
+        'total_files': 0,
+        'valid_files': 0,
+        'errors': {},
+        'warnings': {},
     }
-    
+
     # Find all output files
-    output_files = list(output_dir.glob('*.txt'))
-    
-    # Validate each file
-    for file_path in output_files:
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        valid, errors, warnings = comparator.validate_format(content)
-        results['files'][file_path.name] = {
-            'valid': valid,
-            'errors': errors,
-            'warnings': warnings,
-            'sections': comparator.extract_sections(content)
-        }
-    
+    output_files = sorted(output_dir.glob('*.txt'))
+
+    # Validate files in parallel, writing each result as soon as it is available
+    results_file = output_dir / 'validation_results.json'
+    with open(results_file, 'w') as out, ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        out.write('{\n  "files": {')
+        chunksize = max(1, len(output_files) // (max(1, args.jobs) * 4))
+        for index, (name, entry) in enumerate(executor.map(validate_file, output_files, chunksize=chunksize)):
+            entry_json = json.dumps(entry, indent=2).replace('\n', '\n    ')
+            out.write(f"{',' if index else ''}\n    {json.dumps(name)}: {entry_json}")
+            out.flush()
+
+            summary['total_files'] += 1
+            if entry['valid']:
+                summary['valid_files'] += 1
+            else:
+                summary['errors'][name] = entry['errors']
+            if entry['warnings']:
+                summary['warnings'][name] = entry['warnings']
+        out.write('\n  }\n}\n')
+
     # Removed pairwise comparison - we only validate against the format specification
-    
+
     # Generate report
-    comparator.generate_report(results)
-    
-    # Save detailed results
-    results_file = output_dir / 'validation_results.json'
-    with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
-    
+    comparator.generate_report(summary)
+
     print(f"\nDetailed results saved to: {results_file}")
     sys.stdout.flush()
-    
+
     # Exit with error if validation failed
-    if not all(f['valid'] for f in results['files'].values()):
+    if summary['valid_files'] != summary['total_files']:
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+Import-time budget check for the pytest LLM reporter plugin.
+
+The plugin is loaded through the ``pytest11`` entry point on every pytest
+invocation, whether or not the reporter is activated. This script measures
+what importing it adds on top of pytest itself using ``python -X importtime``
+and fails when the cost exceeds the budget or when modules that should load
+lazily are imported eagerly.
+
+Usage:
+    import-benchmark.py [--budget-us N] [--runs N]
+"""
+
+import sys
+import os
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+PYTHON_ROOT = PROJECT_ROOT / "python"
+SOURCE_PATHS = [
+    PYTHON_ROOT / "llm_reporter_shared" / "src",
+    PYTHON_ROOT / "pytest-reporter" / "src",
+]
+
+# Configuration constants
+IMPORT_BUDGET_US = 2000  # Maximum cumulative import time of the plugin (microseconds)
+DEFAULT_RUNS = 7         # Best of N runs is compared with the budget
+PLUGIN_MODULE = "llm_pytest_reporter.plugin"
+
+# Modules that must not be imported until the reporter is activated
+LAZY_MODULES = [
+    "llm_pytest_reporter.reporter",
+    "llm_reporter_shared.config",
+    "llm_reporter_shared.formatters",
+    "llm_reporter_shared.error_classifier",
+    "llm_reporter_shared.models",
+]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        # Keep the indentation of the name: it encodes the import nesting
+        entries.append((fields[2][1:].rstrip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def measure_once() -> Tuple[int, Dict[str, int]]:
+    """Import the plugin after pytest and return its cost and imported modules."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(p) for p in SOURCE_PATHS] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    # Import pytest first so only the plugin's own cost is attributed to it
+    code = f"import pytest; import {PLUGIN_MODULE}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr)
+        sys.exit(1)
+
+    entries = parse_importtime(proc.stderr)
+    modules = {name.strip(): cumulative for name, _, cumulative in entries}
+    # Top-level entries have no indentation; the plugin's cumulative time
+    # covers everything it pulled in that pytest had not already imported
+    total = sum(
+        cumulative for name, _, cumulative in entries
+        if not name.startswith(" ") and name.strip().startswith("llm_")
+    )
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the pytest plugin")
+    parser.add_argument("--budget-us", type=int, default=IMPORT_BUDGET_US,
+                        help=f"Import budget in microseconds (default: {IMPORT_BUDGET_US})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"Number of measurements, best is used (default: {DEFAULT_RUNS})")
+    args = parser.parse_args()
+
+    timings = []
+    modules: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total, modules = measure_once()
+        timings.append(total)
+
+    best = min(timings)
+    print(f"Plugin import time: {best} us (best of {args.runs}, budget {args.budget_us} us)")
+    for name, cumulative in sorted(modules.items()):
+        if name.startswith("llm_"):
+            print(f"  {name:<45} {cumulative:>8} us")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        failed = True
+        print("\n✗ Modules imported before the reporter was activated:")
+        for name in eager:
+            print(f"  - {name}")
+    if best > args.budget_us:
+        failed = True
+        print(f"\n✗ Import time exceeds budget by {best - args.budget_us} us")
+
+    if failed:
+        sys.exit(1)
+    print("\n✓ Plugin import is within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+
+"""
+Microbenchmarks for the hot paths of the Python LLM reporter shared package.
+
+Drives ErrorClassifier, BaseFormatter and serialization functions directly
+with realistic failure corpora so a regression in a single function shows up with its own
+number instead of being buried in end-to-end run noise.
+
+Usage:
+    micro-benchmark.py run [--output FILE]       Run and print results
+    micro-benchmark.py save                      Run and store as the baseline
+    micro-benchmark.py compare [--baseline FILE] Run and compare with the baseline
+
+compare is noise-aware. Ratios are divided by the host speed factor, the
+median ratio of all compared benchmarks (most code is unchanged by any one
+change, so the median tracks a slower or busier host rather than the code).
+A benchmark still over the threshold is re-measured up to CONFIRM_RUNS
+times in a fresh interpreter, keeping its best time, and is only reported
+if it stays over. The pickle entries only measure the standard library
+serialization is compared with, so they are shown but never reported.
+"""
+
+import sys
+import os
+import json
+import pickle
+import timeit
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SHARED_SRC = PROJECT_ROOT / "python" / "llm_reporter_shared" / "src"
+BASELINE_FILE = SCRIPT_DIR / "baselines" / "micro-benchmark.json"
+
+# Allow running from a checkout without installing the shared package
+sys.path.insert(0, str(SHARED_SRC))
+
+from llm_reporter_shared import (  # noqa: E402
+    ReporterConfig,
+    ErrorClassifier,
+    TestSuite,
+    TestResult,
+    TestStatus,
+    ErrorInfo,
+)
+from llm_reporter_shared.formatters import BaseFormatter  # noqa: E402
+from llm_reporter_shared import serialization  # noqa: E402
+from llm_reporter_shared.ranking import FailureRanking  # noqa: E402
+from llm_reporter_shared import frames  # noqa: E402
+from llm_reporter_shared import diff  # noqa: E402
+
+# Configuration constants
+DEFAULT_REPEAT = 5               # Timing runs per benchmark (best and median are kept)
+TARGET_RUN_SECONDS = 0.2         # Approximate duration of a single timing run
+REGRESSION_THRESHOLD = 1.25      # Slowdown ratio reported as a regression
+CONFIRM_RUNS = 3                 # Re-measurements of a suspected regression
+MIN_NORMALIZED = 5               # Benchmarks needed to estimate the host speed factor
+REFERENCE_PREFIX = "pickle."     # Stdlib measurements for comparison, never regressions
+
+
+# ---------------------------------------------------------------------------
+# Corpora
+# ---------------------------------------------------------------------------
+
+def pytest_rewrite_message() -> str:
+    """Assertion message as produced by pytest's assertion rewriting."""
+    left = {f"key_{i}": i for i in range(40)}
+    right = dict(left, key_7=70, key_21=210)
+    lines = [
+        f"AssertionError: assert {left!r} == {right!r}",
+        "  Omitting 38 identical items, use -vv to show",
+        "  Differing items:",
+        "  {'key_7': 7} != {'key_7': 70}",
+        "  {'key_21': 21} != {'key_21': 210}",
+        "  Full diff:",
+    ]
+    for i in range(40):
+        if i in (7, 21):
+            lines.append(f"  -     'key_{i}': {i * 10},")
+            lines.append(f"  +     'key_{i}': {i},")
+        else:
+            lines.append(f"        'key_{i}': {i},")
+    lines.append("  +  where {...} = build_payload()")
+    return "\n".join(lines)
+
+
+def unittest_diff_message() -> str:
+    """Long unittest assertEqual list diff."""
+    first = list(range(500))
+    second = list(first)
+    second[250] = -1
+    lines = [
+        f"Lists differ: {first!r} != {second!r}",
+        "",
+        "First differing element 250:",
+        "250",
+        "-1",
+        "",
+    ]
+    for i in range(500):
+        if i == 250:
+            lines.append("-  250,")
+            lines.append("?  ^^^")
+            lines.append("+  -1,")
+            lines.append("?  ^^")
+        else:
+            lines.append(f"   {i},")
+    return "\n".join(lines)
+
+
+def huge_repr_message() -> str:
+    """Comparison of two very large string reprs."""
+    expected = "a" * 100_000
+    actual = "a" * 99_999 + "b"
+    return f"assert {actual!r} == {expected!r}"
+
+
+def simple_message() -> str:
+    """The common short case."""
+    return "assert 5 == 10"
+
+
+CORPORA: Dict[str, Tuple[str, str]] = {
+    "simple": ("AssertionError", simple_message()),
+    "pytest_rewrite": ("AssertionError", pytest_rewrite_message()),
+    "unittest_diff": ("AssertionError", unittest_diff_message()),
+    "huge_repr": ("AssertionError", huge_repr_message()),
+    "type_error": ("TypeError", 'can only concatenate str (not "int") to str'),
+}
+
+
+def build_error(error_type: str, message: str) -> ErrorInfo:
+    """Build an ErrorInfo the way the reporters do."""
+    classifier = ErrorClassifier()
+    error = ErrorInfo(type=error_type, message=message)
+    error.expected, error.actual = classifier.extract_values(message)
+    error.fix_hint = classifier.generate_fix_hint(error)
+    error.code_context = "\n".join(
+        f"{'>' if i == 2 else ' '} {40 + i:3d} | line {i}" for i in range(5)
+    )
+    return error
+
+
+def build_suite(index: int, tests: int, failures: int) -> TestSuite:
+    """Build a suite with a mix of passing and failing tests."""
+    suite = TestSuite(name=f"test_module_{index}", file_path=f"tests/test_module_{index}.py")
+    corpora = list(CORPORA.values())
+    for i in range(tests):
+        failed = i < failures
+        test = TestResult(
+            name=f"test_case_{i}",
+            full_name=f"TestModule{index} > test_case_{i}",
+            status=TestStatus.FAILED if failed else TestStatus.PASSED,
+            duration=0.001,
+            line_number=10 + i,
+        )
+        if failed:
+            test.error = build_error(*corpora[i % len(corpora)])
+        suite.tests.append(test)
+    return suite
+
+
+def recursion_traceback():
+    """Traceback of a RecursionError, about a thousand identical frames deep."""
+    def recurse(n):
+        return recurse(n + 1)
+    try:
+        recurse(0)
+    except RecursionError as e:
+        return e.__traceback__
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def collect_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Return the benchmark callables keyed by name."""
+    classifier = ErrorClassifier()
+    benchmarks: Dict[str, Callable[[], object]] = {}
+
+    for name, (error_type, message) in CORPORA.items():
+        error = build_error(error_type, message)
+        benchmarks[f"classify_error[{name}]"] = (
+            lambda e=error: classifier.classify_error(e)
+        )
+        benchmarks[f"extract_values[{name}]"] = (
+            lambda m=message: classifier.extract_values(m)
+        )
+        benchmarks[f"generate_fix_hint[{name}]"] = (
+            lambda e=error: classifier.generate_fix_hint(e)
+        )
+
+    detailed = BaseFormatter(ReporterConfig(mode="detailed"), output=sys.stdout)
+    summary = BaseFormatter(ReporterConfig(mode="summary"), output=sys.stdout)
+    failing_suite = build_suite(0, tests=200, failures=200)
+    mixed_suites = [build_suite(i, tests=200, failures=5) for i in range(50)]
+
+    benchmarks["_format_suite_detailed[200 failures]"] = (
+        lambda: detailed._format_suite_detailed(failing_suite)
+    )
+    benchmarks["_format_suite_summary[200 failures]"] = (
+        lambda: summary._format_suite_summary(failing_suite)
+    )
+    benchmarks["format_summary[50 suites x 200 tests]"] = (
+        lambda: summary.format_summary(mixed_suites, 1.0, 1)
+    )
+
+    # Filtering and formatting a deep recursive stack trace
+    recursion_tb = recursion_traceback()
+    benchmarks["frames.filter_frames[RecursionError]"] = (
+        lambda: frames.format_frames(frames.filter_frames(frames.walk_frames(recursion_tb)), 5)
+    )
+
+    # Locating the difference of multi-megabyte values, which difflib
+    # cannot do in reasonable time
+    large_expected = "x" * 3_000_000
+    large_actual = large_expected[:1_000_000] + "Y" + large_expected[1_000_001:]
+    large_lines = "\n".join(f"row {i}" for i in range(100_000))
+    changed_lines = large_lines.replace("row 5000\n", "").replace("row 9000\n", "row 9000\nextra\n")
+    benchmarks["diff.diff_summary[3 MB text]"] = (
+        lambda: diff.diff_summary(large_expected, large_actual)
+    )
+    benchmarks["diff.diff_summary[100000 lines]"] = (
+        lambda: diff.diff_summary(large_lines, changed_lines)
+    )
+
+    # Ranking many failures and taking only the top ones, as under an output budget
+    ranking_suites = [build_suite(i, tests=200, failures=200) for i in range(100)]
+    ranking_failures = [(s, t, None) for s in ranking_suites for t in s.tests]
+    benchmarks["FailureRanking[20000 failures, top 100]"] = (
+        lambda: [f for f, _ in zip(FailureRanking(ranking_failures), range(100))]
+    )
+
+    # Serialization, with pickle as the reference it has to beat. Failure
+    # messages get a unique suffix: in a real run they are distinct objects,
+    # which pickle's memo cannot share the way it shares corpus strings.
+    run_suites = [build_suite(i, tests=200, failures=5) for i in range(50)]
+    for suite in run_suites:
+        for test in suite.tests:
+            if test.error:
+                test.error.message += f" [{test.full_name}]"
+    passing_suites = [build_suite(i, tests=200, failures=0) for i in range(50)]
+    verify_round_trip(run_suites)
+    for label, suites in (("50 suites x 200 tests", run_suites),
+                          ("10000 passing", passing_suites)):
+        encoded = serialization.dumps(suites)
+        pickled = pickle.dumps(suites, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"serialization size[{label}]: {len(encoded)} bytes "
+              f"(pickle: {len(pickled)} bytes, {len(pickled) / len(encoded):.1f}x)")
+        benchmarks[f"serialization.dumps[{label}]"] = (
+            lambda s=suites: serialization.dumps(s)
+        )
+        benchmarks[f"serialization.loads[{label}]"] = (
+            lambda d=encoded: serialization.loads(d)
+        )
+        benchmarks[f"pickle.dumps[{label}]"] = (
+            lambda s=suites: pickle.dumps(s, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        benchmarks[f"pickle.loads[{label}]"] = (
+            lambda d=pickled: pickle.loads(d)
+        )
+    return benchmarks
+
+
+def verify_round_trip(suites: List[TestSuite]) -> None:
+    """Check that serialization round-trips before timing it."""
+    edge_cases = TestSuite(
+        name="edge_cases",
+        file_path="tests/test_edge_cases.py",
+        setup_error=ErrorInfo(type="RuntimeError", message="setup failed \u00fc"),
+        metadata={"worker": "gw1"},
+        tests=[
+            TestResult(name="test_nul[\x00]", full_name="Edge > test_nul[\x00]",
+                       status=TestStatus.FAILED, line_number=0,
+                       error=ErrorInfo(type="ValueError", message="", fix_hint="hint"),
+                       metadata={"rerun": 1}),
+            TestResult(name="test_renamed", full_name="Other > something_else",
+                       status=TestStatus.SKIPPED),
+            TestResult(name="test_pending", full_name="Edge > test_pending",
+                       status=TestStatus.PENDING),
+        ],
+    )
+    for corpus in (suites, [edge_cases]):
+        if serialization.loads(serialization.dumps(corpus)) != corpus:
+            print("Error: serialization round trip does not reproduce the suites")
+            sys.exit(1)
+
+
+def time_benchmark(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Time a callable, returning per-call timings in microseconds."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    # Scale the loop count so each run takes roughly TARGET_RUN_SECONDS
+    if elapsed > 0:
+        number = max(1, int(number * TARGET_RUN_SECONDS / elapsed))
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "best_us": round(min(runs), 3),
+        "median_us": round(statistics.median(runs), 3),
+        "loops": number,
+    }
+
+
+def run_benchmarks(repeat: int, selected: List[str]) -> Dict:
+    """Run all (or the selected) benchmarks."""
+    results = {}
+    for name, func in collect_benchmarks().items():
+        if selected and not any(s in name for s in selected):
+            continue
+        results[name] = time_benchmark(func, repeat)
+        print(f"{name:<45} {results[name]['best_us']:>12.2f} us")
+        sys.stdout.flush()
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def remeasure_isolated(name: str, repeat: int) -> Dict[str, float]:
+    """Time one benchmark again in a fresh interpreter.
+
+    Earlier benchmarks leave the allocator in a state (heap size, dynamic
+    mmap threshold) that can slow the large allocations of later ones for
+    the rest of the process, so re-runs do not share it.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "result.json")
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "run", "--only", name,
+             "--repeat", str(repeat), "--output", output],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(output, "r") as f:
+            return json.load(f)["benchmarks"][name]
+
+
+def host_factor(baseline: Dict, current: Dict) -> float:
+    """Slowdown of the host since the baseline: the median ratio, at least 1.
+
+    A host that got faster is not credited, so normalizing never turns a
+    ratio under the threshold into a regression.
+    """
+    ratios = [
+        result["best_us"] / baseline["benchmarks"][name]["best_us"]
+        for name, result in current["benchmarks"].items()
+        if baseline["benchmarks"].get(name, {}).get("best_us")
+    ]
+    if len(ratios) < MIN_NORMALIZED:
+        return 1.0
+    return max(1.0, statistics.median(ratios))
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float,
+                    remeasure: Optional[Callable[[str], Dict[str, float]]] = None) -> bool:
+    """Print a per-function comparison, returning False on regressions.
+
+    ``remeasure`` times a benchmark again; suspected regressions are
+    re-measured with it and kept only if they persist.
+    """
+    print("\n" + "=" * 78)
+    print("Microbenchmark comparison (best time per call)")
+    print("=" * 78)
+    if baseline.get("python") != current.get("python"):
+        print(f"Note: baseline recorded on Python {baseline.get('python')}, "
+              f"current is {current.get('python')}")
+    factor = host_factor(baseline, current)
+    print(f"Host speed factor: {factor:.2f}x (median ratio, ratios are divided by it)")
+
+    regressions = []
+    print(f"\n{'BENCHMARK':<45} {'BASELINE':>10} {'CURRENT':>10} {'RATIO':>8}")
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if not base:
+            print(f"{name:<45} {'-':>10} {result['best_us']:>10.2f} {'new':>8}")
+            continue
+        best = result["best_us"]
+        ratio = best / base["best_us"] / factor if base["best_us"] else 0.0
+        if name.startswith(REFERENCE_PREFIX):
+            print(f"{name:<45} {base['best_us']:>10.2f} {best:>10.2f} "
+                  f"{ratio:>7.2f}x  (reference)")
+            continue
+        runs = 0
+        while ratio > threshold and remeasure is not None and runs < CONFIRM_RUNS:
+            best = min(best, remeasure(name)["best_us"])
+            ratio = best / base["best_us"] / factor
+            runs += 1
+        marker = ""
+        if ratio > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif runs:
+            marker = f"  (noise: under the threshold after {runs} re-run{'s' if runs > 1 else ''})"
+        print(f"{name:<45} {base['best_us']:>10.2f} {best:>10.2f} "
+              f"{ratio:>7.2f}x{marker}")
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark(s) slower than {threshold:.2f}x baseline")
+        return False
+    print("\n✓ No regressions against baseline")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the Python reporter hot paths")
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("--baseline", default=str(BASELINE_FILE),
+                        help="Baseline results file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timing runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Slowdown ratio treated as regression (default: {REGRESSION_THRESHOLD})")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.command == "compare":
+        if not os.path.exists(args.baseline):
+            print(f"Error: Baseline {args.baseline} does not exist (run 'save' first)")
+            sys.exit(1)
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    results = run_benchmarks(args.repeat, args.only)
+
+    output_file = args.output
+    if args.command == "save":
+        output_file = args.baseline
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults saved to: {output_file}")
+
+    if baseline is not None and not compare_results(
+        baseline, results, args.threshold,
+        remeasure=lambda name: remeasure_isolated(name, args.repeat),
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Measure the per-test overhead of the pytest LLM reporter.
+
+Generates a suite of trivial tests in a temporary directory and times pytest
+with the plugin not loaded, loaded but inactive, and active. The difference
+divided by the number of tests is the reporter's per-test cost.
+
+Usage:
+    pytest-overhead.py [--tests N] [--runs N] [--failing-every N]
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+PYTHON_ROOT = PROJECT_ROOT / "python"
+SOURCE_PATHS = [
+    PYTHON_ROOT / "llm_reporter_shared" / "src",
+    PYTHON_ROOT / "pytest-reporter" / "src",
+]
+
+# Configuration constants
+DEFAULT_TESTS = 5000        # Generated tests per run
+DEFAULT_RUNS = 3            # Best of N runs is reported
+DEFAULT_FAILING_EVERY = 0   # Make every Nth test fail (0 = all pass)
+TESTS_PER_FILE = 250
+
+COMMON_ARGS = ["-q", "-p", "no:cacheprovider", "-p", "no:randomly"]
+VARIANTS: Dict[str, List[str]] = {
+    "baseline": [],
+    "inactive": ["-p", "llm_pytest_reporter.plugin"],
+    "active": ["-p", "llm_pytest_reporter.plugin", "--llm-reporter"],
+}
+
+
+def generate_suite(directory: Path, tests: int, failing_every: int) -> None:
+    """Write trivial test modules into directory."""
+    for file_index in range(0, tests, TESTS_PER_FILE):
+        lines = []
+        for i in range(file_index, min(file_index + TESTS_PER_FILE, tests)):
+            fails = failing_every and i % failing_every == 0
+            lines.append(f"def test_case_{i}():")
+            lines.append(f"    assert {i} == {i + 1 if fails else i}")
+            lines.append("")
+        (directory / f"test_generated_{file_index // TESTS_PER_FILE}.py").write_text("\n".join(lines))
+
+
+def time_variant(directory: Path, extra_args: List[str], runs: int) -> float:
+    """Return the best wall-clock time of running pytest with extra_args."""
+    env = dict(os.environ)
+    env.pop("LLM_REPORTER_MODE", None)
+    env.pop("LLM_OUTPUT_MODE", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(p) for p in SOURCE_PATHS] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pytest", *COMMON_ARGS, *extra_args, str(directory)],
+            cwd=str(directory),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-test overhead of the pytest LLM reporter")
+    parser.add_argument("--tests", type=int, default=DEFAULT_TESTS,
+                        help=f"Number of generated tests (default: {DEFAULT_TESTS})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"Runs per variant, best is used (default: {DEFAULT_RUNS})")
+    parser.add_argument("--failing-every", type=int, default=DEFAULT_FAILING_EVERY,
+                        help="Make every Nth test fail (default: all pass)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="llm-overhead-") as tmp:
+        directory = Path(tmp)
+        generate_suite(directory, args.tests, args.failing_every)
+
+        results = {}
+        for name, extra_args in VARIANTS.items():
+            results[name] = time_variant(directory, extra_args, args.runs)
+            print(f"{name:<10} {results[name]:8.3f}s")
+            sys.stdout.flush()
+
+    print(f"\nPer-test overhead ({args.tests} tests, best of {args.runs}):")
+    for name in ("inactive", "active"):
+        overhead_us = (results[name] - results["baseline"]) / args.tests * 1e6
+        print(f"  {name:<10} {overhead_us:8.1f} us/test")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+"""
+Index and query archived LLM reporter outputs without re-reading them
+
+Each report is memory-mapped once and scanned for the SUITE:, ## TEST FAILURE #,
+TEST: and ## SUMMARY markers (plus the "- test: message" lines of summary
+mode). The byte offsets of every block are stored in a compact sidecar index
+(<report>.llmidx). Queries only read the indexes and then seek directly to
+the matching blocks. Indexes are rebuilt automatically when a report's size
+or mtime changes.
+
+Usage:
+    report-index.py index <reports...>                  Build or refresh indexes
+    report-index.py failed <test> <reports...>          Which reports failed a test
+    report-index.py show <report> --failure N           Print the Nth failure block
+    report-index.py show <report> --test NAME           Print the blocks of a test
+    report-index.py summary <reports...>                Print the SUMMARY blocks
+"""
+
+import sys
+import os
+import re
+import mmap
+import struct
+import argparse
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+# Index file layout: header, then one record per block in file order
+INDEX_SUFFIX = '.llmidx'
+INDEX_MAGIC = b'LLMIDX'
+INDEX_VERSION = 1
+HEADER_STRUCT = struct.Struct('<6sHQq')   # magic, version, report size, report mtime (ns)
+RECORD_STRUCT = struct.Struct('<BQIHH')   # kind, offset, length, key length, suite length
+
+# Block kinds
+KIND_SUITE = 1          # Summary mode "SUITE: path" block
+KIND_FAILURE = 2        # Detailed mode "## TEST FAILURE #n" block
+KIND_FAILED_TEST = 3    # Summary mode "- test: message" line
+KIND_SUMMARY = 4        # "## SUMMARY" block
+KIND_NAMES = {
+    KIND_SUITE: 'SUITE',
+    KIND_FAILURE: 'FAILURE',
+    KIND_FAILED_TEST: 'FAILED TEST',
+    KIND_SUMMARY: 'SUMMARY',
+}
+
+# Longer alternatives first: "## " must not shadow the specific headings
+MARKER_PATTERN = re.compile(
+    rb'^(## TEST FAILURE #|## SUMMARY|## |# LLM TEST REPORTER|SUITE: |TEST: |FAILED TESTS:)',
+    re.M,
+)
+MAX_FIELD_BYTES = 0xFFFF
+
+
+class Entry(NamedTuple):
+    kind: int
+    offset: int
+    length: int
+    key: str
+    suite: str
+
+
+def index_path_for(report: Path, index_dir: Optional[Path] = None) -> Path:
+    """Return where the index of a report is stored"""
+    if index_dir:
+        return index_dir / (report.name + INDEX_SUFFIX)
+    return report.with_name(report.name + INDEX_SUFFIX)
+
+
+def scan_report(report: Path) -> List[Entry]:
+    """Build the block list of a report with a single regex pass over its mmap"""
+    entries: List[Entry] = []
+    size = report.stat().st_size
+    if size == 0:
+        return entries
+
+    with open(report, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Currently open block: [kind, start, key, suite]
+        current: Optional[list] = None
+
+        def close(end: int):
+            nonlocal current
+            if current is not None:
+                kind, start, key, suite = current
+                entries.append(Entry(kind, start, end - start, key, suite))
+                current = None
+
+        def line_value(start: int) -> str:
+            end = mm.find(b'\n', start)
+            if end == -1:
+                end = size
+            return mm[start:end].decode('utf-8', 'replace').strip()
+
+        for match in MARKER_PATTERN.finditer(mm):
+            marker = match.group(1)
+            start = match.start()
+
+            if marker == b'## TEST FAILURE #':
+                close(start)
+                current = [KIND_FAILURE, start, '', '']
+            elif marker == b'## SUMMARY':
+                close(start)
+                current = [KIND_SUMMARY, start, '', '']
+            elif marker in (b'## ', b'# LLM TEST REPORTER'):
+                close(start)
+            elif marker == b'SUITE: ':
+                value = line_value(match.end())
+                if current is not None and current[0] == KIND_FAILURE:
+                    current[3] = value
+                else:
+                    close(start)
+                    current = [KIND_SUITE, start, value, value]
+            elif marker == b'TEST: ':
+                if current is not None and current[0] == KIND_FAILURE:
+                    current[2] = line_value(match.end())
+            elif marker == b'FAILED TESTS:':
+                # Summary mode: index each "- test: message" line that follows
+                suite = current[2] if current is not None else ''
+                position = mm.find(b'\n', start) + 1
+                while 0 < position < size and mm[position:position + 2] == b'- ':
+                    end = mm.find(b'\n', position)
+                    if end == -1:
+                        end = size
+                    line = mm[position + 2:end].decode('utf-8', 'replace')
+                    name = line.split(': ', 1)[0].strip()
+                    entries.append(Entry(KIND_FAILED_TEST, position, end - position, name, suite))
+                    position = end + 1
+
+        close(size)
+
+    entries.sort(key=lambda e: e.offset)
+    return entries
+
+
+def _encode(text: str) -> bytes:
+    return text.encode('utf-8')[:MAX_FIELD_BYTES]
+
+
+def write_index(index_file: Path, report: Path, entries: List[Entry]) -> None:
+    """Write entries to a compact binary index file"""
+    stat = report.stat()
+    tmp_file = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER_STRUCT.pack(INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns))
+        for entry in entries:
+            key = _encode(entry.key)
+            suite = _encode(entry.suite)
+            f.write(RECORD_STRUCT.pack(entry.kind, entry.offset, entry.length, len(key), len(suite)))
+            f.write(key)
+            f.write(suite)
+    os.replace(tmp_file, index_file)
+
+
+def read_index(index_file: Path, report: Path) -> Optional[List[Entry]]:
+    """Read an index, returning None if it is missing or stale"""
+    try:
+        with open(index_file, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER_STRUCT.size:
+        return None
+
+    magic, version, size, mtime_ns = HEADER_STRUCT.unpack_from(data, 0)
+    stat = report.stat()
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return None
+    if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return None
+
+    entries = []
+    position = HEADER_STRUCT.size
+    while position < len(data):
+        kind, offset, length, key_len, suite_len = RECORD_STRUCT.unpack_from(data, position)
+        position += RECORD_STRUCT.size
+        key = data[position:position + key_len].decode('utf-8', 'replace')
+        position += key_len
+        suite = data[position:position + suite_len].decode('utf-8', 'replace')
+        position += suite_len
+        entries.append(Entry(kind, offset, length, key, suite))
+    return entries
+
+
+def load_index(report: Path, index_dir: Optional[Path] = None, rebuild: bool = False) -> List[Entry]:
+    """Return the entries of a report, (re)building its index when needed"""
+    index_file = index_path_for(report, index_dir)
+    entries = None if rebuild else read_index(index_file, report)
+    if entries is None:
+        entries = scan_report(report)
+        write_index(index_file, report, entries)
+    return entries
+
+
+def read_block(report: Path, entry: Entry) -> str:
+    """Read a single block by seeking to its offset"""
+    with open(report, 'rb') as f:
+        f.seek(entry.offset)
+        return f.read(entry.length).decode('utf-8', 'replace')
+
+
+def iter_failures(entries: List[Entry]) -> Iterator[Entry]:
+    """Failure entries of a report (detailed blocks or summary lines) in file order"""
+    return (e for e in entries if e.kind in (KIND_FAILURE, KIND_FAILED_TEST))
+
+
+def cmd_index(args) -> int:
+    for report in args.reports:
+        entries = load_index(report, args.index_dir, rebuild=args.rebuild)
+        failures = sum(1 for _ in iter_failures(entries))
+        print(f"{report}: {len(entries)} blocks, {failures} failures")
+    return 0
+
+
+def cmd_failed(args) -> int:
+    found = False
+    needle = args.test
+    for report in args.reports:
+        matches = [e for e in iter_failures(load_index(report, args.index_dir))
+                   if needle in e.key]
+        if matches:
+            found = True
+            for entry in matches:
+                print(f"{report}\t{entry.key}\t{entry.suite}")
+    return 0 if found else 1
+
+
+def cmd_show(args) -> int:
+    entries = load_index(args.report, args.index_dir)
+    failures = list(iter_failures(entries))
+    if args.failure is not None:
+        if not 1 <= args.failure <= len(failures):
+            print(f"Error: {args.report} has {len(failures)} failures")
+            return 1
+        selected = [failures[args.failure - 1]]
+    else:
+        selected = [e for e in failures if args.test in e.key]
+        if not selected:
+            print(f"Error: no failure matching '{args.test}' in {args.report}")
+            return 1
+
+    for entry in selected:
+        sys.stdout.write(read_block(args.report, entry))
+        if entry.kind == KIND_FAILED_TEST:
+            sys.stdout.write('\n')
+    return 0
+
+
+def cmd_summary(args) -> int:
+    status = 0
+    for report in args.reports:
+        summaries = [e for e in load_index(report, args.index_dir) if e.kind == KIND_SUMMARY]
+        if len(args.reports) > 1:
+            print(f"==> {report} <==")
+        if not summaries:
+            print("(no SUMMARY section)")
+            status = 1
+            continue
+        sys.stdout.write(read_block(report, summaries[-1]))
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and query archived LLM reporter outputs")
+    parser.add_argument('--index-dir', type=Path,
+                        help="Store indexes here instead of next to the reports")
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    p = sub.add_parser('index', help="Build or refresh indexes")
+    p.add_argument('reports', nargs='+', type=Path)
+    p.add_argument('--rebuild', action='store_true', help="Rebuild even if the index is current")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser('failed', help="List reports in which a test failed")
+    p.add_argument('test', help="Test name or substring of it")
+    p.add_argument('reports', nargs='+', type=Path)
+    p.set_defaults(func=cmd_failed)
+
+    p = sub.add_parser('show', help="Print failure blocks of a report")
+    p.add_argument('report', type=Path)
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument('--failure', type=int, help="1-based failure number in file order")
+    group.add_argument('--test', help="Test name or substring of it")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser('summary', help="Print the SUMMARY section of reports")
+    p.add_argument('reports', nargs='+', type=Path)
+    p.set_defaults(func=cmd_summary)
+
+    args = parser.parse_args()
+    if args.index_dir:
+        args.index_dir.mkdir(parents=True, exist_ok=True)
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()